@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+
+##########################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+##########################################################################
+""" Cold start measurement of the dialogue Lambda handler
+
+Imports src/dialogue_lambda/main.py and calls its handler once in fresh
+Python processes, as a new Lambda execution environment does, and reports
+the median handler import time and first invocation time. Also fails when
+the import pulls in one of the heavy modules that must stay lazily loaded.
+
+    python dialogue_cold_start.py --runs 20
+    python dialogue_cold_start.py --max-import-ms 50 --max-invocation-ms 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+LAMBDA_DIR = os.path.join(os.path.dirname(BENCHMARK_DIR), 'src', 'dialogue_lambda')
+LAZY_MODULES = ('boto3', 'botocore', 'requests')
+
+# Run in the child process, prints its timings as one JSON line
+PROBE = '''
+import io, json, sys, time, contextlib
+started = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    import main
+    imported = time.perf_counter()
+    main.lambda_handler(json.loads(sys.argv[1]), None)
+    invoked = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'invocation_ms': (invoked - imported) * 1000,
+    'lazy_modules_loaded': [name for name in json.loads(sys.argv[2]) if name in sys.modules],
+}))
+'''
+
+SAMPLE_EVENT = {
+    'bot': {'name': 'BenchmarkBot', 'id': 'BENCHMARK0', 'localeId': 'en_GB', 'version': 'DRAFT'},
+    'invocationSource': 'DialogCodeHook',
+    'inputTranscript': 'I would like to order flowers',
+    'sessionId': 'benchmark',
+    'sessionState': {
+        'intent': {'name': 'OrderFlowers', 'slots': {}, 'state': 'InProgress', 'confirmationState': 'None'},
+        'sessionAttributes': {},
+    },
+    'interpretations': [],
+    'messageVersion': '1.0',
+    'responseContentType': 'text/plain; charset=utf-8',
+}
+
+def get_parsed_args():
+    parser = argparse.ArgumentParser(description='Cold start measurement of the dialogue Lambda handler.')
+    parser.add_argument('--runs', type=int, default=10, help='Fresh processes started, the median is reported. Defaults to 10')
+    parser.add_argument('--event', metavar='eventfile', help='Lex V2 event passed to the handler. Defaults to a DialogCodeHook event')
+    parser.add_argument('--max-import-ms', type=float, help='Fails when the median handler import time is higher')
+    parser.add_argument('--max-invocation-ms', type=float, help='Fails when the median first invocation time is higher')
+    return parser.parse_args()
+
+def measure(event):
+    """ Returns the timings of one cold start in a fresh Python process
+
+    :param event: Lex V2 event passed to the handler
+    :type event: dict
+    """
+    env = dict(os.environ, AWS_LAMBDA_FUNCTION_NAME='dialogue-cold-start-benchmark')
+    completed = subprocess.run(
+        [sys.executable, '-c', PROBE, json.dumps(event), json.dumps(LAZY_MODULES)],
+        cwd=LAMBDA_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def main():
+    args = get_parsed_args()
+    event = SAMPLE_EVENT
+    if args.event:
+        with open(args.event) as eventfile:
+            event = json.load(eventfile)
+    runs = [measure(event) for _ in range(args.runs)]
+    import_ms = statistics.median(run['import_ms'] for run in runs)
+    invocation_ms = statistics.median(run['invocation_ms'] for run in runs)
+    lazy_modules_loaded = sorted({name for run in runs for name in run['lazy_modules_loaded']})
+    print('{:<24}{:>10.3f} ms'.format('handler import', import_ms))
+    print('{:<24}{:>10.3f} ms'.format('first invocation', invocation_ms))
+    failures = []
+    if lazy_modules_loaded:
+        failures.append('modules loaded on the startup path : ' + ', '.join(lazy_modules_loaded))
+    if args.max_import_ms is not None and import_ms > args.max_import_ms:
+        failures.append('handler import {:.3f} ms > {} ms'.format(import_ms, args.max_import_ms))
+    if args.max_invocation_ms is not None and invocation_ms > args.max_invocation_ms:
+        failures.append('first invocation {:.3f} ms > {} ms'.format(invocation_ms, args.max_invocation_ms))
+    for failure in failures:
+        print('FAILED ' + failure)
+    sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,546 @@
+#!/usr/bin/env python
+
+##########################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+##########################################################################
+""" In-process stand-in for the Lex Model Building Service
+
+FakeLexModelsService keeps bots, locales, versions, aliases, imports and
+exports in memory and serves the lexv2-models API to real boto3 clients:
+attach() hooks the client's before-send event, so requests still go
+through botocore parameter validation, serialisation, retries and the
+event hooks of lex_clients (rate limits, run metrics), only the HTTP
+round trip to AWS is replaced. A local HTTP server stands in for the
+presigned S3 upload and download URLs.
+
+Long running operations (create, import, export, build, version) move
+through their statuses after configurable durations, listings are
+paginated with a configurable page size, and calls can be throttled.
+"""
+import io
+import json
+import http.server
+import random
+import string
+import threading
+import time
+import zipfile
+from botocore import xform_name
+from botocore.awsrequest import AWSResponse
+from botocore.exceptions import ClientError
+
+class FakeLexConfig():
+    """Behaviour of the stand-in service
+
+    :param api_latency: seconds spent serving every call
+    :type api_latency: float
+
+    :param operation_seconds: seconds before a create, import, export,
+        build or version operation completes
+    :type operation_seconds: float
+
+    :param page_size: maximum number of items of a listing page
+    :type page_size: int
+
+    :param throttle_rate: share of calls answered with a
+        ThrottlingException, between 0 and 1
+    :type throttle_rate: float
+
+    :param seed: seed of the ids and of the throttled calls
+    :type seed: int
+    """
+    def __init__(self, api_latency=0.005, operation_seconds=0.5, page_size=10, throttle_rate=0.0, seed=1):
+        self.api_latency = api_latency
+        self.operation_seconds = operation_seconds
+        self.page_size = page_size
+        self.throttle_rate = throttle_rate
+        self.seed = seed
+
+class FakeLexError(Exception):
+    def __init__(self, code, message, status_code):
+        super().__init__(message)
+        self.code = code
+        self.status_code = status_code
+
+def _not_found(message):
+    return FakeLexError('ResourceNotFoundException', message, 404)
+
+class _RawBody():
+    def __init__(self, body):
+        self._body = body
+
+    def stream(self, **kwargs):
+        yield self._body
+
+class _Transfers(http.server.BaseHTTPRequestHandler):
+    """Presigned URL stand-in: PUT /uploads/<importId>, GET /exports/<exportId>"""
+    def do_PUT(self):
+        content_length = int(self.headers.get('Content-Length', 0))
+        self.server.service.store_upload(self.path.rsplit('/', 1)[-1], self.rfile.read(content_length))
+        self.send_response(200)
+        self.end_headers()
+
+    def do_GET(self):
+        body = self.server.service.export_download(self.path.rsplit('/', 1)[-1])
+        if body is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class FakeLexModelsService():
+    """In-memory lexv2-models service
+
+    :param config: behaviour of the service
+    :type config: FakeLexConfig
+    """
+    def __init__(self, config=None):
+        self._config = config or FakeLexConfig()
+        self._lock = threading.RLock()
+        self._random = random.Random(self._config.seed)
+        self._local = threading.local()
+        self._bots = {}
+        self._imports = {}
+        self._exports = {}
+        self._uploads = {}
+        self._calls = {}
+        self._throttled = 0
+        self._bytes = {'uploaded': 0, 'downloaded': 0}
+        self._server = None
+
+    @property
+    def config(self):
+        return self._config
+
+    def start(self):
+        self._server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), _Transfers)
+        self._server.daemon_threads = True
+        self._server.service = self
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def _url(self, path):
+        return 'http://127.0.0.1:{}/{}'.format(self._server.server_address[1], path)
+
+    def reset_counters(self):
+        with self._lock:
+            self._calls = {}
+            self._throttled = 0
+            self._bytes = {'uploaded': 0, 'downloaded': 0}
+
+    def counters(self):
+        with self._lock:
+            return dict(
+                calls=dict(sorted(self._calls.items())),
+                total_calls=sum(self._calls.values()),
+                throttled=self._throttled,
+                bytes=dict(self._bytes)
+            )
+
+    def _new_id(self):
+        return ''.join(self._random.choice(string.ascii_uppercase + string.digits) for _ in range(10))
+
+    # test fixtures
+
+    def add_bot(self, bot_name, alias_names=(), definition=None, versions=0):
+        """ Adds an Available bot, with aliases and numbered versions
+
+        :param definition: LexJson zip served when the bot is exported
+        :type definition: bytes
+        """
+        with self._lock:
+            bot_id = self._new_id()
+            now = time.time()
+            self._bots[bot_id] = dict(
+                botId=bot_id,
+                botName=bot_name,
+                roleArn='arn:aws:iam::123456789012:role/{}'.format(bot_name),
+                dataPrivacy={'childDirected': False},
+                idleSessionTTLInSeconds=300,
+                ready_at=now,
+                locales={},
+                versions={},
+                aliases={},
+                tags={},
+                definition=definition,
+            )
+            for version in range(1, versions + 1):
+                self._bots[bot_id]['versions'][str(version)] = now
+            for alias_name in alias_names:
+                self._bots[bot_id]['aliases'][self._new_id()] = dict(
+                    botAliasName=alias_name,
+                    botVersion=None,
+                    botAliasLocaleSettings={}
+                )
+            return bot_id
+
+    # presigned URLs
+
+    def store_upload(self, import_id, body):
+        with self._lock:
+            self._uploads[import_id] = body
+            self._bytes['uploaded'] = self._bytes['uploaded'] + len(body)
+
+    def export_download(self, export_id):
+        with self._lock:
+            export = self._exports.get(export_id)
+            if export is None:
+                return None
+            body = self._bot(export['botId'])['definition'] or b''
+            self._bytes['downloaded'] = self._bytes['downloaded'] + len(body)
+            return body
+
+    # boto3 client wiring
+
+    def attach(self, client):
+        """ Serves the calls of a lexv2-models boto3 client from this service
+        """
+        service_event_name = client.meta.service_model.service_id.hyphenize()
+        client.meta.events.register('before-parameter-build.' + service_event_name, self._capture_params)
+        client.meta.events.register('before-send.' + service_event_name, self._send)
+        return client
+
+    def _capture_params(self, params, model, **kwargs):
+        self._local.call = (model.name, dict(params))
+
+    def _send(self, request, **kwargs):
+        operation_name, params = self._local.call
+        time.sleep(self._config.api_latency)
+        try:
+            with self._lock:
+                self._calls[operation_name] = self._calls.get(operation_name, 0) + 1
+                if self._config.throttle_rate and self._random.random() < self._config.throttle_rate:
+                    self._throttled = self._throttled + 1
+                    raise FakeLexError('ThrottlingException', 'Rate exceeded', 429)
+                handler = getattr(self, '_' + xform_name(operation_name), None)
+                if handler is None:
+                    raise FakeLexError('ValidationException', operation_name + ' is not supported by the stand-in', 400)
+                status_code, body = 200, handler(**params)
+        except FakeLexError as e:
+            status_code = e.status_code
+            body = {'message': str(e)}
+            headers = {'x-amzn-ErrorType': e.code, 'Content-Type': 'application/json'}
+        else:
+            headers = {'Content-Type': 'application/json'}
+        return AWSResponse(
+            request.url, status_code, headers,
+            _RawBody(json.dumps(body, default=str).encode('utf-8'))
+        )
+
+    # helpers
+
+    def _bot(self, bot_id):
+        if bot_id not in self._bots:
+            raise _not_found('Bot {} not found'.format(bot_id))
+        return self._bots[bot_id]
+
+    def _ready_at(self):
+        return time.time() + self._config.operation_seconds
+
+    @staticmethod
+    def _status(ready_at, pending, done):
+        return done if time.time() >= ready_at else pending
+
+    def _page(self, items, result_key, maxResults=None, nextToken=None, **kwargs):
+        page_size = min(maxResults or self._config.page_size, self._config.page_size)
+        start = int(nextToken or 0)
+        page = {result_key: items[start:start + page_size]}
+        if start + page_size < len(items):
+            page['nextToken'] = str(start + page_size)
+        return page
+
+    # bots
+
+    def _list_bots(self, filters=(), **kwargs):
+        bots = sorted(self._bots.values(), key=lambda bot: bot['botName'])
+        for bot_filter in filters:
+            if bot_filter['operator'] == 'EQ':
+                bots = [bot for bot in bots if bot['botName'] in bot_filter['values']]
+            else:
+                bots = [bot for bot in bots if any(value in bot['botName'] for value in bot_filter['values'])]
+        return self._page([
+            dict(
+                botId=bot['botId'],
+                botName=bot['botName'],
+                botStatus=self._status(bot['ready_at'], 'Creating', 'Available'),
+                latestBotVersion=max(bot['versions'], key=int) if bot['versions'] else 'DRAFT'
+            )
+            for bot in bots
+        ], 'botSummaries', **kwargs)
+
+    def _create_bot(self, botName, roleArn, dataPrivacy, idleSessionTTLInSeconds, **kwargs):
+        if any(bot['botName'] == botName for bot in self._bots.values()):
+            raise FakeLexError('ConflictException', 'Bot {} already exists'.format(botName), 409)
+        bot_id = self.add_bot(botName)
+        bot = self._bots[bot_id]
+        bot.update(roleArn=roleArn, dataPrivacy=dataPrivacy, idleSessionTTLInSeconds=idleSessionTTLInSeconds, ready_at=self._ready_at())
+        return dict(botId=bot_id, botName=botName, botStatus='Creating')
+
+    def _describe_bot(self, botId, **kwargs):
+        bot = self._bot(botId)
+        return dict(
+            botId=botId,
+            botName=bot['botName'],
+            roleArn=bot['roleArn'],
+            dataPrivacy=bot['dataPrivacy'],
+            idleSessionTTLInSeconds=bot['idleSessionTTLInSeconds'],
+            botStatus=self._status(bot['ready_at'], 'Creating', 'Available')
+        )
+
+    def _delete_bot(self, botId, **kwargs):
+        self._bot(botId)
+        del self._bots[botId]
+        return dict(botId=botId, botStatus='Deleting')
+
+    def _list_tags_for_resource(self, resourceARN, **kwargs):
+        return dict(tags=dict(self._bot(resourceARN.rsplit('/', 1)[-1])['tags']))
+
+    def _tag_resource(self, resourceARN, tags, **kwargs):
+        self._bot(resourceARN.rsplit('/', 1)[-1])['tags'].update(tags)
+        return {}
+
+    # aliases
+
+    def _create_bot_alias(self, botId, botAliasName, **kwargs):
+        bot_alias_id = self._new_id()
+        self._bot(botId)['aliases'][bot_alias_id] = dict(botAliasName=botAliasName, botVersion=None, botAliasLocaleSettings={})
+        return dict(botId=botId, botAliasId=bot_alias_id, botAliasName=botAliasName, botAliasStatus='Available')
+
+    def _list_bot_aliases(self, botId, **kwargs):
+        aliases = self._bot(botId)['aliases']
+        return self._page([
+            dict(botAliasId=bot_alias_id, botAliasName=alias['botAliasName'], botVersion=alias['botVersion'], botAliasStatus='Available')
+            for bot_alias_id, alias in sorted(aliases.items())
+        ], 'botAliasSummaries', **kwargs)
+
+    def _describe_bot_alias(self, botId, botAliasId, **kwargs):
+        aliases = self._bot(botId)['aliases']
+        if botAliasId not in aliases:
+            raise _not_found('Bot alias {} not found'.format(botAliasId))
+        return dict(aliases[botAliasId], botId=botId, botAliasId=botAliasId, botAliasStatus='Available')
+
+    def _update_bot_alias(self, botId, botAliasId, botVersion=None, botAliasLocaleSettings=None, **kwargs):
+        alias = self._describe_bot_alias(botId, botAliasId)
+        if botVersion and botVersion != 'DRAFT' and botVersion not in self._bot(botId)['versions']:
+            raise FakeLexError('ValidationException', 'Bot version {} does not exist'.format(botVersion), 400)
+        self._bots[botId]['aliases'][botAliasId].update(
+            botVersion=botVersion,
+            botAliasLocaleSettings=botAliasLocaleSettings or {}
+        )
+        return dict(alias, botVersion=botVersion)
+
+    # import and export
+
+    def _create_upload_url(self, **kwargs):
+        import_id = self._new_id()
+        self._imports[import_id] = None
+        return dict(importId=import_id, uploadUrl=self._url('uploads/' + import_id))
+
+    @staticmethod
+    def _merge_locale(definition, locale_zip, locale_id):
+        """ Returns definition with the files of locale_id replaced by the ones of locale_zip
+        """
+        def is_locale_entry(name):
+            return name.split('/')[1:3] == ['BotLocales', locale_id]
+        zip_buffer = io.BytesIO()
+        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as mergedzipfile:
+            if definition:
+                with zipfile.ZipFile(io.BytesIO(definition)) as botzipfile:
+                    for name in botzipfile.namelist():
+                        if not is_locale_entry(name):
+                            mergedzipfile.writestr(name, botzipfile.read(name))
+            with zipfile.ZipFile(io.BytesIO(locale_zip)) as localezipfile:
+                for name in localezipfile.namelist():
+                    if is_locale_entry(name):
+                        mergedzipfile.writestr(name, localezipfile.read(name))
+        return zip_buffer.getvalue()
+
+    def _start_import(self, importId, resourceSpecification, mergeStrategy, **kwargs):
+        if importId not in self._uploads:
+            raise FakeLexError('ValidationException', 'Nothing was uploaded for import {}'.format(importId), 400)
+        now = time.time()
+        if 'botLocaleImportSpecification' in resourceSpecification:
+            # a locale import only replaces, and unbuilds, the imported locale
+            locale_id = resourceSpecification['botLocaleImportSpecification']['localeId']
+            bot = self._bot(resourceSpecification['botLocaleImportSpecification']['botId'])
+            bot['locales'][locale_id] = dict(status='NotBuilt', ready_at=now, lastUpdatedDateTime=now)
+            bot['definition'] = self._merge_locale(bot['definition'], self._uploads.pop(importId), locale_id)
+        else:
+            bot_name = resourceSpecification['botImportSpecification']['botName']
+            bot = next((bot for bot in self._bots.values() if bot['botName'] == bot_name), None)
+            if bot is None:
+                raise _not_found('Bot {} not found'.format(bot_name))
+            with zipfile.ZipFile(io.BytesIO(self._uploads[importId])) as botzipfile:
+                locale_ids = {
+                    name.split('/')[2] for name in botzipfile.namelist()
+                    if name.split('/')[1:2] == ['BotLocales'] and len(name.split('/')) > 3
+                }
+            # a bot import replaces the whole DRAFT, every locale needs a build
+            bot['locales'] = {
+                locale_id: dict(status='NotBuilt', ready_at=now, lastUpdatedDateTime=now)
+                for locale_id in locale_ids
+            }
+            bot['definition'] = self._uploads.pop(importId)
+        self._imports[importId] = dict(botId=bot['botId'], ready_at=self._ready_at())
+        return dict(importId=importId, importStatus='InProgress', mergeStrategy=mergeStrategy)
+
+    def _describe_import(self, importId, **kwargs):
+        if not self._imports.get(importId):
+            raise _not_found('Import {} not found'.format(importId))
+        return dict(importId=importId, importStatus=self._status(self._imports[importId]['ready_at'], 'InProgress', 'Completed'))
+
+    def _delete_import(self, importId, **kwargs):
+        self._imports.pop(importId, None)
+        return dict(importId=importId, importStatus='Deleting')
+
+    def _create_export(self, resourceSpecification, fileFormat, **kwargs):
+        bot_id = resourceSpecification['botExportSpecification']['botId']
+        self._bot(bot_id)
+        export_id = self._new_id()
+        self._exports[export_id] = dict(botId=bot_id, ready_at=self._ready_at())
+        return dict(exportId=export_id, exportStatus='InProgress', fileFormat=fileFormat)
+
+    def _describe_export(self, exportId, **kwargs):
+        if exportId not in self._exports:
+            raise _not_found('Export {} not found'.format(exportId))
+        export_status = self._status(self._exports[exportId]['ready_at'], 'InProgress', 'Completed')
+        response = dict(exportId=exportId, exportStatus=export_status)
+        if export_status == 'Completed':
+            response['downloadUrl'] = self._url('exports/' + exportId)
+        return response
+
+    def _delete_export(self, exportId, **kwargs):
+        self._exports.pop(exportId, None)
+        return dict(exportId=exportId, exportStatus='Deleting')
+
+    # locales
+
+    def _list_bot_locales(self, botId, botVersion, **kwargs):
+        locales = self._bot(botId)['locales']
+        return self._page([
+            dict(
+                localeId=locale_id,
+                botLocaleStatus=self._status(locale['ready_at'], 'Building', locale['status']),
+                lastUpdatedDateTime=locale['lastUpdatedDateTime']
+            )
+            for locale_id, locale in sorted(locales.items())
+        ], 'botLocaleSummaries', **kwargs)
+
+    def _build_bot_locale(self, botId, botVersion, localeId, **kwargs):
+        locales = self._bot(botId)['locales']
+        if localeId not in locales:
+            raise _not_found('Locale {} not found'.format(localeId))
+        locales[localeId].update(status='Built', ready_at=self._ready_at())
+        return dict(botId=botId, botVersion=botVersion, localeId=localeId, botLocaleStatus='Building')
+
+    def _describe_bot_locale(self, botId, botVersion, localeId, **kwargs):
+        locales = self._bot(botId)['locales']
+        if localeId not in locales:
+            raise _not_found('Locale {} not found'.format(localeId))
+        locale = locales[localeId]
+        return dict(
+            botId=botId,
+            botVersion=botVersion,
+            localeId=localeId,
+            botLocaleStatus=self._status(locale['ready_at'], 'Building', locale['status']),
+            lastUpdatedDateTime=locale['lastUpdatedDateTime']
+        )
+
+    # versions
+
+    def _create_bot_version(self, botId, botVersionLocaleSpecification, **kwargs):
+        bot = self._bot(botId)
+        for locale_id in botVersionLocaleSpecification:
+            if bot['locales'].get(locale_id, {}).get('status') != 'Built':
+                raise FakeLexError('PreconditionFailedException', 'Locale {} is not built'.format(locale_id), 412)
+        bot_version = str(max([int(version) for version in bot['versions']] + [0]) + 1)
+        bot['versions'][bot_version] = self._ready_at()
+        return dict(botId=botId, botVersion=bot_version, botStatus='Versioning')
+
+    def _describe_bot_version(self, botId, botVersion, **kwargs):
+        versions = self._bot(botId)['versions']
+        if botVersion not in versions:
+            raise _not_found('Bot version {} not found'.format(botVersion))
+        return dict(botId=botId, botVersion=botVersion, botStatus=self._status(versions[botVersion], 'Versioning', 'Available'))
+
+    def _list_bot_versions(self, botId, sortBy=None, **kwargs):
+        versions = self._bot(botId)['versions']
+        bot_versions = sorted(versions, key=int, reverse=bool(sortBy and sortBy.get('order') == 'Descending'))
+        return self._page([
+            dict(botVersion=bot_version, botStatus=self._status(versions[bot_version], 'Versioning', 'Available'))
+            for bot_version in bot_versions
+        ], 'botVersionSummaries', **kwargs)
+
+    def _delete_bot_version(self, botId, botVersion, **kwargs):
+        bot = self._bot(botId)
+        if botVersion not in bot['versions']:
+            raise _not_found('Bot version {} not found'.format(botVersion))
+        if any(alias['botVersion'] == botVersion for alias in bot['aliases'].values()):
+            raise FakeLexError('ResourceInUseException', 'Bot version {} is used by an alias'.format(botVersion), 400)
+        del bot['versions'][botVersion]
+        return dict(botId=botId, botVersion=botVersion, botStatus='Deleting')
+
+class _Meta():
+    def __init__(self, region_name):
+        self.region_name = region_name
+
+class FakeSTSClient():
+    def __init__(self, account_id='123456789012', region_name='eu-west-2'):
+        self.meta = _Meta(region_name)
+        self._account_id = account_id
+
+    def get_caller_identity(self):
+        return {'Account': self._account_id}
+
+class FakeCloudFormationClient():
+    """Stacks with outputs, every other stack does not exist"""
+    def __init__(self, stacks=None, region_name='eu-west-2'):
+        self.meta = _Meta(region_name)
+        self._stacks = dict(stacks or {})
+
+    def describe_stacks(self, StackName):
+        if StackName not in self._stacks:
+            raise ClientError(
+                {'Error': {'Code': 'ValidationError', 'Message': 'Stack with id {} does not exist'.format(StackName)}},
+                'DescribeStacks'
+            )
+        return {'Stacks': [{
+            'StackName': StackName,
+            'Outputs': [
+                {'OutputKey': key, 'OutputValue': value}
+                for key, value in self._stacks[StackName].items()
+            ]
+        }]}
+
+class FakeIAMClient():
+    def __init__(self, region_name='eu-west-2'):
+        self.meta = _Meta(region_name)
+
+    def get_role(self, RoleName):
+        return {'Role': {'RoleName': RoleName, 'Arn': 'arn:aws:iam::123456789012:role/' + RoleName}}
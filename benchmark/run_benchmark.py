@@ -0,0 +1,347 @@
+#!/usr/bin/env python
+
+##########################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+##########################################################################
+""" Offline benchmark of the Lex management helper classes
+
+Runs export, import, validation and version garbage collection scenarios
+against the in-process lexv2-models stand-in of fake_lex_service.py, on a
+synthetic bot of configurable size, and reports per scenario the wall
+time, the API calls made (with retries and throttles), the bytes
+transferred and the peak Python memory.
+
+    python run_benchmark.py --intents 100 --utterances 50 --output results.json
+    python run_benchmark.py --baseline results.json
+
+With --baseline, the run fails when a scenario makes more API calls, or
+takes more time or memory than the tolerance allows, than in the baseline.
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(os.path.dirname(BENCHMARK_DIR), 'src')
+BOT_NAME = 'BenchmarkBot'
+ENVIRONMENT = 'bench'
+REGION_NAME = 'eu-west-2'
+
+logger = logging.getLogger('lex_benchmark')
+
+def get_parsed_args():
+    parser = argparse.ArgumentParser(description='Offline benchmark of the Lex bot manager.')
+    parser.add_argument('--locales', type=int, default=2, help='Locales of the synthetic bot. Defaults to 2')
+    parser.add_argument('--intents', type=int, default=50, help='Intents per locale. Defaults to 50')
+    parser.add_argument('--utterances', type=int, default=30, help='Sample utterances per intent. Defaults to 30')
+    parser.add_argument('--slot-types', type=int, default=10, help='Slot types per locale. Defaults to 10')
+    parser.add_argument('--slot-values', type=int, default=100, help='Values per slot type. Defaults to 100')
+    parser.add_argument('--versions', type=int, default=40, help='Bot versions before the garbage collection. Defaults to 40')
+    parser.add_argument('--bots', type=int, default=4, help='Bots imported at the same time by the concurrent import. Defaults to 4')
+    parser.add_argument('--api-latency', type=float, default=0.005, help='Seconds per API call. Defaults to 0.005')
+    parser.add_argument('--operation-seconds', type=float, default=0.5,
+        help='Seconds before imports, exports, builds and versions complete. Defaults to 0.5')
+    parser.add_argument('--page-size', type=int, default=10, help='Items per listing page. Defaults to 10')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='Share of throttled API calls. Defaults to 0')
+    parser.add_argument('--rate-limit', action='store_true', help='Applies the client side Lex API rate limits')
+    parser.add_argument('--repeat', type=int, default=1, help='Runs of each scenario, the median is reported. Defaults to 1')
+    parser.add_argument('--scenario', action='append', help='Runs only this scenario, can be repeated')
+    parser.add_argument('--output', metavar='resultsfile', help='Writes the results as JSON')
+    parser.add_argument('--baseline', metavar='resultsfile', help='Fails on regressions against earlier results')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+        help='Allowed wall time and memory increase over the baseline. Defaults to 0.25')
+    parser.add_argument('--verbose', action='store_true', help='Logs the helper classes at INFO level')
+    return parser.parse_args()
+
+class LexBenchmark():
+    """Scenarios run against the stand-in service
+
+    Runs in a temporary working directory holding lex_bots and the local
+    caches, so every run starts cold and leaves nothing behind.
+    """
+    def __init__(self, args, work_dir):
+        self._args = args
+        self._work_dir = work_dir
+        # imported here, once LEX_MGMT_CACHE_DIR points at the work directory
+        import boto3
+        import fake_lex_service
+        import lex_clients
+        import synthetic_bots
+        from lex_concurrency import LexApiRateLimiter
+        from lex_metrics import get_run_metrics
+        self._spec = synthetic_bots.SyntheticBotSpec(
+            locales=args.locales,
+            intents=args.intents,
+            utterances=args.utterances,
+            slot_types=args.slot_types,
+            slot_values=args.slot_values
+        )
+        self._synthetic_bots = synthetic_bots
+        self._service = fake_lex_service.FakeLexModelsService(fake_lex_service.FakeLexConfig(
+            api_latency=args.api_latency,
+            operation_seconds=args.operation_seconds,
+            page_size=args.page_size,
+            throttle_rate=args.throttle_rate
+        )).start()
+        self._run_metrics = get_run_metrics()
+        lex_client = boto3.session.Session().client(
+            'lexv2-models',
+            region_name=REGION_NAME,
+            aws_access_key_id='benchmark',
+            aws_secret_access_key='benchmark',
+            config=lex_clients.DEFAULT_CLIENT_CONFIG
+        )
+        self._service.attach(lex_client)
+        if args.rate_limit:
+            LexApiRateLimiter().install(lex_client)
+        self._run_metrics.install(lex_client)
+        lex_clients.register_client('lexv2-models', lex_client)
+        lex_clients.register_client('sts', fake_lex_service.FakeSTSClient(region_name=REGION_NAME))
+        lex_clients.register_client('iam', fake_lex_service.FakeIAMClient(region_name=REGION_NAME))
+        lex_clients.register_client('cloudformation', fake_lex_service.FakeCloudFormationClient(region_name=REGION_NAME))
+        self._bot_count = 0
+
+    @property
+    def spec(self):
+        return self._spec
+
+    def close(self):
+        self._service.stop()
+
+    def _new_bot_name(self):
+        self._bot_count = self._bot_count + 1
+        return '{}{:03d}'.format(BOT_NAME, self._bot_count)
+
+    def _add_bot(self, versions=0):
+        bot_name = self._new_bot_name()
+        current_bot_name = ENVIRONMENT + '-' + bot_name
+        self._service.add_bot(
+            current_bot_name,
+            alias_names=[current_bot_name + '-alias'],
+            definition=self._synthetic_bots.bot_zip(current_bot_name, self._spec),
+            versions=versions
+        )
+        return bot_name
+
+    def _write_bot(self, bot_name):
+        return self._synthetic_bots.write_bot('lex_bots', bot_name, self._spec)
+
+    # scenarios, each returns a callable running the measured part
+
+    def scenario_validate_cold(self):
+        from lex_utils_v2 import LexBotValidator
+        bot_name = self._new_bot_name()
+        self._write_bot(bot_name)
+        return lambda: LexBotValidator(bot_name=bot_name).validate_bot()
+
+    def scenario_validate_warm(self):
+        from lex_utils_v2 import LexBotValidator
+        bot_name = self._new_bot_name()
+        self._write_bot(bot_name)
+        LexBotValidator(bot_name=bot_name).validate_bot()
+        return lambda: LexBotValidator(bot_name=bot_name).validate_bot()
+
+    def scenario_export(self):
+        from lex_utils_v2 import LexBotExporter
+        bot_name = self._add_bot(versions=1)
+        return lambda: LexBotExporter(bot_name=bot_name, ticket='', environment=ENVIRONMENT, bot_version='DRAFT').export_bot()
+
+    def scenario_export_incremental(self):
+        from lex_utils_v2 import LexBotExporter
+        bot_name = self._add_bot(versions=1)
+        LexBotExporter(bot_name=bot_name, ticket='', environment=ENVIRONMENT, bot_version='DRAFT').export_bot()
+        return lambda: LexBotExporter(bot_name=bot_name, ticket='', environment=ENVIRONMENT, bot_version='DRAFT', incremental=True).export_bot()
+
+    def _importer(self, bot_name, force_import):
+        from lex_utils_v2 import LexBotImporter
+        return LexBotImporter(
+            bot_name=bot_name,
+            ticket='',
+            environment=ENVIRONMENT,
+            bot_source_version='DRAFT',
+            bot_alias_name=ENVIRONMENT + '-' + bot_name + '-alias',
+            delete_old_version_flag='true',
+            force_import=force_import
+        )
+
+    def scenario_import(self):
+        bot_name = self._add_bot()
+        self._write_bot(bot_name)
+        return lambda: self._importer(bot_name, True).import_bot()
+
+    def scenario_import_unchanged(self):
+        bot_name = self._add_bot()
+        self._write_bot(bot_name)
+        self._importer(bot_name, False).import_bot()
+        return lambda: self._importer(bot_name, False).import_bot()
+
+    def scenario_import_one_locale(self):
+        bot_name = self._add_bot()
+        spec = self._synthetic_bots.SyntheticBotSpec(**dict(self._spec.as_dict(), locales=max(3, self._spec.locales)))
+        self._synthetic_bots.write_bot('lex_bots', bot_name, spec)
+        self._importer(bot_name, False).import_bot()
+        locale_ids = self._synthetic_bots.locale_ids(spec)
+        changed_locale_id = locale_ids[len(locale_ids) // 2]
+        bot_locale_path = os.path.join('lex_bots', bot_name, 'BotLocales', changed_locale_id, 'BotLocale.json')
+        with open(bot_locale_path, 'r', encoding='utf-8') as botlocalefile:
+            bot_locale = json.load(botlocalefile)
+        bot_locale['description'] = 'Changed by the benchmark'
+        with open(bot_locale_path, 'w', encoding='utf-8') as botlocalefile:
+            json.dump(bot_locale, botlocalefile, indent=4)
+
+        def import_one_locale():
+            locales = self._importer(bot_name, False).import_bot()['locales']
+            if locales['imported'] != [changed_locale_id] or locales['built'] != [changed_locale_id]:
+                raise AssertionError('expected only {} imported and built, got {}'.format(changed_locale_id, locales))
+            built = self._service.counters()['calls'].get('BuildBotLocale', 0)
+            if built != 1:
+                raise AssertionError('expected 1 locale build, got {}'.format(built))
+        return import_one_locale
+
+    def scenario_import_concurrent(self):
+        import asyncio
+        bot_names = [self._add_bot() for _ in range(self._args.bots)]
+        for bot_name in bot_names:
+            self._write_bot(bot_name)
+
+        async def import_bots():
+            return await asyncio.gather(*[
+                self._importer(bot_name, True).import_bot_async()
+                for bot_name in bot_names
+            ])
+        return lambda: asyncio.run(import_bots())
+
+    def scenario_gc(self):
+        from lex_utils_v2 import LexBotVersionManager
+        bot_name = self._add_bot(versions=self._args.versions)
+        return lambda: LexBotVersionManager(
+            bot_name=bot_name,
+            ticket='',
+            environment=ENVIRONMENT,
+            bot_alias_name=bot_name + '-alias',
+            delete_rate=1000
+        ).collect_old_bot_versions(keep_last=10)
+
+    def scenarios(self):
+        return [name[len('scenario_'):] for name in dir(self) if name.startswith('scenario_')]
+
+    def run(self, scenario):
+        """ Runs a scenario once and returns its measurements
+        """
+        measured = getattr(self, 'scenario_' + scenario)()
+        self._run_metrics.reset()
+        self._service.reset_counters()
+        tracemalloc.start()
+        started = time.perf_counter()
+        try:
+            measured()
+            error = None
+        except Exception as e:
+            error = str(e)
+        wall_seconds = time.perf_counter() - started
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        run_report = self._run_metrics.report()
+        service_counters = self._service.counters()
+        return dict(
+            wall_seconds=round(wall_seconds, 3),
+            peak_memory_bytes=peak_memory,
+            api_calls=run_report['api_totals']['calls'],
+            api_retries=run_report['api_totals']['retries'],
+            api_throttles=run_report['api_totals']['throttles'],
+            served_calls=service_counters['calls'],
+            bytes_uploaded=service_counters['bytes']['uploaded'],
+            bytes_downloaded=service_counters['bytes']['downloaded'],
+            phases={name: phase['seconds'] for name, phase in run_report['phases'].items()},
+            error=error
+        )
+
+def median_result(results):
+    """ Returns the run with the median wall time, with median memory
+    """
+    result = dict(sorted(results, key=lambda result: result['wall_seconds'])[len(results) // 2])
+    result['peak_memory_bytes'] = int(statistics.median(result['peak_memory_bytes'] for result in results))
+    result['runs'] = len(results)
+    return result
+
+def regressions(results, baseline, tolerance):
+    found = []
+    for scenario, result in results['scenarios'].items():
+        baseline_result = baseline.get('scenarios', {}).get(scenario)
+        if baseline_result is None:
+            continue
+        if result['api_calls'] > baseline_result['api_calls']:
+            found.append('{}: {} API calls, baseline {}'.format(scenario, result['api_calls'], baseline_result['api_calls']))
+        for key in ('wall_seconds', 'peak_memory_bytes'):
+            if result[key] > baseline_result[key] * (1 + tolerance):
+                found.append('{}: {} {}, baseline {}'.format(scenario, key, result[key], baseline_result[key]))
+    return found
+
+def print_results(results):
+    print('{:<20} {:>9} {:>10} {:>6} {:>8} {:>9} {:>10} {:>10}'.format(
+        'scenario', 'wall (s)', 'peak (KB)', 'calls', 'retries', 'throttles', 'up (KB)', 'down (KB)'
+    ))
+    for scenario, result in results['scenarios'].items():
+        print('{:<20} {:>9.3f} {:>10.0f} {:>6} {:>8} {:>9} {:>10.1f} {:>10.1f}{}'.format(
+            scenario, result['wall_seconds'], result['peak_memory_bytes'] / 1024,
+            result['api_calls'], result['api_retries'], result['api_throttles'],
+            result['bytes_uploaded'] / 1024, result['bytes_downloaded'] / 1024,
+            '  FAILED: ' + result['error'] if result['error'] else ''
+        ))
+
+def main():
+    args = get_parsed_args()
+    logging.basicConfig(format='[%(levelname)s] %(message)s', level=logging.WARNING)
+    work_dir = tempfile.mkdtemp(prefix='lex-benchmark-')
+    os.environ['LEX_MGMT_CACHE_DIR'] = os.path.join(work_dir, '.lexcache')
+    os.environ.setdefault('AWS_DEFAULT_REGION', REGION_NAME)
+    sys.path[:0] = [SRC_DIR, BENCHMARK_DIR]
+    current_dir = os.getcwd()
+    os.chdir(work_dir)
+    benchmark = LexBenchmark(args, work_dir)
+    if args.verbose:
+        logging.getLogger('lex_utils_v2').setLevel(logging.INFO)
+    try:
+        results = {'bot': benchmark.spec.as_dict(), 'scenarios': {}}
+        for scenario in args.scenario or benchmark.scenarios():
+            results['scenarios'][scenario] = median_result([benchmark.run(scenario) for _ in range(args.repeat)])
+    finally:
+        benchmark.close()
+        os.chdir(current_dir)
+        shutil.rmtree(work_dir, ignore_errors=True)
+    print_results(results)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as resultsfile:
+            json.dump(results, resultsfile, indent=2, sort_keys=True)
+    failed = [scenario for scenario, result in results['scenarios'].items() if result['error']]
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as baselinefile:
+            found = regressions(results, json.load(baselinefile), args.tolerance)
+        for regression in found:
+            print('REGRESSION ' + regression)
+        failed = failed + found
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
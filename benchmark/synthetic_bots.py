@@ -0,0 +1,197 @@
+#!/usr/bin/env python
+
+##########################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+##########################################################################
+""" Synthetic Lex bot definitions for the benchmark
+
+Generates bot definitions in the layout of a Lex V2 LexJson export,
+deterministically from a seed, so that every benchmark run works on the
+same content.
+"""
+import io
+import json
+import os
+import random
+import zipfile
+
+VOCABULARY = (
+    'order', 'book', 'cancel', 'change', 'check', 'find', 'send', 'deliver',
+    'flowers', 'roses', 'tulips', 'table', 'room', 'flight', 'ticket', 'parcel',
+    'today', 'tomorrow', 'tonight', 'weekend', 'morning', 'evening', 'please',
+    'my', 'a', 'the', 'for', 'to', 'some', 'new', 'another', 'two', 'three',
+    'want', 'would', 'like', 'need', 'can', 'you', 'i', 'we', 'help', 'me',
+)
+
+LOCALE_NAMES = {
+    'en_GB': 'English (GB)',
+    'en_US': 'English (US)',
+    'fr_FR': 'French (France)',
+    'de_DE': 'German (Germany)',
+    'es_ES': 'Spanish (Spain)',
+}
+
+class SyntheticBotSpec():
+    """Size of a synthetic bot definition
+
+    :param locales: number of locales, taken from LOCALE_NAMES
+    :type locales: int
+
+    :param intents: intents per locale, next to the FallbackIntent
+    :type intents: int
+
+    :param utterances: sample utterances per intent
+    :type utterances: int
+
+    :param slot_types: custom slot types per locale
+    :type slot_types: int
+
+    :param slot_values: values per slot type, each with two synonyms
+    :type slot_values: int
+
+    :param seed: seed of the generated words
+    :type seed: int
+    """
+    def __init__(self, locales=1, intents=20, utterances=20, slot_types=5, slot_values=50, seed=1):
+        self.locales = min(locales, len(LOCALE_NAMES))
+        self.intents = intents
+        self.utterances = utterances
+        self.slot_types = slot_types
+        self.slot_values = slot_values
+        self.seed = seed
+
+    def as_dict(self):
+        return dict(
+            locales=self.locales,
+            intents=self.intents,
+            utterances=self.utterances,
+            slot_types=self.slot_types,
+            slot_values=self.slot_values,
+            seed=self.seed
+        )
+
+def locale_ids(spec):
+    return sorted(LOCALE_NAMES)[:spec.locales]
+
+def _json_bytes(jsondata):
+    return json.dumps(jsondata, indent=4).encode('utf-8')
+
+def _utterance(rand, index):
+    words = [rand.choice(VOCABULARY) for _ in range(rand.randint(3, 8))]
+    # a trailing index keeps the utterances of an intent distinct
+    return ' '.join(words) + ' ' + str(index)
+
+def bot_files(bot_name, spec):
+    """ Returns {path relative to the bot directory: bytes} of a bot definition
+
+    The export Manifest.json is returned under the ../Manifest.json path.
+    """
+    rand = random.Random(spec.seed)
+    files = {
+        '../Manifest.json': _json_bytes({
+            'metadata': {
+                'schemaVersion': '1',
+                'fileFormat': 'LexJson',
+                'resourceType': 'BOT'
+            }
+        }),
+        'Bot.json': _json_bytes({
+            'name': bot_name,
+            'version': 'DRAFT',
+            'description': 'Synthetic benchmark bot',
+            'dataPrivacy': {'childDirected': False},
+            'idleSessionTTLInSeconds': 300,
+            'identifier': 'BENCHMARK0',
+        }),
+    }
+    for locale_id in locale_ids(spec):
+        locale_dir = 'BotLocales/' + locale_id + '/'
+        files[locale_dir + 'BotLocale.json'] = _json_bytes({
+            'name': LOCALE_NAMES[locale_id],
+            'identifier': locale_id,
+            'version': 'DRAFT',
+            'nluConfidenceThreshold': 0.4,
+        })
+        slot_type_names = ['SlotType{:03d}'.format(index) for index in range(spec.slot_types)]
+        for slot_type_name in slot_type_names:
+            files[locale_dir + 'SlotTypes/' + slot_type_name + '/SlotType.json'] = _json_bytes({
+                'name': slot_type_name,
+                'identifier': slot_type_name.upper(),
+                'valueSelectionSetting': {'resolutionStrategy': 'TopResolution'},
+                'slotTypeValues': [
+                    {
+                        'sampleValue': {'value': '{} value {}'.format(slot_type_name.lower(), index)},
+                        'synonyms': [
+                            {'value': '{} synonym {} {}'.format(slot_type_name.lower(), index, synonym)}
+                            for synonym in range(2)
+                        ]
+                    }
+                    for index in range(spec.slot_values)
+                ],
+            })
+        files[locale_dir + 'Intents/FallbackIntent/Intent.json'] = _json_bytes({
+            'name': 'FallbackIntent',
+            'identifier': 'FALLBCKINT',
+            'parentIntentSignature': 'AMAZON.FallbackIntent',
+        })
+        for intent_index in range(spec.intents):
+            intent_name = 'Intent{:03d}'.format(intent_index)
+            slot_type_name = slot_type_names[intent_index % len(slot_type_names)] if slot_type_names else None
+            files[locale_dir + 'Intents/' + intent_name + '/Intent.json'] = _json_bytes({
+                'name': intent_name,
+                'identifier': intent_name.upper(),
+                'sampleUtterances': [
+                    {'utterance': _utterance(rand, index)}
+                    for index in range(spec.utterances)
+                ],
+                'slotPriorities': [{'priority': 1, 'slotName': 'Value'}] if slot_type_name else [],
+            })
+            if slot_type_name:
+                files[locale_dir + 'Intents/' + intent_name + '/Slots/Value/Slot.json'] = _json_bytes({
+                    'name': 'Value',
+                    'identifier': intent_name.upper() + 'S',
+                    'slotTypeName': slot_type_name,
+                    'valueElicitationSetting': {'slotConstraint': 'Required'},
+                })
+    return files
+
+def write_bot(root_dir, bot_name, spec):
+    """ Writes a bot definition as root_dir/<bot_name> and root_dir/Manifest.json
+
+    :returns: number of files and bytes written
+    :rtype: tuple
+    """
+    file_count = 0
+    byte_count = 0
+    for relpath, content in bot_files(bot_name, spec).items():
+        filepath = os.path.normpath(os.path.join(root_dir, bot_name, relpath))
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        with open(filepath, 'wb') as botfile:
+            botfile.write(content)
+        file_count = file_count + 1
+        byte_count = byte_count + len(content)
+    return file_count, byte_count
+
+def bot_zip(bot_name, spec):
+    """ Returns the bytes of a LexJson export zip of a bot definition
+    """
+    zip_buffer = io.BytesIO()
+    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as botzipfile:
+        for relpath, content in sorted(bot_files(bot_name, spec).items()):
+            arcname = 'Manifest.json' if relpath == '../Manifest.json' else bot_name + '/' + relpath
+            botzipfile.writestr(arcname, content)
+    return zip_buffer.getvalue()
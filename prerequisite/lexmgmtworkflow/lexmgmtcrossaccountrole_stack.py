@@ -303,6 +303,7 @@ class LexMgmtCrossaccountRoleStack(Stack):
                 "lex:CreateResourcePolicy",
                 "lex:DescribeResourcePolicy",
                 "lex:ListTagsForResource",
+                "lex:TagResource",
                 "lex:ListBotLocales",
                 "lex:CreateBotLocale",
                 "lex:DeleteBotAlias",
@@ -360,6 +361,7 @@ class LexMgmtCrossaccountRoleStack(Stack):
                 "lex:ListBotAliases",
                 "lex:ListTagsForResource",
                 "lex:ListBotLocales",
+                "lex:ListBotVersions",
                 "lex:ListIntents",
                 "lex:ListSlotTypes",
                 "lex:ListSlots"
@@ -206,7 +206,7 @@ class LexMgmtWorkflowStack(Stack):
                             "export AWS_ACCESS_KEY_ID=$(echo ${TEMP_ROLE} | jq -r '.Credentials.AccessKeyId')",
                             "export AWS_SECRET_ACCESS_KEY=$(echo ${TEMP_ROLE} | jq -r '.Credentials.SecretAccessKey')",
                             "export AWS_SESSION_TOKEN=$(echo ${TEMP_ROLE} | jq -r '.Credentials.SessionToken')",
-                            "python lex_manager.py -e $botname -v $botversion -n $account -t \"${ticket}\""
+                            "python lex_manager.py -e $botname -v $botversion -n $account -t \"${ticket}\" -x -q"
                         ]
                     }
                 },
@@ -249,7 +249,7 @@ class LexMgmtWorkflowStack(Stack):
                             "export AWS_SESSION_TOKEN=$(echo ${TEMP_ROLE} | jq -r '.Credentials.SessionToken')",
                             #if value of variable ticket is equal to main or matches pattern like semantic version example v0.0.0 then set variable ticket to empty string
                             "if [ \"$ticket\" = \"main\" ] || [[ \"$ticket\" =~ ^v[0-9]+\.[0-9]+\.[0-9]+$ ]]; then ticket=\"\"; fi",
-                            "python lex_manager.py -i $botname -n $account -t \"${ticket}\" -s $botversion -a $botname-alias"
+                            "python lex_manager.py -i $botname -n $account -t \"${ticket}\" -s $botversion -a $botname-alias -q"
                         ]
                     }
                 }
@@ -376,8 +376,13 @@ class LexMgmtWorkflowStack(Stack):
                             "MAIN_BOT_ID=$(aws lexv2-models list-bots --filters name=BotName,values=${account}-${botname},operator=EQ --query 'botSummaries[0].botId' --output text)",
                             "MAIN_BOT_ROLEARN=$(aws lexv2-models describe-bot --bot-id ${MAIN_BOT_ID} --query 'roleArn' --output text)",
                             "MAIN_BOT_ROLENAME=$(echo ${MAIN_BOT_ROLEARN} | sed 's/.*\///g')",
-                            "python lex_manager.py -c $botname -n $account -t $ticket -r $MAIN_BOT_ROLENAME -a $botname-alias",
-                            "python lex_manager.py -i $botname -n $account -t $ticket -r $MAIN_BOT_ROLENAME -s DRAFT -a $botname-alias"
+                            # one lex_manager.py run creates then imports the ticket bot, see lex_batch.py
+                            "jq -n --arg bot_name \"$botname\" --arg environment \"$account\" --arg ticket \"$ticket\" --arg bot_role_name \"$MAIN_BOT_ROLENAME\""
+                            " '{defaults: {bot_name: $bot_name, environment: $environment, ticket: $ticket, bot_alias_name: ($bot_name + \"-alias\")},"
+                            " operations: [{id: \"create-ticket-bot\", operation: \"create\", bot_role_name: $bot_role_name},"
+                            " {id: \"import-ticket-bot\", operation: \"import\", depends_on: [\"create-ticket-bot\"], bot_source_version: \"DRAFT\"}]}'"
+                            " > ticket-bot-batch.json",
+                            "python lex_manager.py -b ticket-bot-batch.json"
                         ]
                     }
                 }
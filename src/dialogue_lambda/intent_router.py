@@ -0,0 +1,73 @@
+""" Table-driven dispatch of Lex V2 code hook events
+
+Handlers are looked up by (intent name, invocation source) in a dict built
+once at import time, so dispatch costs the same whatever the number of
+intents. '*' matches any intent name or invocation source.
+"""
+
+ANY = '*'
+DIALOG_CODE_HOOK = 'DialogCodeHook'
+FULFILLMENT_CODE_HOOK = 'FulfillmentCodeHook'
+
+class LexRequest():
+    """Fields of a Lex V2 code hook event read by the handlers"""
+    __slots__ = ('event', 'intent', 'intent_name', 'slots', 'session_attributes', 'input_transcript', 'invocation_source')
+
+    def __init__(self, event):
+        session_state = event.get('sessionState') or {}
+        self.event = event
+        self.intent = session_state.get('intent') or {}
+        self.intent_name = self.intent.get('name', '')
+        self.slots = self.intent.get('slots') or {}
+        self.session_attributes = session_state.get('sessionAttributes') or {}
+        self.input_transcript = event.get('inputTranscript', '')
+        self.invocation_source = event.get('invocationSource', '')
+
+class IntentRouter():
+    """Maps (intent name, invocation source) to handler(request) functions
+
+    A request is routed to the first handler registered for, in order,
+    (intent, source), (intent, '*'), ('*', source), then to the default
+    handler. Lookups are memoised per (intent, source), so each one is a
+    single dict access after the first event of an intent.
+
+    :param routes: {(intent name, invocation source): handler}
+    :type routes: dict
+
+    :param default_handler: handler of requests matching no route
+    :type default_handler: callable
+    """
+    def __init__(self, routes, default_handler):
+        self._routes = dict(routes)
+        self._default_handler = default_handler
+        self._resolved = {}
+
+    def add(self, handler, intent_name=ANY, invocation_source=ANY):
+        self._routes[(intent_name, invocation_source)] = handler
+        self._resolved.clear()
+
+    def route(self, intent_name=ANY, invocation_source=ANY):
+        """ Decorator registering a handler
+        """
+        def register(handler):
+            self.add(handler, intent_name, invocation_source)
+            return handler
+        return register
+
+    def resolve(self, intent_name, invocation_source):
+        key = (intent_name, invocation_source)
+        handler = self._resolved.get(key)
+        if handler is None:
+            routes = self._routes
+            handler = (
+                routes.get(key)
+                or routes.get((intent_name, ANY))
+                or routes.get((ANY, invocation_source))
+                or self._default_handler
+            )
+            self._resolved[key] = handler
+        return handler
+
+    def dispatch(self, event):
+        request = LexRequest(event)
+        return self.resolve(request.intent_name, request.invocation_source)(request)
@@ -1,39 +1,58 @@
-import json
-import os
-import boto3
+import time
+from startup_metrics import StartupMetrics
+
+# Started before the remaining imports so the handler init time covers them
+startup_metrics = StartupMetrics()
+
+from intent_router import ANY, DIALOG_CODE_HOOK, FULFILLMENT_CODE_HOOK, IntentRouter
+from responses import elicit_intent
+from warmup import LambdaWarmer, is_warmup
+
+# AWS SDK clients are created on first use, boto3 is only imported by
+# handlers that need it, never on the startup path of the function
+_aws_clients = {}
+
+def aws_client(service_name):
+    client = _aws_clients.get(service_name)
+    if client is None:
+        import boto3
+        client = _aws_clients.setdefault(service_name, boto3.client(service_name))
+    return client
+
+# Responses per intent name, built on the first event of each intent
+_identified_messages = {}
+
+def identified_intent(request):
+    message = _identified_messages.get(request.intent_name)
+    if message is None:
+        message = _identified_messages.setdefault(request.intent_name, f"Intent identified as {request.intent_name}")
+    return elicit_intent(request, message)
+
+def end_of_query(request):
+    return elicit_intent(request, 'End of query')
+
+# (intent name, invocation source) -> handler(request), ANY matches every value.
+# Add per intent handlers here, e.g. ('OrderFlowers', FULFILLMENT_CODE_HOOK): order_flowers
+ROUTES = {
+    (ANY, DIALOG_CODE_HOOK): identified_intent,
+    (ANY, FULFILLMENT_CODE_HOOK): end_of_query,
+}
+
+router = IntentRouter(ROUTES, default_handler=end_of_query)
+
+warmer = LambdaWarmer(aws_client)
+
+startup_metrics.init_done()
 
 def lambda_handler(event, context):
-    if event.get('bot'):
-        intent = event['sessionState'].get('intent', {})
-        intent_name = intent.get('name', '')
-        slots = intent.get('slots', {})
-        session_attributes = event.get('sessionState').get('sessionAttributes', {})
-        input_transcript = event.get('inputTranscript', '')
-        if event.get('invocationSource') == 'DialogCodeHook':
-            return lex_build_response(session_attributes, intent, 'ElicitIntent', None, f"Intent identified as {intent_name}")
-        else:
-            return lex_build_response(session_attributes, intent, 'ElicitIntent', None, 'End of query')
-
-
-def lex_build_response(attributes, intent, action, slot=None, message=""):
-    response = {
-        'sessionState': {
-            'sessionAttributes': attributes,
-            'intent': intent,
-            'dialogAction': {
-                'type': action,
-            }
-        }
-    }
-    if slot:
-        response['sessionState']['dialogAction']['slotToElicit'] = slot
-    if message:
-        response['messages'] = [
-            {
-                'contentType': 'PlainText',
-                'content': message
-            }
-        ]
-    if action == 'ElicitIntent':
-        del response['sessionState']['intent']
-    return response
\ No newline at end of file
+    started = time.perf_counter()
+    if is_warmup(event):
+        try:
+            return warmer.handle(event, context, startup_metrics.cold)
+        finally:
+            startup_metrics.invocation_done(started, trigger='warmup')
+    try:
+        if event.get('bot'):
+            return router.dispatch(event)
+    finally:
+        startup_metrics.invocation_done(started)
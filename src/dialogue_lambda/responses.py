@@ -0,0 +1,53 @@
+""" Lex V2 code hook responses
+
+Message lists are built once per distinct text and shared by the
+responses using them, so they must not be modified by handlers.
+"""
+
+ELICIT_INTENT = 'ElicitIntent'
+ELICIT_SLOT = 'ElicitSlot'
+CONFIRM_INTENT = 'ConfirmIntent'
+DELEGATE = 'Delegate'
+CLOSE = 'Close'
+
+MAX_CACHED_MESSAGES = 1024
+_messages = {}
+
+def plain_text_messages(message):
+    """ Returns the shared PlainText messages list of a text
+    """
+    messages = _messages.get(message)
+    if messages is None:
+        messages = [{'contentType': 'PlainText', 'content': message}]
+        if len(_messages) < MAX_CACHED_MESSAGES:
+            _messages[message] = messages
+    return messages
+
+def lex_build_response(attributes, intent, action, slot=None, message=""):
+    dialog_action = {'type': action}
+    if slot:
+        dialog_action['slotToElicit'] = slot
+    session_state = {
+        'sessionAttributes': attributes,
+        'dialogAction': dialog_action,
+    }
+    # Lex rejects an intent alongside ElicitIntent
+    if action != ELICIT_INTENT:
+        session_state['intent'] = intent
+    response = {'sessionState': session_state}
+    if message:
+        response['messages'] = plain_text_messages(message)
+    return response
+
+def elicit_intent(request, message=""):
+    return lex_build_response(request.session_attributes, request.intent, ELICIT_INTENT, None, message)
+
+def elicit_slot(request, slot, message=""):
+    return lex_build_response(request.session_attributes, request.intent, ELICIT_SLOT, slot, message)
+
+def delegate(request):
+    return lex_build_response(request.session_attributes, request.intent, DELEGATE)
+
+def close(request, state='Fulfilled', message=""):
+    intent = dict(request.intent, state=state)
+    return lex_build_response(request.session_attributes, intent, CLOSE, None, message)
@@ -0,0 +1,60 @@
+""" Cold start metrics of the dialogue Lambda
+
+Emits one CloudWatch embedded metric format (EMF) line on the first
+invocation of each execution environment: how long the handler module
+took to import and how long the first invocation took. Warm invocations
+emit nothing.
+"""
+import os
+import time
+
+METRICS_NAMESPACE = os.environ.get('METRICS_NAMESPACE', 'LexDialogueLambda')
+
+class StartupMetrics():
+    def __init__(self):
+        self._init_started = time.perf_counter()
+        self._init_duration = None
+        self._cold = True
+
+    @property
+    def cold(self):
+        return self._cold
+
+    def init_done(self):
+        self._init_duration = time.perf_counter() - self._init_started
+
+    def emf_line(self, first_invocation_duration, trigger):
+        import json
+        return json.dumps({
+            '_aws': {
+                'Timestamp': int(time.time() * 1000),
+                'CloudWatchMetrics': [{
+                    'Namespace': METRICS_NAMESPACE,
+                    'Dimensions': [['FunctionName']],
+                    'Metrics': [
+                        {'Name': 'HandlerInitDuration', 'Unit': 'Milliseconds'},
+                        {'Name': 'FirstInvocationDuration', 'Unit': 'Milliseconds'},
+                        {'Name': 'ColdStart', 'Unit': 'Count'},
+                    ],
+                }],
+            },
+            'FunctionName': os.environ.get('AWS_LAMBDA_FUNCTION_NAME', 'local'),
+            'HandlerInitDuration': round((self._init_duration or 0) * 1000, 3),
+            'FirstInvocationDuration': round(first_invocation_duration * 1000, 3),
+            'ColdStart': 1,
+            'Trigger': trigger,
+        })
+
+    def invocation_done(self, started, trigger='lex'):
+        """ Emits the cold start metrics after the first invocation only
+
+        :param started: time.perf_counter() at the start of the invocation
+        :type started: float
+
+        :param trigger: what invoked the function, 'lex' or 'warmup', logged
+            with the metrics to tell cold starts paid by Lex turns apart
+        :type trigger: str
+        """
+        if self._cold:
+            self._cold = False
+            print(self.emf_line(time.perf_counter() - started, trigger), flush=True)
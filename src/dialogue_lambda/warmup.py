@@ -0,0 +1,100 @@
+""" Scheduled warm-up of the dialogue Lambda
+
+The ScheduleWarmupEvent rule of template.yaml invokes the function with
+{"warmup": "true"}. Warm-up invocations return without touching the
+dialogue code. They pre-initialise the AWS SDK clients listed in
+WARMUP_CLIENTS, log whether the execution environment was cold, and,
+when WARMUP_CONCURRENCY is above 1, invoke the function concurrently so
+that many execution environments are kept warm.
+"""
+import os
+import time
+
+WARMUP_CONCURRENCY = int(os.environ.get('WARMUP_CONCURRENCY', '1'))
+# Comma separated service names, e.g. "dynamodb,comprehend"
+WARMUP_CLIENTS = tuple(name.strip() for name in os.environ.get('WARMUP_CLIENTS', '').split(',') if name.strip())
+# Milliseconds a fanned out invocation holds its execution environment, so
+# that the concurrent invocations cannot be served by the same one
+WARMUP_HOLD_MS = int(os.environ.get('WARMUP_HOLD_MS', '75'))
+
+FANOUT_KEY = 'warmupFanOut'
+
+# Identifies the execution environment across invocations in the logs
+CONTAINER_ID = os.urandom(6).hex()
+
+def is_warmup(event):
+    return bool(event.get('warmup'))
+
+class LambdaWarmer():
+    """Handles the warm-up invocations of the dialogue Lambda
+
+    :param client_factory: callable returning the AWS SDK client of a service name
+    :type client_factory: callable
+
+    :param concurrency: execution environments kept warm by each scheduled event
+    :type concurrency: int
+
+    :param preload_clients: service names of the clients created by warm-up invocations
+    :type preload_clients: tuple
+    """
+    def __init__(self, client_factory, concurrency=WARMUP_CONCURRENCY, preload_clients=WARMUP_CLIENTS):
+        self._client_factory = client_factory
+        self._concurrency = concurrency
+        self._preload_clients = preload_clients
+        self._invocations = 0
+
+    @property
+    def invocations(self):
+        return self._invocations
+
+    def _preload(self):
+        for service_name in self._preload_clients:
+            self._client_factory(service_name)
+
+    def _invoke(self, function_arn, payload):
+        self._client_factory('lambda').invoke(
+            FunctionName=function_arn, InvocationType='RequestResponse', Payload=payload
+        )
+
+    def _fan_out(self, function_arn):
+        import json
+        from concurrent.futures import ThreadPoolExecutor
+        payload = json.dumps({'warmup': 'true', FANOUT_KEY: True}).encode('utf-8')
+        fanned_out = self._concurrency - 1
+        with ThreadPoolExecutor(max_workers=fanned_out) as executor:
+            futures = [executor.submit(self._invoke, function_arn, payload) for _ in range(fanned_out)]
+        warmed = 0
+        for future in futures:
+            if future.exception() is None:
+                warmed += 1
+            else:
+                print('Warm-up invocation failed : ' + repr(future.exception()))
+        return warmed
+
+    def handle(self, event, context, cold):
+        """ Returns the warm-up result, logged as one JSON line
+
+        :param event: warm-up event, {"warmup": "true"} from the schedule
+        :type event: dict
+
+        :param context: Lambda context object
+        :type context: LambdaContext
+
+        :param cold: True on the first invocation of the execution environment
+        :type cold: bool
+        """
+        import json
+        self._invocations += 1
+        self._preload()
+        result = {
+            'warmup': True,
+            'coldStart': cold,
+            'containerId': CONTAINER_ID,
+            'invocations': self._invocations,
+        }
+        if event.get(FANOUT_KEY):
+            time.sleep(WARMUP_HOLD_MS / 1000)
+        elif self._concurrency > 1 and context is not None:
+            result['warmed'] = 1 + self._fan_out(context.invoked_function_arn)
+        print(json.dumps(result))
+        return result
@@ -0,0 +1,223 @@
+#!/usr/bin/env python
+
+##########################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+##########################################################################
+""" Deterministic import archives of bot definitions
+
+The same bot definition imported under the same bot name always produces
+a byte-identical zip: entries are written in sorted order with fixed
+timestamps and permissions, and the bot name is substituted in memory
+instead of in the working tree.
+"""
+import logging
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import zipfile
+from lex_cache import cache_path
+
+logger = logging.getLogger('lex_utils_v2').getChild(__name__)
+
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+ZIP_FILE_MODE = 0o644
+LOCALE_MANIFEST = json.dumps({
+    'metadata': {
+        'schemaVersion': '1',
+        'fileFormat': 'LexJson',
+        'resourceType': 'BOT_LOCALE'
+    }
+}, indent=4).encode('utf-8')
+MAX_CACHED_ARCHIVES = int(os.environ.get('LEX_MGMT_MAX_CACHED_ARCHIVES', '20'))
+
+class LexBotArchiveBuilder():
+    """Builds and caches the zip archives uploaded by LexBotImporter
+
+    Archives are cached on disk by content digest and target bot name.
+    The files read from the bot definition are also kept in memory for
+    the last content digest, so importing the same tree under several
+    bot names (e.g. one per environment) reads the tree once. Archives
+    returned by this builder are kept until the process exits, only
+    archives of earlier runs are evicted.
+
+    :param cache_dir: directory holding the cached archives
+    :type cache_dir: str
+
+    :param max_cached: number of archives kept in the cache directory
+    :type max_cached: int
+    """
+    def __init__(self, cache_dir=cache_path('archives'), max_cached=MAX_CACHED_ARCHIVES):
+        self._cache_dir = cache_dir
+        self._max_cached = max_cached
+        self._lock = threading.Lock()
+        self._members_digest = None
+        self._members = None
+        self._returned = set()
+
+    @staticmethod
+    def _zip_info(arcname):
+        zip_info = zipfile.ZipInfo(arcname, date_time=ZIP_DATE_TIME)
+        zip_info.compress_type = zipfile.ZIP_DEFLATED
+        zip_info.create_system = 3
+        zip_info.external_attr = ZIP_FILE_MODE << 16
+        return zip_info
+
+    @staticmethod
+    def _read_members(bot_dir):
+        members = []
+        for root, dirs, files in os.walk(bot_dir):
+            for filename in files:
+                filepath = os.path.join(root, filename)
+                relpath = os.path.relpath(filepath, bot_dir).replace(os.sep, '/')
+                with open(filepath, 'rb') as botfile:
+                    members.append((relpath, botfile.read()))
+        members.sort()
+        return members
+
+    def _bot_members(self, bot_dir, content_digest):
+        with self._lock:
+            if self._members_digest != content_digest:
+                self._members = self._read_members(bot_dir)
+                self._members_digest = content_digest
+            return self._members
+
+    @staticmethod
+    def _rename_bot(content, current_bot_name):
+        jsonbotdefndata = json.loads(content)
+        jsonbotdefndata['name'] = current_bot_name
+        return json.dumps(jsonbotdefndata, sort_keys=True).encode('utf-8')
+
+    def _bot_entries(self, bot_dir, manifest_path, current_bot_name, content_digest):
+        for relpath, content in self._bot_members(bot_dir, content_digest):
+            if relpath == 'Bot.json':
+                content = self._rename_bot(content, current_bot_name)
+            yield current_bot_name+'/'+relpath, content
+        with open(manifest_path, 'rb') as manifestfile:
+            yield 'Manifest.json', manifestfile.read()
+
+    def _locale_entries(self, bot_dir, current_bot_name, locale_id, content_digest):
+        locale_prefix = 'BotLocales/'+locale_id+'/'
+        for relpath, content in self._bot_members(bot_dir, content_digest):
+            if relpath.startswith(locale_prefix):
+                yield current_bot_name+'/'+relpath, content
+        yield 'Manifest.json', LOCALE_MANIFEST
+
+    def _write_archive(self, archive_path, entries):
+        fd, tmp_path = tempfile.mkstemp(dir=self._cache_dir, prefix='.tmp-', suffix='.zip')
+        try:
+            with os.fdopen(fd, 'wb') as archivefile:
+                with zipfile.ZipFile(archivefile, 'w', zipfile.ZIP_DEFLATED) as botzipfile:
+                    for arcname, content in entries:
+                        botzipfile.writestr(self._zip_info(arcname), content)
+            os.replace(tmp_path, archive_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @staticmethod
+    def _archive_mtime(archive_path):
+        try:
+            return os.path.getmtime(archive_path)
+        except OSError:
+            return 0
+
+    def _evict(self):
+        # Archives returned by this process are never evicted, another bot
+        # of a concurrent fleet or batch run may not have uploaded them yet
+        archives = [
+            os.path.join(self._cache_dir, filename)
+            for filename in os.listdir(self._cache_dir) if filename.endswith('.zip') and not filename.startswith('.')
+        ]
+        archives.sort(key=self._archive_mtime, reverse=True)
+        with self._lock:
+            evicted = [archive_path for archive_path in archives[self._max_cached:] if archive_path not in self._returned]
+        for archive_path in evicted:
+            logger.info('Evicting cached bot archive : ' + archive_path)
+            try:
+                os.remove(archive_path)
+            except FileNotFoundError:
+                pass
+
+    def _cached_archive(self, archive_key, entries):
+        archive_path = os.path.join(self._cache_dir, archive_key + '.zip')
+        with self._lock:
+            self._returned.add(archive_path)
+        if os.path.exists(archive_path):
+            logger.info('Reusing cached bot archive : ' + archive_path)
+            os.utime(archive_path)
+            return archive_path
+        os.makedirs(self._cache_dir, exist_ok=True)
+        self._write_archive(archive_path, entries())
+        logger.info('Created bot archive : ' + archive_path)
+        self._evict()
+        return archive_path
+
+    def build(self, bot_dir, manifest_path, current_bot_name, content_digest):
+        """ Returns the path of the import archive of a bot definition
+
+        :param bot_dir: directory of the bot, e.g. lex_bots/<bot name>
+        :type bot_dir: str
+
+        :param manifest_path: Manifest.json added at the root of the archive
+        :type manifest_path: str
+
+        :param current_bot_name: environment/ticket specific bot name used
+            as the archive root directory and as the name in Bot.json
+        :type current_bot_name: str
+
+        :param content_digest: canonical digest of bot_dir and manifest_path
+        :type content_digest: str
+        """
+        archive_key = hashlib.sha256('{}|{}'.format(content_digest, current_bot_name).encode('utf-8')).hexdigest()
+        return self._cached_archive(
+            archive_key,
+            lambda: self._bot_entries(bot_dir, manifest_path, current_bot_name, content_digest)
+        )
+
+    def build_locale(self, bot_dir, current_bot_name, locale_id, content_digest):
+        """ Returns the path of the import archive of one locale of a bot
+
+        The archive holds the BotLocales/<locale id> files of the bot under
+        the bot name, with a BOT_LOCALE Manifest.json, as imported with a
+        botLocaleImportSpecification.
+
+        :param bot_dir: directory of the bot, e.g. lex_bots/<bot name>
+        :type bot_dir: str
+
+        :param current_bot_name: environment/ticket specific bot name used
+            as the archive root directory
+        :type current_bot_name: str
+
+        :param locale_id: locale to archive, e.g. en_GB
+        :type locale_id: str
+
+        :param content_digest: canonical digest of bot_dir and its manifest
+        :type content_digest: str
+        """
+        archive_key = hashlib.sha256('{}|{}|{}'.format(content_digest, current_bot_name, locale_id).encode('utf-8')).hexdigest()
+        return self._cached_archive(
+            archive_key,
+            lambda: self._locale_entries(bot_dir, current_bot_name, locale_id, content_digest)
+        )
+
+_archive_builder = LexBotArchiveBuilder()
+
+def get_archive_builder():
+    return _archive_builder
@@ -0,0 +1,230 @@
+#!/usr/bin/env python
+
+##########################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+##########################################################################
+""" Batch mode of lex_manager.py
+
+Runs a manifest of operations on many bots and environments in a single
+process, so Python start up, boto3 clients, credentials and the local
+caches are shared by every operation.
+
+A manifest is a JSON or YAML document:
+
+    defaults:
+      environment: dev
+    continue_on_error: false
+    operations:
+      - id: create-ticket-bot
+        operation: create
+        bot_name: OrderFlowers
+        ticket: TICKET-1
+        bot_role_name: OrderFlowersRole
+        bot_alias_name: OrderFlowers-alias
+      - id: import-ticket-bot
+        operation: import
+        depends_on: [create-ticket-bot]
+        bot_name: OrderFlowers
+        ticket: TICKET-1
+        bot_alias_name: OrderFlowers-alias
+
+Every key of an operation other than id, operation and depends_on is
+passed as a keyword argument to the lex_manager.py function of the
+operation, on top of defaults.
+"""
+import logging
+import inspect
+import json
+import os
+import time
+import traceback
+
+logger = logging.getLogger('lex_utils_v2').getChild(__name__)
+
+OPERATION_KEYS = ('id', 'operation', 'depends_on')
+
+class LexBatchError(Exception):
+    """Raised for an invalid manifest, before any operation runs"""
+
+def load_manifest(path):
+    """ Reads a JSON (.json) or YAML manifest, YAML requires PyYAML
+    """
+    with open(path, 'r', encoding='utf-8') as manifestfile:
+        if os.path.splitext(path)[1].lower() == '.json':
+            return json.load(manifestfile)
+        try:
+            import yaml
+        except ImportError as e:
+            raise ImportError(
+                'YAML manifests require PyYAML, install it with: pip install pyyaml, or use a .json manifest'
+            ) from e
+        return yaml.safe_load(manifestfile)
+
+class LexBatchStep():
+    """One operation of a manifest
+
+    :param step_id: unique id of the step, referenced by depends_on
+    :type step_id: str
+
+    :param operation: operation name, e.g. import
+    :type operation: str
+
+    :param kwargs: keyword arguments of the operation function
+    :type kwargs: dict
+
+    :param depends_on: ids of the steps that must succeed first
+    :type depends_on: list
+    """
+    def __init__(self, step_id, operation, kwargs, depends_on=None):
+        self._step_id = step_id
+        self._operation = operation
+        self._kwargs = kwargs
+        self._depends_on = list(depends_on or [])
+
+    @property
+    def step_id(self):
+        return self._step_id
+
+    @property
+    def operation(self):
+        return self._operation
+
+    @property
+    def kwargs(self):
+        return self._kwargs
+
+    @property
+    def depends_on(self):
+        return self._depends_on
+
+class LexBatchRunner():
+    """Runs the operations of a manifest in dependency order
+
+    A step runs once all of the steps it depends on succeeded. When a step
+    fails, the steps depending on it, directly or not, are skipped. The
+    remaining steps are skipped too, unless continue_on_error is set in
+    the manifest.
+
+    :param operations: {operation name: function}, e.g. the lex_manager.py
+        import_bot function for import
+    :type operations: dict
+    """
+    def __init__(self, operations):
+        self._operations = operations
+
+    def parse(self, manifest):
+        """ Returns the steps of a manifest in execution order
+
+        Raises LexBatchError for unknown operations or arguments, duplicate
+        ids, unknown dependencies and dependency cycles.
+        """
+        if not isinstance(manifest, dict) or not isinstance(manifest.get('operations'), list):
+            raise LexBatchError('manifest must be an object with an operations list')
+        defaults = manifest.get('defaults') or {}
+        steps = []
+        for position, entry in enumerate(manifest['operations']):
+            if not isinstance(entry, dict) or 'operation' not in entry:
+                raise LexBatchError('operation #{} has no operation key'.format(position + 1))
+            operation = entry['operation']
+            if operation not in self._operations:
+                raise LexBatchError('operation #{}: unknown operation {}, expected one of {}'.format(
+                    position + 1, operation, ', '.join(sorted(self._operations))
+                ))
+            step_id = str(entry.get('id') or '{}-{}'.format(operation, position + 1))
+            depends_on = entry.get('depends_on') or []
+            if isinstance(depends_on, str):
+                depends_on = [depends_on]
+            parameters = inspect.signature(self._operations[operation]).parameters
+            kwargs = {key: value for key, value in defaults.items() if key in parameters}
+            for key, value in entry.items():
+                if key in OPERATION_KEYS:
+                    continue
+                if key not in parameters:
+                    raise LexBatchError('step {}: unknown argument {} for operation {}'.format(step_id, key, operation))
+                kwargs[key] = value
+            steps.append(LexBatchStep(step_id, operation, kwargs, [str(dependency) for dependency in depends_on]))
+        return self._ordered(steps)
+
+    @staticmethod
+    def _ordered(steps):
+        # Kahn's algorithm, keeping the manifest order among ready steps
+        steps_by_id = {}
+        for step in steps:
+            if step.step_id in steps_by_id:
+                raise LexBatchError('duplicate step id {}'.format(step.step_id))
+            steps_by_id[step.step_id] = step
+        pending_dependencies = {}
+        for step in steps:
+            for dependency in step.depends_on:
+                if dependency not in steps_by_id:
+                    raise LexBatchError('step {} depends on unknown step {}'.format(step.step_id, dependency))
+            pending_dependencies[step.step_id] = set(step.depends_on)
+        ordered_steps = []
+        while len(ordered_steps) < len(steps):
+            ready_steps = [
+                step for step in steps
+                if step.step_id in pending_dependencies and not pending_dependencies[step.step_id]
+            ]
+            if not ready_steps:
+                raise LexBatchError('dependency cycle between steps {}'.format(
+                    ', '.join(sorted(pending_dependencies))
+                ))
+            for step in ready_steps:
+                del pending_dependencies[step.step_id]
+                ordered_steps.append(step)
+            for dependencies in pending_dependencies.values():
+                dependencies.difference_update(step.step_id for step in ready_steps)
+        return ordered_steps
+
+    def _run_step(self, step):
+        logger.info('Running step {} : {} {}'.format(step.step_id, step.operation, json.dumps(step.kwargs, sort_keys=True, default=str)))
+        started = time.perf_counter()
+        try:
+            result = self._operations[step.operation](**step.kwargs)
+        except Exception as e:
+            logger.warning('Step {} failed'.format(step.step_id))
+            logger.warning(e)
+            traceback.print_exc(limit=None, file=None, chain=True)
+            return dict(id=step.step_id, operation=step.operation, status='failed', error=str(e), elapsed=time.perf_counter() - started)
+        return dict(id=step.step_id, operation=step.operation, status='succeeded', result=result, elapsed=time.perf_counter() - started)
+
+    def run(self, manifest):
+        """ Runs a manifest and returns one result per step, in execution order
+
+        Each result holds id, operation, status (succeeded, failed or
+        skipped), elapsed seconds and the result or error of the step.
+        """
+        steps = self.parse(manifest)
+        continue_on_error = bool(manifest.get('continue_on_error', False))
+        statuses = {}
+        results = []
+        for step in steps:
+            blocking_steps = [dependency for dependency in step.depends_on if statuses[dependency] != 'succeeded']
+            if blocking_steps or ('failed' in statuses.values() and not continue_on_error):
+                reason = 'dependency {} did not succeed'.format(', '.join(blocking_steps)) if blocking_steps else 'an earlier step failed'
+                logger.info('Skipping step {} : {}'.format(step.step_id, reason))
+                result = dict(id=step.step_id, operation=step.operation, status='skipped', error=reason, elapsed=0.0)
+            else:
+                result = self._run_step(step)
+            statuses[step.step_id] = result['status']
+            results.append(result)
+        for result in results:
+            logger.info('{:<10} {:>8.1f}s {} ({})'.format(result['status'], result['elapsed'], result['id'], result['operation']))
+        return results
+
+    def run_file(self, path):
+        return self.run(load_manifest(path))
@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+
+##########################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+##########################################################################
+""" Local cache helpers for the Lex management scripts
+
+Caches are kept under LEX_MGMT_CACHE_DIR (defaults to .lexcache in the
+working directory) and are always safe to delete.
+"""
+import logging
+import json
+import os
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger('lex_utils_v2').getChild(__name__)
+
+LEX_CACHE_DIR = os.environ.get('LEX_MGMT_CACHE_DIR', '.lexcache')
+
+def cache_path(*parts):
+    return os.path.join(LEX_CACHE_DIR, *parts)
+
+class JsonFileStore():
+    """Small JSON document persisted to disk
+
+    Reads are lazy, writes go through a temporary file and an atomic rename
+    so a crashed run never leaves a truncated cache behind. A corrupt or
+    unreadable file is treated as empty.
+
+    :param path: file path of the JSON document. If empty, the store only
+        lives in memory.
+    :type path: str
+    """
+    def __init__(self, path=None):
+        self._path = path
+        self._lock = threading.RLock()
+        self._data = None
+
+    @property
+    def path(self):
+        return self._path
+
+    @property
+    def lock(self):
+        return self._lock
+
+    @property
+    def data(self):
+        with self._lock:
+            if self._data is None:
+                self._data = self._load()
+            return self._data
+
+    def _load(self):
+        if not self._path or not os.path.exists(self._path):
+            return {}
+        try:
+            with open(self._path, 'r', encoding='utf-8') as cachefile:
+                data = json.load(cachefile)
+            if isinstance(data, dict):
+                return data
+        except (OSError, ValueError) as e:
+            logger.warning('Ignoring unreadable cache file {} : {}'.format(self._path, e))
+        return {}
+
+    def save(self):
+        if not self._path:
+            return
+        with self._lock:
+            directory = os.path.dirname(self._path) or '.'
+            try:
+                os.makedirs(directory, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+                with os.fdopen(fd, 'w', encoding='utf-8') as cachefile:
+                    json.dump(self.data, cachefile, sort_keys=True)
+                os.replace(tmp_path, self._path)
+            except OSError as e:
+                logger.warning('Failed to write cache file {} : {}'.format(self._path, e))
+
+    def clear(self):
+        with self._lock:
+            self._data = {}
+            if self._path and os.path.exists(self._path):
+                os.remove(self._path)
+
+RESOLUTION_CACHE_TTL = int(os.environ.get('LEX_MGMT_RESOLUTION_CACHE_TTL', '900'))
+PERSIST_RESOLUTION_CACHE = os.environ.get('LEX_MGMT_PERSIST_RESOLUTION_CACHE', 'false').lower() == 'true'
+
+class LexResolutionCache():
+    """Name to id resolutions of Lex resources with a time to live
+
+    Entries are keyed by account, region and resource name, and are kept
+    in memory. When a path is given they are also persisted so that later
+    runs can skip the list calls.
+
+    :param path: JSON file to persist the entries to. If empty, entries
+        only live for the lifetime of the process.
+    :type path: str
+
+    :param ttl: seconds an entry stays valid
+    :type ttl: int
+    """
+    def __init__(self, path=None, ttl=RESOLUTION_CACHE_TTL):
+        self._store = JsonFileStore(path)
+        self._ttl = ttl
+
+    @staticmethod
+    def key(*parts):
+        return '|'.join(str(part) for part in parts)
+
+    def get(self, key):
+        with self._store.lock:
+            entry = self._store.data.get(key)
+            if entry is None:
+                return None
+            if time.time() - entry['stored_at'] > self._ttl:
+                logger.info('Resolution cache entry expired : ' + key)
+                del self._store.data[key]
+                return None
+            return entry['value']
+
+    def put(self, key, value):
+        with self._store.lock:
+            self._store.data[key] = {'value': value, 'stored_at': time.time()}
+            self._store.save()
+
+    def invalidate(self, prefix):
+        """ Drops every entry whose key starts with prefix
+        """
+        with self._store.lock:
+            stale_keys = [key for key in self._store.data if key.startswith(prefix)]
+            for key in stale_keys:
+                del self._store.data[key]
+            if stale_keys:
+                logger.info('Invalidated resolution cache entries : {}'.format(stale_keys))
+                self._store.save()
+
+    def clear(self):
+        self._store.clear()
+
+_resolution_cache = LexResolutionCache(
+    cache_path('resolution_cache.json') if PERSIST_RESOLUTION_CACHE else None
+)
+
+def get_resolution_cache():
+    return _resolution_cache
@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+
+##########################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+##########################################################################
+""" Shared boto3 session and client registry
+
+All Lex helper classes get their boto3 clients from a single process-wide
+registry so that sessions, credential resolution, endpoint resolution and
+HTTP connection pools are created once per profile/service/region.
+"""
+import logging
+import os
+import threading
+import boto3
+import requests
+from botocore.config import Config
+from lex_concurrency import LexApiRateLimiter
+from lex_metrics import get_run_metrics
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger('lex_utils_v2').getChild(__name__)
+
+MAX_POOL_CONNECTIONS = int(os.environ.get('LEX_MGMT_MAX_POOL_CONNECTIONS', '25'))
+MAX_RETRY_ATTEMPTS = int(os.environ.get('LEX_MGMT_MAX_RETRY_ATTEMPTS', '10'))
+
+DEFAULT_CLIENT_CONFIG = Config(
+    max_pool_connections=MAX_POOL_CONNECTIONS,
+    retries={
+        'mode': 'adaptive',
+        'max_attempts': MAX_RETRY_ATTEMPTS
+    },
+    tcp_keepalive=True,
+    connect_timeout=10,
+    read_timeout=60
+)
+RATE_LIMITED_SERVICES = ('lexv2-models',)
+
+class LexClientRegistry():
+    """Process-wide cache of boto3 sessions and clients
+
+    Clients are keyed by (profile name, service name, region name). A client
+    created for a key is reused by every later caller asking for the same key.
+    Clients of rate limited services get their own LexApiRateLimiter, shared
+    by every thread calling the account/region through the client. The calls
+    of every client are counted in the run metrics.
+
+    :param config: botocore Config applied to every client created by the
+        registry. Defaults to a pooled, adaptive-retry, keep-alive config.
+    :type config: botocore.config.Config
+    """
+    def __init__(self, config=None):
+        self._config = config or DEFAULT_CLIENT_CONFIG
+        self._lock = threading.RLock()
+        self._sessions = {}
+        self._clients = {}
+        self._account_ids = {}
+        self._http_session = None
+
+    @property
+    def config(self):
+        return self._config
+
+    def session(self, profile_name=''):
+        """ Returns the boto3 session for a profile, creating it on first use
+        """
+        with self._lock:
+            if profile_name not in self._sessions:
+                if profile_name:
+                    self._sessions[profile_name] = boto3.session.Session(profile_name=profile_name)
+                else:
+                    self._sessions[profile_name] = boto3.session.Session()
+            return self._sessions[profile_name]
+
+    def client(self, service_name, profile_name='', region_name=None):
+        """ Returns the shared client for a profile/service/region
+
+        :param service_name: boto3 service name, e.g. lexv2-models
+        :type service_name: str
+
+        :param profile_name: AWS cli/SDK profile credentials to use.
+            If empty, the standard credential resolver will be used.
+        :type profile_name: str
+
+        :param region_name: region of the client. If empty, the session
+            default region is used.
+        :type region_name: str
+        """
+        key = (profile_name, service_name, region_name)
+        with self._lock:
+            if key not in self._clients:
+                try:
+                    self._clients[key] = self.session(profile_name).client(
+                        service_name,
+                        region_name=region_name,
+                        config=self._config
+                    )
+                    if service_name in RATE_LIMITED_SERVICES:
+                        LexApiRateLimiter().install(self._clients[key])
+                    get_run_metrics().install(self._clients[key])
+                except Exception as e:
+                    logger.warning(
+                        'Failed to create {} boto3 client using profile: {}'.format(
+                            service_name, profile_name
+                        )
+                    )
+                    logger.warning(e)
+                    raise
+            return self._clients[key]
+
+    def account_id(self, profile_name=''):
+        """ Returns the AWS account id of a profile, calling STS once per profile
+        """
+        with self._lock:
+            if profile_name not in self._account_ids:
+                sts_client = self.client('sts', profile_name=profile_name)
+                self._account_ids[profile_name] = sts_client.get_caller_identity()['Account']
+            return self._account_ids[profile_name]
+
+    def partition(self, region_name, profile_name=''):
+        """ Returns the AWS partition of a region, e.g. aws-cn for cn-north-1
+        """
+        return self.session(profile_name).get_partition_for_region(region_name)
+
+    def http_session(self):
+        """ Returns the pooled requests session used for presigned S3 URLs
+        """
+        with self._lock:
+            if self._http_session is None:
+                http_adapter = HTTPAdapter(
+                    pool_connections=MAX_POOL_CONNECTIONS,
+                    pool_maxsize=MAX_POOL_CONNECTIONS
+                )
+                self._http_session = requests.Session()
+                self._http_session.mount('https://', http_adapter)
+                self._http_session.mount('http://', http_adapter)
+            return self._http_session
+
+    def register_client(self, service_name, client, profile_name='', region_name=None):
+        """ Registers a client for a profile/service/region
+
+        Used to inject stand-in clients (e.g. botocore Stubber wrapped clients
+        or fakes) so that every helper class picks them up.
+        """
+        with self._lock:
+            self._clients[(profile_name, service_name, region_name)] = client
+
+    def clear(self):
+        """ Drops every cached session and client
+        """
+        with self._lock:
+            self._sessions.clear()
+            self._clients.clear()
+            self._account_ids.clear()
+            if self._http_session is not None:
+                self._http_session.close()
+                self._http_session = None
+
+_client_registry = LexClientRegistry()
+
+def get_client_registry():
+    return _client_registry
+
+def get_client(service_name, profile_name='', region_name=None):
+    return _client_registry.client(service_name, profile_name=profile_name, region_name=region_name)
+
+def get_http_session():
+    return _client_registry.http_session()
+
+def register_client(service_name, client, profile_name='', region_name=None):
+    _client_registry.register_client(service_name, client, profile_name=profile_name, region_name=region_name)
@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+
+##########################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+##########################################################################
+""" Concurrency helpers for batches of Lex Model Building Service calls
+"""
+import asyncio
+import functools
+import logging
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger('lex_utils_v2').getChild(__name__)
+
+# Calls per second and per client, i.e. per profile/region, kept below the
+# Lex Model Building Service quotas: Describe*/List* calls and every other
+# (create, update, delete, build, import, export) call
+LEX_API_READ_RATE = float(os.environ.get('LEX_MGMT_LEX_API_READ_RATE', '10'))
+LEX_API_WRITE_RATE = float(os.environ.get('LEX_MGMT_LEX_API_WRITE_RATE', '2'))
+MAX_FLEET_WORKERS = int(os.environ.get('LEX_MGMT_MAX_FLEET_WORKERS', '8'))
+MAX_FLEET_WORKERS_PER_ACCOUNT = int(os.environ.get('LEX_MGMT_MAX_FLEET_WORKERS_PER_ACCOUNT', '4'))
+READ_OPERATION_PREFIXES = ('Describe', 'List')
+MAX_BLOCKING_CALL_WORKERS = int(os.environ.get('LEX_MGMT_MAX_BLOCKING_CALL_WORKERS', '32'))
+
+_blocking_call_executor = ThreadPoolExecutor(
+    max_workers=MAX_BLOCKING_CALL_WORKERS,
+    thread_name_prefix='lex-blocking-call'
+)
+
+async def run_blocking(func, *args, **kwargs):
+    """ Runs a short blocking call, e.g. one boto3 API call, off the event loop
+
+    Calls share a bounded thread pool. Threads are only held for the
+    duration of the call, never while waiting on a Lex operation.
+    """
+    return await asyncio.get_running_loop().run_in_executor(
+        _blocking_call_executor,
+        functools.partial(func, *args, **kwargs)
+    )
+
+def run_sync(coroutine):
+    """ Runs a coroutine to completion from synchronous code
+
+    Used by the synchronous entry points wrapping the *_async methods.
+    From a coroutine, await the *_async method instead.
+    """
+    return asyncio.run(coroutine)
+
+class TokenBucket():
+    """Thread-safe token bucket rate limiter
+
+    Holds up to capacity tokens, refilled at rate tokens per second.
+    acquire() blocks until a token is available, so callers sharing a
+    bucket never exceed rate calls per second once the initial burst of
+    capacity calls is spent.
+
+    :param rate: tokens added per second
+    :type rate: float
+
+    :param capacity: maximum number of tokens, i.e. the burst size.
+        Defaults to rate, with a minimum of one token.
+    :type capacity: float
+    """
+    def __init__(self, rate, capacity=None):
+        if rate <= 0:
+            raise ValueError('rate must be positive')
+        self._rate = float(rate)
+        self._capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def rate(self):
+        return self._rate
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def try_acquire(self, tokens=1):
+        """ Takes tokens if available, returns whether it did
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens = self._tokens - tokens
+                return True
+            return False
+
+    def acquire(self, tokens=1):
+        """ Blocks until tokens are available, returns the seconds waited
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens = self._tokens - tokens
+                    return waited
+                delay = (tokens - self._tokens) / self._rate
+            time.sleep(delay)
+            waited = waited + delay
+
+class LexApiRateLimiter():
+    """Token bucket rate limits on the calls of a boto3 client
+
+    install() registers a botocore before-call hook on a client, so every
+    thread sharing the client, i.e. every operation on the same account
+    and region, waits for a token of the read or write bucket before the
+    request is sent. Retries of the client's own retry handler are not
+    counted again.
+
+    :param read_rate: Describe*/List* calls per second
+    :type read_rate: float
+
+    :param write_rate: calls per second of every other operation
+    :type write_rate: float
+    """
+    def __init__(self, read_rate=LEX_API_READ_RATE, write_rate=LEX_API_WRITE_RATE):
+        self._read_bucket = TokenBucket(read_rate)
+        self._write_bucket = TokenBucket(write_rate)
+
+    def bucket(self, operation_name):
+        if operation_name.startswith(READ_OPERATION_PREFIXES):
+            return self._read_bucket
+        return self._write_bucket
+
+    def _before_call(self, model, **kwargs):
+        waited = self.bucket(model.name).acquire()
+        if waited:
+            logger.debug('Rate limited {} for {:.2f}s'.format(model.name, waited))
+
+    def install(self, client):
+        service_event_name = client.meta.service_model.service_id.hyphenize()
+        client.meta.events.register('before-call.' + service_event_name, self._before_call)
+        return client
+
+class LexFleetRunner():
+    """Runs one operation on many bots concurrently
+
+    Operations run on a bounded thread pool, with at most
+    per_account_workers operations at a time on the same account, i.e.
+    environment. Each operation runs independently: a failure is recorded
+    in its result and the other operations carry on.
+
+    :param max_workers: maximum number of operations running at a time
+    :type max_workers: int
+
+    :param per_account_workers: maximum number of operations running at a
+        time on the same account
+    :type per_account_workers: int
+    """
+    def __init__(self, max_workers=MAX_FLEET_WORKERS, per_account_workers=MAX_FLEET_WORKERS_PER_ACCOUNT):
+        self._max_workers = max(1, max_workers)
+        self._per_account_workers = max(1, per_account_workers)
+        self._lock = threading.Lock()
+        self._account_semaphores = {}
+
+    def _account_semaphore(self, account):
+        with self._lock:
+            if account not in self._account_semaphores:
+                self._account_semaphores[account] = threading.BoundedSemaphore(self._per_account_workers)
+            return self._account_semaphores[account]
+
+    def _run_one(self, operation, kwargs):
+        with self._account_semaphore(kwargs.get('environment')):
+            started = time.perf_counter()
+            try:
+                result = operation(**kwargs)
+            except Exception as e:
+                logger.warning(e)
+                logger.warning('{} failed for bot {}'.format(operation.__name__, kwargs.get('bot_name')))
+                traceback.print_exc(limit=None, file=None, chain=True)
+                return dict(bot_name=kwargs.get('bot_name'), status='failed', error=str(e), elapsed=time.perf_counter() - started)
+            return dict(bot_name=kwargs.get('bot_name'), status='succeeded', result=result, elapsed=time.perf_counter() - started)
+
+    def run(self, operation, targets):
+        """ Runs operation(**kwargs) for each kwargs of targets
+
+        Returns one result per target, in the order of targets, holding
+        bot_name, status (succeeded or failed), elapsed seconds and the
+        result or error of the operation.
+
+        :param operation: function run for every target, e.g. the
+            lex_manager.py export_bot function
+        :type operation: callable
+
+        :param targets: keyword arguments of each run, the environment
+            argument selects the account semaphore
+        :type targets: list
+        """
+        if len(targets) <= 1:
+            results = [self._run_one(operation, kwargs) for kwargs in targets]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self._max_workers, len(targets))) as executor:
+                results = list(executor.map(lambda kwargs: self._run_one(operation, kwargs), targets))
+        failed = [result['bot_name'] for result in results if result['status'] != 'succeeded']
+        logger.info('{} : {} of {} bots succeeded{}'.format(
+            operation.__name__, len(results) - len(failed), len(results),
+            ', failed : ' + ', '.join(failed) if failed else ''
+        ))
+        return results
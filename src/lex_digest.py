@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+
+##########################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+##########################################################################
+""" Canonical content digests of bot definitions on disk
+
+Digests only depend on the content of the bot definition, not on file
+formatting, file timestamps or the environment/ticket specific bot name,
+so the same tree gives the same digest in every environment.
+"""
+import hashlib
+import json
+import os
+
+def canonical_content(filepath, filename=None):
+    """ Returns the canonical bytes of a bot definition file
+
+    JSON files are re-serialised compactly with sorted keys, and the name
+    of Bot.json is dropped. Other files are returned unchanged.
+    """
+    filename = filename or os.path.basename(filepath)
+    with open(filepath, 'rb') as botfile:
+        content = botfile.read()
+    if not filename.endswith('.json'):
+        return content
+    try:
+        jsondata = json.loads(content)
+    except ValueError:
+        return content
+    if filename == 'Bot.json' and isinstance(jsondata, dict):
+        jsondata.pop('name', None)
+    return json.dumps(jsondata, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+def file_digests(bot_dir):
+    """ Returns {relative posix path: sha256 hex digest} of every file of a bot
+    """
+    digests = {}
+    for root, dirs, files in os.walk(bot_dir):
+        for filename in files:
+            filepath = os.path.join(root, filename)
+            relpath = os.path.relpath(filepath, bot_dir).replace(os.sep, '/')
+            digests[relpath] = hashlib.sha256(canonical_content(filepath, filename)).hexdigest()
+    return digests
+
+def combine_digests(digests, prefix=''):
+    """ Returns one digest over the file digests whose path starts with prefix
+    """
+    tree_hash = hashlib.sha256()
+    for relpath in sorted(digests):
+        if relpath.startswith(prefix):
+            tree_hash.update(relpath.encode('utf-8'))
+            tree_hash.update(b'\0')
+            tree_hash.update(digests[relpath].encode('ascii'))
+            tree_hash.update(b'\n')
+    return tree_hash.hexdigest()
+
+def bot_tree_digest(bot_dir, manifest_path=None, bot_file_digests=None):
+    """ Returns the canonical digest of a bot definition directory
+
+    :param bot_dir: directory of the bot, e.g. lex_bots/<bot name>
+    :type bot_dir: str
+
+    :param manifest_path: export Manifest.json shipped with the bot, if any
+    :type manifest_path: str
+
+    :param bot_file_digests: result of file_digests(bot_dir), if already
+        computed
+    :type bot_file_digests: dict
+    """
+    digests = dict(bot_file_digests) if bot_file_digests is not None else file_digests(bot_dir)
+    if manifest_path and os.path.exists(manifest_path):
+        digests['../Manifest.json'] = hashlib.sha256(canonical_content(manifest_path)).hexdigest()
+    return combine_digests(digests)
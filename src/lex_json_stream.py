@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+
+##########################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+##########################################################################
+""" Incremental reader of large JSON documents
+
+Reads a JSON document in chunks and decodes one member or array item at a
+time with json.JSONDecoder.raw_decode, so a large array can be walked with
+only the current item held in memory.
+"""
+import codecs
+import json
+
+STREAM_CHUNK_SIZE = 1024 * 1024
+WHITESPACE = ' \t\n\r'
+NUMBER_CHARACTERS = '0123456789+-.eE'
+
+class JsonStreamReader():
+    """Walks a JSON document read from a binary file object
+
+    members() yields the keys of an object; for each key the caller then
+    reads the value with value() or, for an array, items(). Invalid
+    documents raise ValueError.
+
+    :param fileobj: binary file object positioned at the document start
+    :param chunk_size: number of bytes read at a time
+    :type chunk_size: int
+
+    :param on_chunk: called with every chunk of bytes read, e.g. to hash
+        the document while it is parsed
+    :type on_chunk: callable
+    """
+    def __init__(self, fileobj, chunk_size=STREAM_CHUNK_SIZE, on_chunk=None):
+        self._fileobj = fileobj
+        self._chunk_size = chunk_size
+        self._on_chunk = on_chunk
+        self._text_decoder = codecs.getincrementaldecoder('utf-8')()
+        self._json_decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self, min_size=0):
+        if self._eof:
+            return False
+        if self._pos:
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+        chunk = self._fileobj.read(max(self._chunk_size, min_size))
+        if self._on_chunk is not None and chunk:
+            self._on_chunk(chunk)
+        if not chunk:
+            self._eof = True
+            self._buffer = self._buffer + self._text_decoder.decode(b'', final=True)
+        else:
+            self._buffer = self._buffer + self._text_decoder.decode(chunk)
+        return True
+
+    def peek(self):
+        """ Returns the next non whitespace character, '' at the end
+        """
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in WHITESPACE:
+                self._pos = self._pos + 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ''
+
+    def _expect(self, characters):
+        character = self.peek()
+        if not character or character not in characters:
+            raise ValueError('expected {} at character {!r}'.format(' or '.join(characters), character))
+        self._pos = self._pos + 1
+        return character
+
+    def value(self):
+        """ Decodes and returns the next value
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self._json_decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                # Incomplete value, read at least as much again so that
+                # a large value is not re-parsed once per chunk
+                if self._fill(len(self._buffer) - self._pos):
+                    continue
+                raise
+            # A number may continue in the next chunk, e.g. '-0.' decodes
+            # as -0 until the fraction is read
+            if (not self._eof and isinstance(value, (int, float)) and not isinstance(value, bool)
+                    and (end == len(self._buffer) or self._buffer[end] in NUMBER_CHARACTERS)):
+                self._fill(len(self._buffer) - self._pos)
+                continue
+            self._pos = end
+            return value
+
+    def members(self):
+        """ Yields the keys of the next object
+        """
+        self._expect('{')
+        if self.peek() == '}':
+            self._pos = self._pos + 1
+            return
+        while True:
+            if self.peek() != '"':
+                raise ValueError('expected an object key')
+            key = self.value()
+            self._expect(':')
+            yield key
+            if self._expect(',}') == '}':
+                return
+
+    def items(self):
+        """ Yields the items of the next array one at a time
+        """
+        self._expect('[')
+        if self.peek() == ']':
+            self._pos = self._pos + 1
+            return
+        while True:
+            yield self.value()
+            if self._expect(',]') == ']':
+                return
+
+    def end(self):
+        """ Checks that only whitespace is left, reading the file to its end
+        """
+        if self.peek():
+            raise ValueError('extra data after the JSON document')
@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+
+##########################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+##########################################################################
+""" Lazily paginated listings of Lex Model Building Service resources
+
+Pages are only fetched while the caller keeps iterating, so a lookup that
+finds its match on the first page never fetches the second one.
+"""
+import logging
+
+logger = logging.getLogger('lex_utils_v2').getChild(__name__)
+
+MAX_PAGE_SIZE = 1000
+
+class LexPagedListing():
+    """Iterates over every item of a lexv2-models list operation
+
+    Uses the botocore paginator when the client provides one, and follows
+    nextToken otherwise. The number of pages fetched so far is available
+    through pages_fetched.
+
+    :param client: lexv2-models boto3 client
+    :param operation: client method name, e.g. list_bots
+    :type operation: str
+
+    :param result_key: response key holding the items, e.g. botSummaries
+    :type result_key: str
+
+    :param kwargs: arguments passed unchanged to every page request
+    """
+    def __init__(self, client, operation, result_key, **kwargs):
+        self._client = client
+        self._operation = operation
+        self._result_key = result_key
+        self._kwargs = kwargs
+        self._pages_fetched = 0
+
+    @property
+    def pages_fetched(self):
+        return self._pages_fetched
+
+    def pages(self):
+        can_paginate = getattr(self._client, 'can_paginate', None)
+        if can_paginate is not None and can_paginate(self._operation):
+            paginator = self._client.get_paginator(self._operation)
+            for page in paginator.paginate(**self._kwargs):
+                self._pages_fetched = self._pages_fetched + 1
+                yield page
+            return
+        next_token = None
+        while True:
+            if next_token:
+                page = getattr(self._client, self._operation)(nextToken=next_token, **self._kwargs)
+            else:
+                page = getattr(self._client, self._operation)(**self._kwargs)
+            self._pages_fetched = self._pages_fetched + 1
+            logger.info('Retrieved {} page {}'.format(self._operation, self._pages_fetched))
+            yield page
+            next_token = page.get('nextToken')
+            if not next_token:
+                return
+
+    def __iter__(self):
+        for page in self.pages():
+            for item in page.get(self._result_key, []):
+                yield item
+
+    def find(self, predicate):
+        """ Returns the first item matching predicate, or None
+
+        Stops fetching pages as soon as a match is found.
+        """
+        for item in self:
+            if predicate(item):
+                return item
+        return None
+
+def list_bots(client, bot_name=None, page_size=MAX_PAGE_SIZE):
+    """ Lists bots, filtered server side on the exact bot name if given
+    """
+    kwargs = {
+        'sortBy': {
+            'attribute': 'BotName',
+            'order': 'Ascending'
+        },
+        'maxResults': page_size
+    }
+    if bot_name:
+        kwargs['filters'] = [
+            {
+                'name': 'BotName',
+                'values': [bot_name],
+                'operator': 'EQ'
+            },
+        ]
+    return LexPagedListing(client, 'list_bots', 'botSummaries', **kwargs)
+
+def list_bot_aliases(client, bot_id, page_size=MAX_PAGE_SIZE):
+    return LexPagedListing(
+        client, 'list_bot_aliases', 'botAliasSummaries',
+        botId=bot_id,
+        maxResults=page_size
+    )
+
+def list_bot_versions(client, bot_id, order='Ascending', page_size=MAX_PAGE_SIZE):
+    return LexPagedListing(
+        client, 'list_bot_versions', 'botVersionSummaries',
+        botId=bot_id,
+        sortBy={
+            'attribute': 'BotVersion',
+            'order': order
+        },
+        maxResults=page_size
+    )
+
+def list_bot_locales(client, bot_id, bot_version='DRAFT', page_size=MAX_PAGE_SIZE):
+    return LexPagedListing(
+        client, 'list_bot_locales', 'botLocaleSummaries',
+        botId=bot_id,
+        botVersion=bot_version,
+        maxResults=page_size
+    )
@@ -24,12 +24,21 @@ Used to import/export/delete Lex bots and associated resources
 
 Can be run as a shell script or used as a Lambda Function for CloudFormation
 Custom Resources.
+
+import_bot_async, export_bot_async and create_bot_async can be awaited to
+drive many bots from a single event loop; import_bot, export_bot and
+create_bot run them to completion.
 """
 
 import logging
+import atexit
 import json
 
-from lex_utils_v2 import LexBotImporter, LexBotExporter, LexBotCreater, LexBotDeleter, LexBotVersionManager, LexBotValidator
+from lex_batch import LexBatchRunner
+from lex_metrics import EMF_NAMESPACE, get_run_metrics
+from lex_concurrency import MAX_FLEET_WORKERS, LexFleetRunner, run_blocking, run_sync
+from lex_stacks import invalidate_stack_outputs, refresh_stack_outputs
+from lex_utils_v2 import DEFAULT_RETAIN_BOT_VERSIONS, LexBotImporter, LexBotExporter, LexBotCreater, LexBotDeleter, LexBotVersionManager, LexBotValidator
 
 DEFAULT_LOGGING_LEVEL = logging.INFO
 logging.basicConfig(
@@ -39,8 +48,9 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 logger.setLevel(DEFAULT_LOGGING_LEVEL)
 
-def import_bot(bot_name=None, ticket=None, environment=None, bot_source_version='DRAFT',bot_alias_name=None,delete_old_version_flag='true'):
-    bot_importer = LexBotImporter(
+async def import_bot_async(bot_name=None, ticket=None, environment=None, bot_source_version='DRAFT',bot_alias_name=None,delete_old_version_flag='true',force_import=False):
+    bot_importer = await run_blocking(
+        LexBotImporter,
         bot_name=bot_name,
         ticket=ticket,
         environment=environment,
@@ -49,11 +59,15 @@ def import_bot(bot_name=None, ticket=None, environment=None, bot_source_version=
         bot_alias_name=bot_alias_name,
         delete_old_version_flag=delete_old_version_flag,
         logging_level=DEFAULT_LOGGING_LEVEL,
+        force_import=force_import,
     )
-    bot_import_status = bot_importer.import_bot()
+    bot_import_status = await bot_importer.import_bot_async()
 
     return bot_import_status
 
+def import_bot(bot_name=None, ticket=None, environment=None, bot_source_version='DRAFT',bot_alias_name=None,delete_old_version_flag='true',force_import=False):
+    return run_sync(import_bot_async(bot_name=bot_name, ticket=ticket, environment=environment, bot_source_version=bot_source_version, bot_alias_name=bot_alias_name, delete_old_version_flag=delete_old_version_flag, force_import=force_import))
+
 def delete_old_bot_version(bot_name=None, ticket=None, environment=None, bot_alias_name=None):
     bot_version_manager = LexBotVersionManager(
         bot_name=bot_name,
@@ -66,21 +80,47 @@ def delete_old_bot_version(bot_name=None, ticket=None, environment=None, bot_ali
 
     return bot_delete_old_version_status
 
-def export_bot(bot_name=None, ticket=None, environment=None, bot_version='DRAFT'):
-    bot_exporter = LexBotExporter(
+def collect_old_bot_versions(bot_name=None, ticket=None, environment=None, bot_alias_name=None, keep_last=None, dry_run=False):
+    bot_version_manager = LexBotVersionManager(
+        bot_name=bot_name,
+        ticket=ticket,
+        environment=environment,
+        bot_alias_name=bot_alias_name,
+        logging_level=DEFAULT_LOGGING_LEVEL,
+    )
+    if keep_last is None:
+        keep_last = DEFAULT_RETAIN_BOT_VERSIONS
+    bot_gc_status = bot_version_manager.collect_old_bot_versions(keep_last=keep_last, dry_run=dry_run)
+
+    return bot_gc_status
+
+def stack_outputs(stack_name=None):
+    outputs = refresh_stack_outputs(stack_name)
+    logger.info('Outputs of stack {} : {}'.format(stack_name, json.dumps(outputs, sort_keys=True)))
+
+    return outputs
+
+async def export_bot_async(bot_name=None, ticket=None, environment=None, bot_version='DRAFT', incremental=False):
+    bot_exporter = await run_blocking(
+        LexBotExporter,
         bot_name=bot_name,
         ticket=ticket,
         environment=environment,
         bot_version=bot_version,
         logging_level=DEFAULT_LOGGING_LEVEL,
+        incremental=incremental,
     )
 
-    bot_export_status = bot_exporter.export_bot()
+    bot_export_status = await bot_exporter.export_bot_async()
 
     return bot_export_status
 
-def create_bot(bot_name=None, ticket=None, environment=None, bot_alias_name=None, bot_role_name=None):
-    bot_creater = LexBotCreater(
+def export_bot(bot_name=None, ticket=None, environment=None, bot_version='DRAFT', incremental=False):
+    return run_sync(export_bot_async(bot_name=bot_name, ticket=ticket, environment=environment, bot_version=bot_version, incremental=incremental))
+
+async def create_bot_async(bot_name=None, ticket=None, environment=None, bot_alias_name=None, bot_role_name=None):
+    bot_creater = await run_blocking(
+        LexBotCreater,
         bot_name=bot_name,
         ticket=ticket,
         environment=environment,
@@ -89,10 +129,13 @@ def create_bot(bot_name=None, ticket=None, environment=None, bot_alias_name=None
         logging_level=DEFAULT_LOGGING_LEVEL,
     )
 
-    bot_create_status = bot_creater.create_bot()
+    bot_create_status = await bot_creater.create_bot_async()
 
     return bot_create_status
 
+def create_bot(bot_name=None, ticket=None, environment=None, bot_alias_name=None, bot_role_name=None):
+    return run_sync(create_bot_async(bot_name=bot_name, ticket=ticket, environment=environment, bot_alias_name=bot_alias_name, bot_role_name=bot_role_name))
+
 def delete_bot(bot_name=None, ticket=None, environment=None):
     bot_deleter = LexBotDeleter(
         bot_name=bot_name,
@@ -104,15 +147,58 @@ def delete_bot(bot_name=None, ticket=None, environment=None):
 
     return bot_delete_status
 
-def validate_bot(bot_name=None):
+def validate_bot(bot_name=None, utterance_collisions_as_errors=False, near_duplicate_threshold=None):
     bot_validator = LexBotValidator(
         bot_name=bot_name,
         logging_level=DEFAULT_LOGGING_LEVEL,
+        utterance_collisions_as_errors=utterance_collisions_as_errors,
+        near_duplicate_threshold=near_duplicate_threshold,
     )
     bot_validate_status = bot_validator.validate_bot()
 
     return bot_validate_status
 
+BATCH_OPERATIONS = {
+    'create': create_bot,
+    'import': import_bot,
+    'export': export_bot,
+    'validate': validate_bot,
+    'delete': delete_bot,
+    'gc': collect_old_bot_versions,
+}
+
+def run_fleet(operation, bot_names, max_workers=MAX_FLEET_WORKERS, **kwargs):
+    """ Runs an operation, e.g. export_bot, on several bots concurrently
+
+    A {bot_name} placeholder in bot_alias_name is replaced by each bot name.
+    Returns one result per bot, see LexFleetRunner.run.
+    """
+    targets = []
+    for bot_name in bot_names:
+        bot_kwargs = dict(kwargs, bot_name=bot_name)
+        if bot_kwargs.get('bot_alias_name'):
+            bot_kwargs['bot_alias_name'] = bot_kwargs['bot_alias_name'].replace('{bot_name}', bot_name)
+        targets.append(bot_kwargs)
+    fleet_results = LexFleetRunner(max_workers=max_workers).run(operation, targets)
+
+    return fleet_results
+
+def run_batch(manifest_path=None):
+    """ Runs the operations of a JSON/YAML manifest in one process, see lex_batch.py
+    """
+    batch_results = LexBatchRunner(BATCH_OPERATIONS).run_file(manifest_path)
+
+    return batch_results
+
+def write_run_report(report_path=None, emf_namespace=None):
+    """ Writes the run metrics as a JSON report and/or prints them as EMF lines
+    """
+    run_metrics = get_run_metrics()
+    if report_path:
+        run_metrics.write_report(report_path)
+    if emf_namespace:
+        run_metrics.print_emf(emf_namespace)
+
 def get_parsed_args():
     """ Parse arguments passed when running as a shell script
     """
@@ -127,7 +213,13 @@ def get_parsed_args():
         nargs='?',
         default=argparse.SUPPRESS,
         metavar='botname',
-        help='Import bot as LEXJSON files from Disk into account'
+        help='Import bot as LEXJSON files from Disk into account.'
+            ' Comma separated bot names are imported concurrently'
+    )
+    format_group.add_argument('-f', '--forceimport',
+        action='store_true',
+        default=argparse.SUPPRESS,
+        help='Import bot even if its definition is unchanged since the last import'
     )
     format_group.add_argument('-r', '--botrolename',
         nargs='?',
@@ -147,17 +239,53 @@ def get_parsed_args():
         metavar='deleteoldbotversion',
         help='Flag to delete old bot version. Defaults to true'
     )
+    format_group.add_argument('-g', '--gcbotversions',
+        nargs='?',
+        default=argparse.SUPPRESS,
+        metavar='botname',
+        help='Deletes old bot versions, keeping the latest ones and the versions used by an alias or the CloudFormation stack'
+    )
+    format_group.add_argument('-k', '--keepversions',
+        nargs='?',
+        type=int,
+        default=argparse.SUPPRESS,
+        metavar='keepversions',
+        help='Number of latest bot versions kept by --gcbotversions. Defaults to 10'
+    )
+    format_group.add_argument('-y', '--dryrun',
+        action='store_true',
+        default=argparse.SUPPRESS,
+        help='Only log the bot versions --gcbotversions would delete'
+    )
+    format_group.add_argument('-o', '--stackoutputs',
+        nargs='?',
+        default=argparse.SUPPRESS,
+        metavar='stackname',
+        help='Describes a CloudFormation stack and stores its outputs in the stack output cache'
+    )
+    format_group.add_argument('-z', '--invalidatestackoutputs',
+        action='store_true',
+        default=argparse.SUPPRESS,
+        help='Drops every cached CloudFormation stack output'
+    )
     format_group.add_argument('-a', '--botaliasname',
         nargs='?',
         default=argparse.SUPPRESS,
         metavar='botaliasname',
-        help='Import bot alias name to associate with new version. Defaults to DRAFT'
+        help='Import bot alias name to associate with new version. Defaults to DRAFT.'
+            ' {bot_name} is replaced by the bot name when importing several bots'
     )
     format_group.add_argument('-e', '--exportbot',
         nargs='?',
         default=argparse.SUPPRESS,
         metavar='botname',
-        help='Export bot as LEXJSON files from account to Disk'
+        help='Export bot as LEXJSON files from account to Disk.'
+            ' Comma separated bot names are exported concurrently'
+    )
+    format_group.add_argument('-x', '--incremental',
+        action='store_true',
+        default=argparse.SUPPRESS,
+        help='Export only the bot definition files whose content changed'
     )
     format_group.add_argument('-c', '--createbot',
         nargs='?',
@@ -194,6 +322,45 @@ def get_parsed_args():
         default=argparse.SUPPRESS,
         metavar='botname',
         help='Validates the bot passed as argument.'
+            ' Comma separated bot names are validated concurrently'
+    )
+    format_group.add_argument('-u', '--utterancecollisionerrors',
+        action='store_true',
+        default=argparse.SUPPRESS,
+        help='Fail validation when intents of a locale share a sample utterance'
+    )
+    format_group.add_argument('-m', '--nearduplicates',
+        nargs='?',
+        type=float,
+        const=0.8,
+        default=argparse.SUPPRESS,
+        metavar='threshold',
+        help='Report near duplicate sample utterances above a Jaccard threshold. Defaults to 0.8. Requires numpy'
+    )
+    format_group.add_argument('-j', '--workers',
+        type=int,
+        default=argparse.SUPPRESS,
+        metavar='workers',
+        help='Maximum number of bots processed at a time for comma separated bot names.'
+            ' Defaults to {}'.format(MAX_FLEET_WORKERS)
+    )
+    format_group.add_argument('-p', '--runreport',
+        default=argparse.SUPPRESS,
+        metavar='reportfile',
+        help='Writes phase timings, API call, retry and throttle counts and bytes transferred as JSON'
+    )
+    format_group.add_argument('-q', '--emf',
+        nargs='?',
+        const=EMF_NAMESPACE,
+        default=argparse.SUPPRESS,
+        metavar='namespace',
+        help='Prints the run metrics as CloudWatch embedded metric format lines. Defaults to {}'.format(EMF_NAMESPACE)
+    )
+    format_group.add_argument('-b', '--batch',
+        default=argparse.SUPPRESS,
+        metavar='manifestfile',
+        help='Runs the create/import/export/validate/delete/gc operations of a JSON or YAML manifest.'
+            ' YAML requires PyYAML'
     )
 
     args = parser.parse_args()
@@ -203,24 +370,52 @@ def get_parsed_args():
 
     return args
 
+def exit_on_fleet_failures(action, fleet_results):
+    failed_bots = [result['bot_name'] for result in fleet_results if result['status'] != 'succeeded']
+    if failed_bots:
+        logging.error('failed to {} bots {}'.format(action, ', '.join(failed_bots)));
+        sys.exit(1)
+
 def main(argv):
     """ Main function used when running as a shell script
     """
     parsed_args = get_parsed_args()
 
-    if 'importbot' in parsed_args:
+    if 'runreport' in parsed_args or 'emf' in parsed_args:
+        # also reported when an operation fails and exits
+        atexit.register(write_run_report, report_path=getattr(parsed_args, 'runreport', None), emf_namespace=getattr(parsed_args, 'emf', None))
+
+    if 'batch' in parsed_args:
+        try:
+            batch_results = run_batch(manifest_path=parsed_args.batch)
+        except Exception as e:
+            error = 'failed to run batch {}'.format(e)
+            logging.error(error);
+            sys.exit(1)
+        failed_steps = [result['id'] for result in batch_results if result['status'] != 'succeeded']
+        if failed_steps:
+            logging.error('batch steps did not succeed : {}'.format(', '.join(failed_steps)));
+            sys.exit(1)
+
+    max_workers = getattr(parsed_args, 'workers', MAX_FLEET_WORKERS)
+
+    if 'importbot' in parsed_args and ',' in (parsed_args.importbot or ''):
+        exit_on_fleet_failures('import', run_fleet(import_bot, parsed_args.importbot.split(','), max_workers=max_workers, ticket=parsed_args.ticket, environment=parsed_args.environment, bot_source_version=parsed_args.botsourceversion, bot_alias_name=parsed_args.botaliasname, force_import='forceimport' in parsed_args))
+    elif 'importbot' in parsed_args:
         try:
             # using the keyword import is problematic
             # turning to dict as workaround
-            import_bot(bot_name=parsed_args.importbot, ticket=parsed_args.ticket, environment=parsed_args.environment, bot_source_version=parsed_args.botsourceversion, bot_alias_name=parsed_args.botaliasname)
+            import_bot(bot_name=parsed_args.importbot, ticket=parsed_args.ticket, environment=parsed_args.environment, bot_source_version=parsed_args.botsourceversion, bot_alias_name=parsed_args.botaliasname, force_import='forceimport' in parsed_args)
         except Exception as e:
             error = 'failed to import bot {}'.format(e)
             logging.error(error);
             sys.exit(1)
 
-    if 'exportbot' in parsed_args:
+    if 'exportbot' in parsed_args and ',' in (parsed_args.exportbot or ''):
+        exit_on_fleet_failures('export', run_fleet(export_bot, parsed_args.exportbot.split(','), max_workers=max_workers, ticket=parsed_args.ticket, environment=parsed_args.environment, bot_version=parsed_args.botversion, incremental='incremental' in parsed_args))
+    elif 'exportbot' in parsed_args:
         try:
-            export_bot(bot_name=parsed_args.exportbot, ticket=parsed_args.ticket, environment=parsed_args.environment, bot_version=parsed_args.botversion)
+            export_bot(bot_name=parsed_args.exportbot, ticket=parsed_args.ticket, environment=parsed_args.environment, bot_version=parsed_args.botversion, incremental='incremental' in parsed_args)
         except Exception as e:
             error = 'failed to export bot {}'.format(e)
             logging.error(error);
@@ -242,14 +437,35 @@ def main(argv):
             logging.error(error);
             sys.exit(1)
 
-    if 'validatebot' in parsed_args:
+    if 'validatebot' in parsed_args and ',' in (parsed_args.validatebot or ''):
+        exit_on_fleet_failures('validate', run_fleet(validate_bot, parsed_args.validatebot.split(','), max_workers=max_workers, utterance_collisions_as_errors='utterancecollisionerrors' in parsed_args, near_duplicate_threshold=getattr(parsed_args, 'nearduplicates', None)))
+    elif 'validatebot' in parsed_args:
         try:
-            validate_bot(bot_name=parsed_args.validatebot)
+            validate_bot(bot_name=parsed_args.validatebot, utterance_collisions_as_errors='utterancecollisionerrors' in parsed_args, near_duplicate_threshold=getattr(parsed_args, 'nearduplicates', None))
         except Exception as e:
             error = 'failed to validate bot {}'.format(e)
             logging.error(error);
             sys.exit(1)
 
+    if 'invalidatestackoutputs' in parsed_args:
+        invalidate_stack_outputs()
+
+    if 'stackoutputs' in parsed_args:
+        try:
+            stack_outputs(stack_name=parsed_args.stackoutputs)
+        except Exception as e:
+            error = 'failed to describe stack outputs {}'.format(e)
+            logging.error(error);
+            sys.exit(1)
+
+    if 'gcbotversions' in parsed_args:
+        try:
+            collect_old_bot_versions(bot_name=parsed_args.gcbotversions, ticket=parsed_args.ticket, environment=parsed_args.environment, bot_alias_name=parsed_args.botaliasname, keep_last=getattr(parsed_args, 'keepversions', None), dry_run='dryrun' in parsed_args)
+        except Exception as e:
+            error = 'failed to collect old bot versions {}'.format(e)
+            logging.error(error);
+            sys.exit(1)
+
     if 'deleteoldbotversion' in parsed_args:
         try:
             delete_old_bot_version(bot_name=parsed_args.deleteoldbotversion, ticket=parsed_args.ticket, environment=parsed_args.environment, bot_alias_name=parsed_args.botaliasname)
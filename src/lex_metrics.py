@@ -0,0 +1,258 @@
+#!/usr/bin/env python
+
+##########################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+##########################################################################
+""" Run metrics of lex_manager.py operations
+
+Records how long each phase of an operation took (e.g. the archive, the
+upload, the import waiter, the locale builds, the version), the boto3 calls
+made with their retries and throttles, and the bytes uploaded and
+downloaded. The metrics are reported as a JSON run report and, optionally,
+as CloudWatch embedded metric format (EMF) lines, which CloudWatch Logs
+turns into metrics when printed by a CodeBuild run.
+"""
+import logging
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+
+logger = logging.getLogger('lex_utils_v2').getChild(__name__)
+
+EMF_NAMESPACE = os.environ.get('LEX_MGMT_EMF_NAMESPACE', 'LexManagementWorkflow')
+THROTTLING_ERROR_CODES = frozenset((
+    'Throttling',
+    'ThrottlingException',
+    'ThrottledException',
+    'RequestThrottledException',
+    'TooManyRequestsException',
+    'RequestLimitExceeded',
+    'LimitExceededException',
+    'SlowDown',
+))
+
+def _error_code(response, caught_exception):
+    if response is not None:
+        return response[1].get('Error', {}).get('Code')
+    error_response = getattr(caught_exception, 'response', None)
+    if error_response:
+        return error_response.get('Error', {}).get('Code')
+    return None
+
+class LexRunMetrics():
+    """Thread-safe metrics of one lex_manager.py run
+
+    Phases are timed with the phase() context manager, which can be used
+    in threads and coroutines alike. API calls are counted by botocore
+    event hooks registered with install() on every client of the client
+    registry.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = time.time()
+        self._phases = {}
+        self._bot_phases = {}
+        self._api_calls = {}
+        self._bytes = {'uploaded': 0, 'downloaded': 0}
+
+    def reset(self):
+        """ Drops every recorded metric, e.g. between benchmark scenarios
+        """
+        with self._lock:
+            self._started = time.time()
+            self._phases = {}
+            self._bot_phases = {}
+            self._api_calls = {}
+            self._bytes = {'uploaded': 0, 'downloaded': 0}
+
+    def record_phase(self, name, elapsed, bot_name=None):
+        with self._lock:
+            phase = self._phases.setdefault(name, {'count': 0, 'seconds': 0.0, 'max_seconds': 0.0})
+            phase['count'] = phase['count'] + 1
+            phase['seconds'] = phase['seconds'] + elapsed
+            phase['max_seconds'] = max(phase['max_seconds'], elapsed)
+            if bot_name:
+                bot_phases = self._bot_phases.setdefault(bot_name, {})
+                bot_phases[name] = bot_phases.get(name, 0.0) + elapsed
+
+    @contextlib.contextmanager
+    def phase(self, name, bot_name=None):
+        """ Times the enclosed block as phase name, e.g. import.upload
+
+        The time is recorded whether or not the block raises.
+
+        :param bot_name: bot the phase belongs to, reported separately
+        :type bot_name: str
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.record_phase(name, elapsed, bot_name)
+            logger.debug('Phase {} took {:.3f}s'.format(name, elapsed))
+
+    def add_bytes(self, direction, count):
+        """ Adds to the uploaded or downloaded byte count
+        """
+        with self._lock:
+            self._bytes[direction] = self._bytes[direction] + count
+
+    def _api_counters(self, service_name, operation_name):
+        return self._api_calls.setdefault(service_name, {}).setdefault(
+            operation_name, {'calls': 0, 'attempts': 0, 'throttles': 0, 'errors': 0}
+        )
+
+    def _before_call(self, model, **kwargs):
+        with self._lock:
+            self._api_counters(model.service_model.service_name, model.name)['calls'] += 1
+
+    def _needs_retry(self, operation, response=None, caught_exception=None, **kwargs):
+        # emitted after every HTTP attempt, including the last one
+        error_code = _error_code(response, caught_exception)
+        with self._lock:
+            api_counters = self._api_counters(operation.service_model.service_name, operation.name)
+            api_counters['attempts'] += 1
+            if error_code in THROTTLING_ERROR_CODES:
+                api_counters['throttles'] += 1
+
+    def _after_call(self, http_response, model, **kwargs):
+        if http_response.status_code >= 300:
+            with self._lock:
+                self._api_counters(model.service_model.service_name, model.name)['errors'] += 1
+
+    def _after_call_error(self, service_name, event_name, **kwargs):
+        # connection errors, after-call-error does not pass the operation model
+        with self._lock:
+            self._api_counters(service_name, event_name.rsplit('.', 1)[-1])['errors'] += 1
+
+    def install(self, client):
+        """ Registers the API call counting hooks on a boto3 client
+        """
+        service_name = client.meta.service_model.service_name
+        service_event_name = client.meta.service_model.service_id.hyphenize()
+        client.meta.events.register('before-call.' + service_event_name, self._before_call)
+        client.meta.events.register('needs-retry.' + service_event_name, self._needs_retry)
+        client.meta.events.register('after-call.' + service_event_name, self._after_call)
+        client.meta.events.register(
+            'after-call-error.' + service_event_name,
+            functools.partial(self._after_call_error, service_name)
+        )
+        return client
+
+    def report(self):
+        """ Returns the JSON serialisable run report
+
+        Retries are the HTTP attempts beyond the first one of each call.
+        """
+        with self._lock:
+            api_calls = {}
+            totals = {'calls': 0, 'retries': 0, 'throttles': 0, 'errors': 0}
+            for service_name, operations in sorted(self._api_calls.items()):
+                for operation_name, api_counters in sorted(operations.items()):
+                    operation_report = {
+                        'calls': api_counters['calls'],
+                        'retries': max(0, api_counters['attempts'] - api_counters['calls']),
+                        'throttles': api_counters['throttles'],
+                        'errors': api_counters['errors'],
+                    }
+                    api_calls.setdefault(service_name, {})[operation_name] = operation_report
+                    for key in totals:
+                        totals[key] = totals[key] + operation_report[key]
+            return {
+                'started': self._started,
+                'elapsed': round(time.time() - self._started, 3),
+                'phases': {
+                    name: dict(phase, seconds=round(phase['seconds'], 3), max_seconds=round(phase['max_seconds'], 3))
+                    for name, phase in sorted(self._phases.items())
+                },
+                'bots': {
+                    bot_name: {name: round(seconds, 3) for name, seconds in sorted(bot_phases.items())}
+                    for bot_name, bot_phases in sorted(self._bot_phases.items())
+                },
+                'api_calls': api_calls,
+                'api_totals': totals,
+                'bytes': dict(self._bytes),
+            }
+
+    def write_report(self, path):
+        with open(path, 'w', encoding='utf-8') as reportfile:
+            json.dump(self.report(), reportfile, indent=2, sort_keys=True)
+        logger.info('Wrote run report : ' + path)
+
+    def emf_lines(self, namespace=EMF_NAMESPACE):
+        """ Returns the run report as CloudWatch embedded metric format lines
+
+        One line per phase with the Phase dimension, one line per API
+        operation with the Service and Operation dimensions, and one line
+        for the run totals.
+        """
+        report = self.report()
+        timestamp = int(time.time() * 1000)
+
+        def emf_line(dimensions, metrics):
+            return json.dumps(dict(
+                dimensions,
+                _aws={
+                    'Timestamp': timestamp,
+                    'CloudWatchMetrics': [{
+                        'Namespace': namespace,
+                        'Dimensions': [sorted(dimensions)],
+                        'Metrics': [{'Name': name, 'Unit': unit} for name, (value, unit) in sorted(metrics.items())],
+                    }],
+                },
+                **{name: value for name, (value, unit) in metrics.items()}
+            ), sort_keys=True)
+
+        lines = []
+        for name, phase in report['phases'].items():
+            lines.append(emf_line({'Phase': name}, {
+                'PhaseDuration': (phase['seconds'], 'Seconds'),
+                'PhaseCount': (phase['count'], 'Count'),
+            }))
+        for service_name, operations in report['api_calls'].items():
+            for operation_name, operation_report in operations.items():
+                lines.append(emf_line({'Service': service_name, 'Operation': operation_name}, {
+                    'ApiCalls': (operation_report['calls'], 'Count'),
+                    'ApiRetries': (operation_report['retries'], 'Count'),
+                    'ApiThrottles': (operation_report['throttles'], 'Count'),
+                    'ApiErrors': (operation_report['errors'], 'Count'),
+                }))
+        lines.append(emf_line({'Run': 'lex_manager'}, {
+            'RunDuration': (report['elapsed'], 'Seconds'),
+            'ApiCalls': (report['api_totals']['calls'], 'Count'),
+            'ApiRetries': (report['api_totals']['retries'], 'Count'),
+            'ApiThrottles': (report['api_totals']['throttles'], 'Count'),
+            'BytesUploaded': (report['bytes']['uploaded'], 'Bytes'),
+            'BytesDownloaded': (report['bytes']['downloaded'], 'Bytes'),
+        }))
+        return lines
+
+    def print_emf(self, namespace=EMF_NAMESPACE):
+        for line in self.emf_lines(namespace):
+            print(line, flush=True)
+
+_run_metrics = LexRunMetrics()
+
+def get_run_metrics():
+    return _run_metrics
+
+def phase(name, bot_name=None):
+    return _run_metrics.phase(name, bot_name)
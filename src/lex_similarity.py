@@ -0,0 +1,236 @@
+#!/usr/bin/env python
+
+##########################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+##########################################################################
+""" Near-duplicate text detection with MinHash and locality-sensitive hashing
+
+Each text is reduced to a set of word shingles and to a MinHash signature
+of that set. Signatures are split in bands and only texts sharing a whole
+band with another text become candidate pairs, whose exact Jaccard
+similarity is then checked. This finds similar pairs without comparing
+every text with every other one.
+
+numpy is only imported when a signature is computed, so it is only
+needed when near-duplicate detection is enabled.
+"""
+import hashlib
+
+MERSENNE_PRIME = (1 << 31) - 1
+DEFAULT_NUM_PERM = 128
+SIGNATURE_CHUNK_SIZE = 65536
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError as e:
+        raise ImportError(
+            'near duplicate detection requires numpy, install it with: pip install numpy'
+        ) from e
+    return numpy
+
+def shingles(text, shingle_size=1):
+    """ Returns the set of word shingles of a normalised text
+
+    Texts with fewer words than shingle_size give a single shingle.
+    """
+    words = text.split()
+    if len(words) <= shingle_size:
+        return {' '.join(words)}
+    return {' '.join(words[index:index + shingle_size]) for index in range(len(words) - shingle_size + 1)}
+
+def _shingle_hash(shingle):
+    return int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=4).digest(), 'little')
+
+def optimal_bands(threshold, num_perm, false_negative_weight=0.9):
+    """ Returns the number of bands dividing num_perm that minimises the
+    weighted false positive and false negative candidate probabilities
+
+    False negatives weigh more by default: a missed pair is never reported,
+    while a false candidate only costs an exact Jaccard check.
+    """
+    def candidate_probability(similarity, bands, rows):
+        return 1 - (1 - similarity ** rows) ** bands
+
+    steps = 100
+    best_bands, best_error = 1, None
+    for bands in range(1, num_perm + 1):
+        if num_perm % bands:
+            continue
+        rows = num_perm // bands
+        false_positives = sum(
+            candidate_probability(threshold * step / steps, bands, rows) for step in range(steps)
+        ) * threshold / steps
+        false_negatives = sum(
+            1 - candidate_probability(threshold + (1 - threshold) * step / steps, bands, rows) for step in range(steps)
+        ) * (1 - threshold) / steps
+        error = (1 - false_negative_weight) * false_positives + false_negative_weight * false_negatives
+        if best_error is None or error < best_error:
+            best_bands, best_error = bands, error
+    return best_bands
+
+def jaccard(set_a, set_b):
+    if not set_a and not set_b:
+        return 1.0
+    return len(set_a & set_b) / len(set_a | set_b)
+
+class _DisjointSet():
+    def __init__(self, size):
+        self._parent = list(range(size))
+
+    def find(self, item):
+        root = item
+        while self._parent[root] != root:
+            root = self._parent[root]
+        while self._parent[item] != root:
+            self._parent[item], item = root, self._parent[item]
+        return root
+
+    def union(self, item_a, item_b):
+        root_a = self.find(item_a)
+        root_b = self.find(item_b)
+        if root_a != root_b:
+            self._parent[max(root_a, root_b)] = min(root_a, root_b)
+
+class LexMinHashIndex():
+    """Finds clusters of near-duplicate texts
+
+    :param threshold: minimum Jaccard similarity of the shingle sets of
+        two texts for them to be near duplicates
+    :type threshold: float
+
+    :param num_perm: number of hash permutations of a signature
+    :type num_perm: int
+
+    :param bands: number of LSH bands, must divide num_perm. More bands
+        find more candidates at lower similarities. Defaults to the split
+        best matching threshold.
+    :type bands: int
+
+    :param shingle_size: number of words per shingle
+    :type shingle_size: int
+
+    :param seed: seed of the hash permutations
+    :type seed: int
+    """
+    def __init__(self, threshold=0.8, num_perm=DEFAULT_NUM_PERM, bands=None, shingle_size=1, seed=1):
+        bands = bands or optimal_bands(threshold, num_perm)
+        if num_perm % bands:
+            raise ValueError('bands ({}) must divide num_perm ({})'.format(bands, num_perm))
+        self._threshold = threshold
+        self._num_perm = num_perm
+        self._bands = bands
+        self._shingle_size = shingle_size
+        self._seed = seed
+        self._texts = []
+        self._shingle_sets = []
+
+    @property
+    def threshold(self):
+        return self._threshold
+
+    def add(self, text):
+        """ Adds a normalised text and returns its position in the index
+        """
+        self._texts.append(text)
+        self._shingle_sets.append(shingles(text, self._shingle_size))
+        return len(self._texts) - 1
+
+    def _permuted_shingle_hashes(self, np, unique_shingles):
+        generator = np.random.default_rng(self._seed)
+        perm_a = generator.integers(1, MERSENNE_PRIME, size=self._num_perm, dtype=np.uint64)
+        perm_b = generator.integers(0, MERSENNE_PRIME, size=self._num_perm, dtype=np.uint64)
+        shingle_hashes = np.fromiter(
+            (_shingle_hash(shingle) for shingle in unique_shingles), dtype=np.uint64, count=len(unique_shingles)
+        ) % MERSENNE_PRIME
+        # One row per shingle; values are below 2**31 so they fit in uint32
+        permuted = np.empty((len(unique_shingles), self._num_perm), dtype=np.uint32)
+        for start in range(0, len(unique_shingles), SIGNATURE_CHUNK_SIZE):
+            end = start + SIGNATURE_CHUNK_SIZE
+            permuted[start:end] = (shingle_hashes[start:end, None] * perm_a + perm_b) % MERSENNE_PRIME
+        return permuted
+
+    def signatures(self):
+        """ Returns the (texts x num_perm) MinHash signature matrix
+
+        Each distinct shingle is hashed and permuted once. The signature of
+        a text is the minimum of the permuted hashes of its shingles.
+        """
+        np = _numpy()
+        shingle_ids = {}
+        columns = []
+        offsets = []
+        for shingle_set in self._shingle_sets:
+            offsets.append(len(columns))
+            for shingle in shingle_set:
+                columns.append(shingle_ids.setdefault(shingle, len(shingle_ids)))
+        permuted = self._permuted_shingle_hashes(np, list(shingle_ids))
+        columns = np.array(columns, dtype=np.int64)
+        offsets.append(len(columns))
+        offsets = np.array(offsets, dtype=np.int64)
+        signatures = np.empty((len(self._texts), self._num_perm), dtype=np.uint32)
+        text_chunk_size = max(1, SIGNATURE_CHUNK_SIZE // 16)
+        for start in range(0, len(self._texts), text_chunk_size):
+            end = min(start + text_chunk_size, len(self._texts))
+            chunk_columns = columns[offsets[start]:offsets[end]]
+            signatures[start:end] = np.minimum.reduceat(
+                permuted[chunk_columns], offsets[start:end] - offsets[start], axis=0
+            )
+        return signatures
+
+    def candidate_pairs(self):
+        """ Returns the pairs of texts sharing at least one signature band
+        """
+        np = _numpy()
+        signatures = self.signatures()
+        rows = self._num_perm // self._bands
+        band_weights = np.random.default_rng(self._seed + 1).integers(
+            1, 1 << 63, size=rows, dtype=np.uint64
+        )
+        pairs = set()
+        for band in range(self._bands):
+            # Each band is folded into one uint64 key, exact Jaccard checks
+            # later weed out the rare key collisions
+            band_keys = (signatures[:, band * rows:(band + 1) * rows] * band_weights).sum(axis=1, dtype=np.uint64)
+            order = np.argsort(band_keys, kind='stable')
+            boundaries = np.flatnonzero(np.diff(band_keys[order])) + 1
+            starts = np.concatenate(([0], boundaries))
+            ends = np.concatenate((boundaries, [len(order)]))
+            for bucket_index in np.flatnonzero(ends - starts > 1).tolist():
+                bucket = order[starts[bucket_index]:ends[bucket_index]].tolist()
+                for index, position_a in enumerate(bucket):
+                    for position_b in bucket[index + 1:]:
+                        pairs.add((position_a, position_b))
+        return pairs
+
+    def clusters(self):
+        """ Returns the clusters of near-duplicate texts as lists of positions
+
+        Candidate pairs are kept when their exact Jaccard similarity reaches
+        the threshold, and clusters are the connected components of the
+        kept pairs.
+        """
+        if len(self._texts) < 2:
+            return []
+        disjoint_set = _DisjointSet(len(self._texts))
+        for position_a, position_b in self.candidate_pairs():
+            if jaccard(self._shingle_sets[position_a], self._shingle_sets[position_b]) >= self._threshold:
+                disjoint_set.union(position_a, position_b)
+        components = {}
+        for position in range(len(self._texts)):
+            components.setdefault(disjoint_set.find(position), []).append(position)
+        return [component for component in components.values() if len(component) > 1]
@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+
+##########################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+##########################################################################
+""" Cached CloudFormation stack outputs
+
+Stack outputs are looked up once per process. Local runs can persist them
+with a time to live (LEX_MGMT_PERSIST_STACK_OUTPUTS=true) so that later
+runs on the same machine reuse them. The pipeline keeps them process-local,
+its CodeBuild containers do not share .lexcache between steps.
+"""
+import logging
+import os
+from botocore.exceptions import ClientError
+from lex_cache import LexResolutionCache, cache_path
+from lex_clients import get_client, get_client_registry
+
+logger = logging.getLogger('lex_utils_v2').getChild(__name__)
+
+STACK_OUTPUT_CACHE_TTL = int(os.environ.get('LEX_MGMT_STACK_OUTPUT_CACHE_TTL', '300'))
+PERSIST_STACK_OUTPUTS = os.environ.get('LEX_MGMT_PERSIST_STACK_OUTPUTS', 'false').lower() == 'true'
+BOT_ID_OUTPUT_KEY = 'BotId'
+BOT_VERSION_OUTPUT_SUFFIX = 'BotVersion'
+
+class LexStackOutputCache():
+    """Outputs of CloudFormation stacks, keyed by account, region and stack
+
+    Missing stacks are cached too, so a stack that does not exist is not
+    described again within the time to live.
+
+    :param path: JSON file to persist the outputs to. If empty, they only
+        live for the lifetime of the process.
+    :type path: str
+
+    :param ttl: seconds the outputs of a stack stay valid
+    :type ttl: int
+    """
+    def __init__(self, path=None, ttl=STACK_OUTPUT_CACHE_TTL):
+        self._cache = LexResolutionCache(path, ttl)
+
+    @staticmethod
+    def _key(scope, stack_name):
+        return LexResolutionCache.key(scope, 'stack', stack_name)
+
+    def outputs(self, cfn_client, stack_name, scope=''):
+        """ Returns {OutputKey: OutputValue} of a stack, None if it does not exist
+
+        :param scope: account and region of cfn_client, e.g. 123456789012|eu-west-2
+        :type scope: str
+        """
+        key = self._key(scope, stack_name)
+        entry = self._cache.get(key)
+        if entry is None:
+            try:
+                cfn_stack_response = cfn_client.describe_stacks(StackName=stack_name)
+            except ClientError as e:
+                if 'does not exist' not in e.response.get('Error', {}).get('Message', ''):
+                    raise
+                logger.info('CloudFormation stack {} does not exist'.format(stack_name))
+                entry = {'exists': False, 'outputs': {}}
+            else:
+                entry = {
+                    'exists': True,
+                    'outputs': {
+                        cfn_stack_output['OutputKey']: cfn_stack_output['OutputValue']
+                        for cfn_stack_output in cfn_stack_response['Stacks'][0].get('Outputs', [])
+                    }
+                }
+            self._cache.put(key, entry)
+        return entry['outputs'] if entry['exists'] else None
+
+    @staticmethod
+    def bot_versions(outputs, bot_id=None):
+        """ Returns the numbered bot versions of every *BotVersion output
+
+        Stacks with a BotId output for another bot are ignored.
+        """
+        if not outputs:
+            return set()
+        if bot_id and outputs.get(BOT_ID_OUTPUT_KEY) not in (None, bot_id):
+            return set()
+        return {
+            output_value for output_key, output_value in outputs.items()
+            if output_key.endswith(BOT_VERSION_OUTPUT_SUFFIX) and output_value.isdigit()
+        }
+
+    def protected_bot_versions(self, cfn_client, stack_names, bot_id=None, scope=''):
+        """ Returns the set of bot versions referenced by the outputs of stacks
+        """
+        protected = set()
+        for stack_name in stack_names:
+            protected.update(self.bot_versions(self.outputs(cfn_client, stack_name, scope), bot_id))
+        return protected
+
+    def refresh(self, cfn_client, stack_name, scope=''):
+        """ Describes a stack again, e.g. right after it was deployed
+        """
+        self._cache.invalidate(self._key(scope, stack_name))
+        return self.outputs(cfn_client, stack_name, scope)
+
+    def invalidate(self, scope=''):
+        """ Drops the cached outputs of every stack of a scope, or of all scopes
+        """
+        self._cache.invalidate(scope)
+
+_stack_output_cache = LexStackOutputCache(
+    cache_path('stack_outputs.json') if PERSIST_STACK_OUTPUTS else None
+)
+
+def get_stack_output_cache():
+    return _stack_output_cache
+
+def stack_scope(cfn_client, profile_name=''):
+    return LexResolutionCache.key(get_client_registry().account_id(profile_name), cfn_client.meta.region_name)
+
+def refresh_stack_outputs(stack_name, profile_name=''):
+    """ Describes a stack and stores its outputs in the stack output cache
+    """
+    cfn_client = get_client('cloudformation', profile_name=profile_name)
+    return _stack_output_cache.refresh(cfn_client, stack_name, stack_scope(cfn_client, profile_name))
+
+def invalidate_stack_outputs():
+    _stack_output_cache.invalidate()
@@ -20,48 +20,45 @@
 """ Lex Model Building Service Helper Classes
 """
 # TODO need to DRY codebase
+import asyncio
 import logging
 import json
-import copy
-import time
-import requests
+import concurrent.futures
 import zipfile
 import os
 import glob
+import hashlib
+import shutil
+import tempfile
 import traceback
-import boto3
-from collections import Counter
+from botocore.exceptions import ClientError
+from lex_archive import get_archive_builder
+from lex_cache import JsonFileStore, LexResolutionCache, cache_path, get_resolution_cache
+from lex_clients import get_client, get_client_registry, get_http_session
+from lex_concurrency import TokenBucket, run_blocking, run_sync
+from lex_digest import bot_tree_digest, combine_digests, file_digests
+from lex_metrics import get_run_metrics, phase
+from lex_listing import list_bots, list_bot_aliases, list_bot_locales, list_bot_versions
+from lex_stacks import get_stack_output_cache
+from lex_validation import SEVERITY_ERROR, SEVERITY_WARNING, LexBotValidationEngine, LexValidationCache, find_duplicates
+from lex_waiters import get_wait_history, get_waiter
 
 DEFAULT_LOGGING_LEVEL = logging.WARNING
 logging.basicConfig(format='[%(levelname)s] %(message)s', level=DEFAULT_LOGGING_LEVEL)
 logger = logging.getLogger(__name__)
 lex_root_dir = "lex_bots"
+DEFAULT_LOCALE_ID = "en_GB"
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+EXPORT_SPOOL_MAX_SIZE = 64 * 1024 * 1024
+BOT_VERSION_LIMIT = 25
+DEFAULT_RETAIN_BOT_VERSIONS = int(os.environ.get('LEX_MGMT_RETAIN_BOT_VERSIONS', '10'))
+MAX_DELETE_WORKERS = 4
+DELETE_BOT_VERSION_RATE = float(os.environ.get('LEX_MGMT_DELETE_BOT_VERSION_RATE', '2'))
 
 class LexClient():
     def __init__(self, profile_name=''):
         self._profile_name = profile_name
-
-        if self._profile_name:
-            try:
-                self._lex_client = (
-                    boto3.session
-                    .Session(profile_name=self._profile_name).client('lexv2-models')
-                )
-            except Exception as e:
-                logger.warning(
-                    'Failed to create lexv2 boto3 client using profile: {}'.format(
-                        profile_name
-                    )
-                )
-                logger.warning(e)
-                raise
-        else:
-            try:
-                self._lex_client = boto3.client('lexv2-models')
-            except Exception as e:
-                logger.warning('Failed to lexv2 create boto3 client')
-                logger.warning(e)
-                raise
+        self._lex_client = get_client('lexv2-models', profile_name=profile_name)
 
     @property
     def client(self):
@@ -70,28 +67,7 @@ class LexClient():
 class IAMClient():
     def __init__(self, profile_name=''):
         self._profile_name = profile_name
-
-        if self._profile_name:
-            try:
-                self._iam_client = (
-                    boto3.session
-                    .Session(profile_name=self._profile_name).client('iam')
-                )
-            except Exception as e:
-                logger.warning(
-                    'Failed to create iam boto3 client using profile: {}'.format(
-                        profile_name
-                    )
-                )
-                logger.warning(e)
-                raise
-        else:
-            try:
-                self._iam_client = boto3.client('iam')
-            except Exception as e:
-                logger.warning(e)
-                logger.warning('Failed to iam create boto3 client')
-                raise
+        self._iam_client = get_client('iam', profile_name=profile_name)
 
     @property
     def client(self):
@@ -100,28 +76,7 @@ class IAMClient():
 class CFNClient():
     def __init__(self, profile_name=''):
         self._profile_name = profile_name
-
-        if self._profile_name:
-            try:
-                self._cfn_client = (
-                    boto3.session
-                    .Session(profile_name=self._profile_name).client('cloudformation')
-                )
-            except Exception as e:
-                logger.warning(
-                    'Failed to create cloudformation boto3 client using profile: {}'.format(
-                        profile_name
-                    )
-                )
-                logger.warning(e)
-                raise
-        else:
-            try:
-                self._cfn_client = boto3.client('cloudformation')
-            except Exception as e:
-                logger.warning('Failed to cloudformation create boto3 client')
-                logger.warning(e)
-                raise
+        self._cfn_client = get_client('cloudformation', profile_name=profile_name)
 
     @property
     def client(self):
@@ -147,6 +102,10 @@ class LexBotExporter():
     :param profile_name: AWS cli/SDK profile credentials to use.
         If empty, the standard credential resolver will be used.
     :type profile_name: str
+
+    :param incremental: only rewrite the files of the bot definition whose
+        content changed, instead of replacing the whole directory
+    :type incremental: bool
     """
     def __init__(
             self,
@@ -156,13 +115,16 @@ class LexBotExporter():
             bot_version='DRAFT',
             lambda_arn=None,
             profile_name='',
-            logging_level=DEFAULT_LOGGING_LEVEL
+            logging_level=DEFAULT_LOGGING_LEVEL,
+            incremental=False
         ):
         self._bot_name = bot_name
         self._ticket = ticket
         self._environment = environment
         self._bot_version = bot_version
         self._lambda_arn = lambda_arn
+        self._incremental = incremental
+        self._export_changes = None
 
         self._get_bot_response = {}
         self._get_bot_alias_response = {}
@@ -174,6 +136,7 @@ class LexBotExporter():
         get_lex_bot = LexBotGetter(bot_name=bot_name,ticket=ticket,environment=environment,profile_name=profile_name)
         self._bot_id, self._bot_latest_version = get_lex_bot.bot_id_version
         self._current_bot_name = get_lex_bot.current_bot_name
+        self._lex_bot_getter = get_lex_bot
         #os.chdir('../')
 
     @property
@@ -192,6 +155,23 @@ class LexBotExporter():
     def bot_version(self):
         return self._bot_version
 
+    @staticmethod
+    def normalise_json(jsonbytes, filename, bot_name):
+        """ Returns the indented, key sorted form of an exported JSON file
+
+        Bot.json gets its name replaced by the bot name without the
+        environment/ticket prefix. Content that is not valid JSON is
+        returned unchanged.
+        """
+        try:
+            jsondata = json.loads(jsonbytes)
+        except ValueError as e:
+            logger.warning('Error parsing JSON file {} : {}'.format(filename, e))
+            return jsonbytes
+        if filename == "Bot.json":
+            jsondata['name'] = bot_name
+        return json.dumps(jsondata, indent=4, sort_keys=True).encode('utf-8')
+
     @staticmethod
     def indent_json_files(dir, bot_name):
         for root, dirs, files in os.walk(dir):
@@ -199,16 +179,9 @@ class LexBotExporter():
                 if file.endswith('.json'):
                     filepath = os.path.join(root, file)
                     logger.info('Formatting JSON file : ' + filepath)
-                    with open(filepath, 'r', encoding='utf-8') as jsonfile:
-                        try:
-                            jsondata = json.load(jsonfile)
-                        except valueError as e:
-                            logger.warning('Error parsing JSON file.')
-                            continue
-                        if file == "Bot.json":
-                            jsondata['name'] = bot_name
-                        indented_jsondata = json.dumps(jsondata, indent=4, sort_keys=True)
-                    with open(filepath, 'w', encoding='utf-8') as jsonfile:
+                    with open(filepath, 'rb') as jsonfile:
+                        indented_jsondata = LexBotExporter.normalise_json(jsonfile.read(), file, bot_name)
+                    with open(filepath, 'wb') as jsonfile:
                         jsonfile.write(indented_jsondata)
 
     @staticmethod
@@ -225,49 +198,233 @@ class LexBotExporter():
         os.rmdir(dir)
 
 
-    def _export_bot_zip(self):
+    def _bot_zip_members(self, bot_zip):
+        """ Yields (relative path, member) for every file of the exported bot
+
+        Paths of the bot definition are relative to the bot directory and
+        are None for files outside of it (i.e. Manifest.json).
+        """
+        bot_prefix = self._current_bot_name + '/'
+        for member in bot_zip.infolist():
+            if member.is_dir():
+                continue
+            membername = member.filename.replace('\\', '/')
+            if membername.startswith('/') or '..' in membername.split('/'):
+                raise Exception('Unsafe path in exported bot zip : ' + member.filename)
+            if membername.startswith(bot_prefix):
+                yield membername[len(bot_prefix):], member
+            else:
+                yield None, member
+
+    def _extract_bot_zip(self, bot_zip_buffer):
+        """ Extracts the exported bot into lex_bots/<bot name>
+
+        JSON files are normalised while they are extracted into a staging
+        directory, which then replaces the previous bot definition in a
+        single rename. The staging directory is created next to lex_bots,
+        on the same file system but outside of it, so an interrupted export
+        never leaves it where the pipeline artifacts and commits would pick
+        it up.
+        """
+        bot_dir = os.path.join(lex_root_dir, self._bot_name)
+        os.makedirs(lex_root_dir, exist_ok=True)
+        self._remove_stale_staging_dirs()
+        staging_dir = tempfile.mkdtemp(prefix=self._staging_prefix(), dir=self._staging_root())
+        try:
+            with zipfile.ZipFile(bot_zip_buffer, 'r') as bot_zip:
+                for relpath, member in self._bot_zip_members(bot_zip):
+                    if relpath is None:
+                        logger.info('Extracting file : ' + member.filename)
+                        bot_zip.extract(member, lex_root_dir)
+                        continue
+                    filepath = os.path.join(staging_dir, relpath)
+                    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+                    with bot_zip.open(member) as memberfile:
+                        if relpath.endswith('.json'):
+                            logger.info('Extracting and formatting JSON file : ' + relpath)
+                            with open(filepath, 'wb') as jsonfile:
+                                jsonfile.write(self.normalise_json(memberfile.read(), os.path.basename(relpath), self._bot_name))
+                        else:
+                            with open(filepath, 'wb') as botfile:
+                                shutil.copyfileobj(memberfile, botfile)
+            self._replace_bot_defn(staging_dir, bot_dir)
+        except Exception:
+            if os.path.exists(staging_dir):
+                shutil.rmtree(staging_dir)
+            raise
+
+    @staticmethod
+    def _staging_root():
+        return os.path.dirname(os.path.abspath(lex_root_dir))
+
+    def _staging_prefix(self):
+        # bot names cannot contain dots, so the prefix only matches this bot
+        return '.'+os.path.basename(lex_root_dir)+'.'+self._bot_name+'.'
+
+    def _remove_stale_staging_dirs(self):
+        """ Removes the staging directories of this bot left by interrupted exports
+
+        Also removes the .<bot name>-* directories earlier versions staged
+        inside lex_bots.
+        """
+        stale_dirs = glob.glob(os.path.join(self._staging_root(), glob.escape(self._staging_prefix())+'*'))
+        stale_dirs.extend(glob.glob(os.path.join(lex_root_dir, '.'+glob.escape(self._bot_name)+'-*')))
+        for stale_dir in stale_dirs:
+            if os.path.isdir(stale_dir):
+                logger.info('Removing stale staging dir : ' + stale_dir)
+                shutil.rmtree(stale_dir, ignore_errors=True)
+
+    @staticmethod
+    def _write_if_changed(filepath, content):
+        """ Writes content to filepath unless the file already holds it
+
+        :returns: added, modified or None when the file was unchanged
+        :rtype: str
+        """
+        change = 'added'
+        if os.path.exists(filepath):
+            with open(filepath, 'rb') as existingfile:
+                existing_digest = hashlib.sha256(existingfile.read()).digest()
+            if existing_digest == hashlib.sha256(content).digest():
+                return None
+            change = 'modified'
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(filepath), prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as botfile:
+                botfile.write(content)
+            os.replace(tmp_path, filepath)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return change
+
+    def _sync_bot_zip(self, bot_zip_buffer):
+        """ Updates lex_bots/<bot name> in place from the exported bot
+
+        Only files whose normalised content differs from the file on disk
+        are written, and only files missing from the export are deleted,
+        so unchanged files keep their modification time.
+
+        :returns: lists of added, modified and removed paths relative to
+            lex_bots, and the number of unchanged files
+        :rtype: dict
+        """
+        bot_dir = os.path.join(lex_root_dir, self._bot_name)
+        changes = {'added': [], 'modified': [], 'removed': [], 'unchanged': 0}
+        exported_relpaths = set()
+        with zipfile.ZipFile(bot_zip_buffer, 'r') as bot_zip:
+            for relpath, member in self._bot_zip_members(bot_zip):
+                with bot_zip.open(member) as memberfile:
+                    content = memberfile.read()
+                if relpath is None:
+                    filepath = os.path.join(lex_root_dir, member.filename)
+                    displaypath = member.filename
+                else:
+                    exported_relpaths.add(os.path.normpath(relpath))
+                    filepath = os.path.join(bot_dir, relpath)
+                    displaypath = os.path.join(self._bot_name, relpath)
+                    if relpath.endswith('.json'):
+                        content = self.normalise_json(content, os.path.basename(relpath), self._bot_name)
+                change = self._write_if_changed(filepath, content)
+                if change is None:
+                    changes['unchanged'] = changes['unchanged'] + 1
+                else:
+                    logger.info('Export {} file : {}'.format(change, displaypath))
+                    changes[change].append(displaypath)
+        for root, dirs, files in os.walk(bot_dir, topdown=False):
+            for filename in files:
+                filepath = os.path.join(root, filename)
+                if os.path.relpath(filepath, bot_dir) not in exported_relpaths:
+                    logger.info('Removing file : ' + filepath)
+                    os.remove(filepath)
+                    changes['removed'].append(os.path.relpath(filepath, lex_root_dir))
+            if root != bot_dir and not os.listdir(root):
+                logger.info('Removing dir : ' + root)
+                os.rmdir(root)
+        logger.info('Incremental export of {} : {} added, {} modified, {} removed, {} unchanged'.format(
+            self._bot_name,
+            len(changes['added']),
+            len(changes['modified']),
+            len(changes['removed']),
+            changes['unchanged']
+        ))
+        return changes
+
+    @staticmethod
+    def _replace_bot_defn(staging_dir, bot_dir):
+        """ Moves the staged bot definition into place
+
+        The staged directory is renamed into place, or copied when lex_bots
+        is on another file system (e.g. a mount of its own).
+        """
+        if not os.path.exists(bot_dir):
+            shutil.move(staging_dir, bot_dir)
+            return
+        old_bot_dir = staging_dir + '-old'
+        shutil.move(bot_dir, old_bot_dir)
+        try:
+            shutil.move(staging_dir, bot_dir)
+        except OSError:
+            shutil.move(old_bot_dir, bot_dir)
+            raise
+        shutil.rmtree(old_bot_dir)
+
+    def _download_bot_zip(self, download_url):
+        with get_http_session().get(download_url, stream=True, timeout=300) as bot_download_response:
+            if bot_download_response.status_code == 200:
+                with tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_MAX_SIZE) as bot_zip_buffer:
+                    for chunk in bot_download_response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                        bot_zip_buffer.write(chunk)
+                    get_run_metrics().add_bytes('downloaded', bot_zip_buffer.tell())
+                    bot_zip_buffer.seek(0)
+                    if self._incremental:
+                        self._export_changes = self._sync_bot_zip(bot_zip_buffer)
+                    else:
+                        self._extract_bot_zip(bot_zip_buffer)
+            else:
+                logger.warning('Failed to download exported bot. HTTP status {}'.format(
+                    bot_download_response.status_code
+                ))
+
+    async def _export_bot_zip_async(self):
         try:
             #bot_id = self._get_bot_id()
             logger.info('Retrieved Lex bot id : ' + self._bot_id)
-            create_export_bot_response = self._lex_client.create_export(
-                resourceSpecification={
-                    'botExportSpecification': {
-                        'botId': self._bot_id,
-                        'botVersion': self._bot_version
-                    }
-                },
-                fileFormat='LexJson'
-            )
+            with phase('export.start', self._current_bot_name):
+                create_export_bot_response = await run_blocking(
+                    self._lex_bot_getter.resolve_on_stale,
+                    lambda bot_id: self._lex_client.create_export(
+                        resourceSpecification={
+                            'botExportSpecification': {
+                                'botId': bot_id,
+                                'botVersion': self._bot_version
+                            }
+                        },
+                        fileFormat='LexJson'
+                    )
+                )
+            self._bot_id, self._bot_latest_version = self._lex_bot_getter.bot_id_version
             export_id = create_export_bot_response['exportId']
             logger.info('Waiting on bot export : ' + export_id)
-            bot_export_waiter = self._lex_client.get_waiter('bot_export_completed')
-            bot_export_waiter.wait(
-                exportId=export_id,
-                WaiterConfig={
-                    'Delay': 20,
-                    'MaxAttempts': 15
-                }
-            )
+            bot_export_waiter = get_waiter(self._lex_client, 'bot_export_completed')
+            with phase('export.wait', self._current_bot_name):
+                await bot_export_waiter.wait_async(
+                    history_key=self._current_bot_name,
+                    exportId=export_id
+                )
             logger.info('Completed bot export : ' + export_id)
-            describe_export_bot_response = self._lex_client.describe_export(
-                exportId=export_id
-            )
-            self._get_bot_response = describe_export_bot_response['exportStatus']
-            download_url = describe_export_bot_response['downloadUrl']
-            bot_download_response = requests.get(download_url,timeout=300)
-            if bot_download_response.status_code == 200:
-                if ((lex_root_dir == 'lex_bots') and os.path.exists(lex_root_dir+'/'+self._bot_name)):
-                    self.remove_existing_bot_defn(lex_root_dir+'/'+self._bot_name)
-                with open(self._bot_name+'.zip', 'wb') as f:
-                    f.write(bot_download_response.content)
-                with zipfile.ZipFile(self._bot_name+'.zip',"r") as zip_ref:
-                    zip_ref.extractall(lex_root_dir)
-                os.rename(lex_root_dir+'/'+self._current_bot_name,lex_root_dir+'/'+self._bot_name)
-                self.indent_json_files(lex_root_dir+'/'+self._bot_name,self._bot_name)
-                if os.path.exists(self._bot_name+'.zip'):
-                    os.remove(self._bot_name+'.zip')
+            with phase('export.download', self._current_bot_name):
+                describe_export_bot_response = await run_blocking(
+                    self._lex_client.describe_export,
+                    exportId=export_id
+                )
+                self._get_bot_response = describe_export_bot_response['exportStatus']
+                await run_blocking(self._download_bot_zip, describe_export_bot_response['downloadUrl'])
             logger.info('Downloaded exported bot : ' + export_id)
-            delete_export_bot_response = self._lex_client.delete_export(
+            delete_export_bot_response = await run_blocking(
+                self._lex_client.delete_export,
                 exportId=export_id
             )
 
@@ -278,27 +435,39 @@ class LexBotExporter():
 
         return self._get_bot_response
 
-    def export_bot(self):
-        """ Performs a Lex get_bot API call
+    async def export_bot_async(self):
+        """ Exports the bot definition to lex_bots/<bot name>
 
-        :returns: the response of Lex get_bot with immutable/unneeded fields
-            filtered out so that it can be fed to create/update calls
-            returned object contains the exported resources in this structure:
-            {bot:  {}, intents: [], slot-types: []}
-        :rtype: dict
+        Waits on the export with asyncio, see export_bot.
         """
 
         logger.info('exporting bot {}'.format(self._current_bot_name))
-        self._get_bot = self._export_bot_zip()
+        self._get_bot = await self._export_bot_zip_async()
         """self._get_bot = self._export_bot()
         self._bot_intents = self._export_bot_intents()
         self._slot_types = self._export_bot_slot_types()"""
         logger.info('successfully exported bot definition')
 
+        if self._incremental:
+            return dict(
+                bot=self._get_bot,
+                changes=self._export_changes
+            )
         return dict(
             bot=self._get_bot
         )
 
+    def export_bot(self):
+        """ Performs a Lex get_bot API call
+
+        :returns: the response of Lex get_bot with immutable/unneeded fields
+            filtered out so that it can be fed to create/update calls
+            returned object contains the exported resources in this structure:
+            {bot:  {}, intents: [], slot-types: []}
+        :rtype: dict
+        """
+        return run_sync(self.export_bot_async())
+
 class LexBotImporter():
     def __init__(
             self,
@@ -311,6 +480,7 @@ class LexBotImporter():
             delete_old_version_flag,
             profile_name='',
             logging_level=DEFAULT_LOGGING_LEVEL,
+            force_import=False,
         ):
         self._bot_name = bot_name
         self._ticket = ticket
@@ -319,6 +489,10 @@ class LexBotImporter():
         self._bot_source_version = bot_source_version
         self._bot_alias_name = bot_alias_name
         self._delete_old_version_flag = delete_old_version_flag
+        self._profile_name = profile_name
+        self._force_import = force_import
+        self._bot_locale_ids = [DEFAULT_LOCALE_ID]
+        self._locale_build_report = {}
 
         logger.setLevel(logging_level)
         logging.getLogger('botocore').setLevel(logging_level)
@@ -331,9 +505,11 @@ class LexBotImporter():
         get_lex_bot = LexBotGetter(bot_name=bot_name,ticket=ticket,environment=environment,bot_alias_name=environment+"-"+bot_alias_name,profile_name=profile_name)
         self._bot_id, self._bot_latest_version = get_lex_bot.bot_id_version
         self._current_bot_name = get_lex_bot.current_bot_name
+        self._lex_bot_getter = get_lex_bot
         self._bot_alias_id = ''
         if (bot_alias_name != '' and bot_alias_name != None):
             self._bot_alias_id = get_lex_bot.bot_alias_id
+        self._deployment_state = LexBotDeploymentState(self._lex_client, get_lex_bot)
         #os.chdir('../')
 
     @property
@@ -368,115 +544,320 @@ class LexBotImporter():
     #    bot_role = self._iam_client.get_role(RoleName=self._bot_role_name)
     #    return bot_role['Role']['Arn']
 
-    def _import_bot_zip(self):
-        try:
-            #bot_role_arn = self._get_role_arn()
-            logger.info("Retrieved Bot role ARN from Role name.")
-            bot_prefix_name=self._ticket+"-"+self._environment
-            if (self._ticket == ""):
-                bot_prefix_name=self._environment
-            root_dir = lex_root_dir+'/'
-            with zipfile.ZipFile(self._current_bot_name+'.zip', 'w', zipfile.ZIP_DEFLATED) as botzipfile:
-                for root, dirs, files in os.walk(root_dir+self._bot_name+'/'):
-                    for file in files:
-                        if file == "Bot.json":
-                            with open(os.path.join(root, file),'r',encoding='utf-8') as botjsonfile:
-                                botdefndata = botjsonfile.read()
-                            jsonbotdefndata = json.loads(botdefndata)
-                            jsonbotdefndata['name'] = self._current_bot_name
-                            with open(os.path.join(root, file),'w',encoding='utf-8') as botjsonfile:
-                                botjsonfile.write(json.dumps(jsonbotdefndata, sort_keys=True))
-                        botzipfile.write(os.path.join(root, file),bot_prefix_name+"-"+os.path.join(root, file).split(root_dir,1)[1])
-                botzipfile.write(root_dir+'Manifest.json', os.path.basename('Manifest.json'))
-            logger.info("Created zip of Bot to import.")
-            create_upload_url_response = self._lex_client.create_upload_url()
-            with open(self._current_bot_name+'.zip','rb') as botzipfile:
-                try:
-                    upload_response = requests.put(create_upload_url_response['uploadUrl'], data=botzipfile, timeout=300)
-                    upload_response.raise_for_status()
-                except Exception as err:
-                    logger.error(err)
-            describe_bot_response = self._lex_client.describe_bot(
-                botId=self._bot_id
+    @staticmethod
+    def discover_bot_locales(bot_dir):
+        """ Returns the locale ids of the bot definition in bot_dir
+
+        Locales are the directories under BotLocales. Bots without any
+        locale directory default to en_GB.
+        """
+        bot_locales_dir = os.path.join(bot_dir, 'BotLocales')
+        if not os.path.isdir(bot_locales_dir):
+            return [DEFAULT_LOCALE_ID]
+        bot_locale_ids = sorted(
+            locale_id for locale_id in os.listdir(bot_locales_dir)
+            if os.path.isdir(os.path.join(bot_locales_dir, locale_id))
+        )
+        return bot_locale_ids or [DEFAULT_LOCALE_ID]
+
+    async def _build_bot_locale_async(self, locale_id):
+        bot_build_waiter = get_waiter(self._lex_client, 'bot_locale_built')
+        await bot_build_waiter.wait_async(
+            history_key=self._current_bot_name+'/'+locale_id,
+            botId=self._bot_id,
+            botVersion=self._bot_source_version,
+            localeId=locale_id
+        )
+        logger.info("Completed Bot build for locale "+locale_id+" in {:.1f}s".format(bot_build_waiter.last_duration))
+        return bot_build_waiter.last_duration
+
+    async def _build_bot_locales_async(self, locale_ids):
+        """ Builds every locale concurrently
+
+        All builds are started before waiting on any of them, so the total
+        build time is the one of the slowest locale.
+        """
+        for locale_id in locale_ids:
+            build_bot_response = await run_blocking(
+                self._lex_client.build_bot_locale,
+                botId=self._bot_id,
+                botVersion=self._bot_source_version,
+                localeId=locale_id
+            )
+        logger.info("Initiated Bot build for locales "+", ".join(locale_ids)+". Waiting for Bot builds to complete.")
+        build_results = await asyncio.gather(
+            *[self._build_bot_locale_async(locale_id) for locale_id in locale_ids],
+            return_exceptions=True
+        )
+        build_errors = []
+        for locale_id, build_result in zip(locale_ids, build_results):
+            if isinstance(build_result, Exception):
+                logger.warning("Bot build failed for locale "+locale_id)
+                build_errors.append(build_result)
+        if build_errors:
+            raise build_errors[0]
+        logger.info("Completed Bot build.")
+
+    def _plan_import(self, bot_settings_digest, bot_locale_digests):
+        """ Returns (locales to import, locales to build) of this import
+
+        The whole bot is imported, and every locale built, when forced, when
+        no import was recorded, when the bot settings (files outside of
+        BotLocales) or the set of locales changed, or when the DRAFT was
+        updated since the recorded import. Locales to import is then None.
+
+        Otherwise only the locales whose content digest changed are
+        imported, one by one with a locale import that leaves the other
+        locales Built. Locales that are imported, or that Lex does not
+        report as Built, are built. The plan and the estimated build time
+        saved are kept in the locale build report.
+        """
+        imported_bot_locale_ids = None
+        built_bot_locale_ids = list(self._bot_locale_ids)
+        if not self._force_import:
+            deployment_state = self._deployment_state.load()
+            recorded_bot_locale_ids = sorted(
+                key[len(LexBotDeploymentState.LOCALE_DIGEST_TAG_PREFIX):]
+                for key in deployment_state if key.startswith(LexBotDeploymentState.LOCALE_DIGEST_TAG_PREFIX)
+            )
+            if deployment_state.get(LexBotDeploymentState.BOT_DIGEST_TAG) != bot_settings_digest:
+                logger.info("Bot settings changed since the last import. Importing the whole Bot.")
+            elif recorded_bot_locale_ids != sorted(self._bot_locale_ids):
+                logger.info("Bot locales added or removed since the last import. Importing the whole Bot.")
+            elif self._deployment_state.draft_updated_since_save():
+                logger.info("Bot DRAFT was updated since the last import. Importing the whole Bot.")
+            else:
+                bot_locale_statuses = self._lex_bot_getter.resolve_on_stale(
+                    lambda bot_id: {
+                        bot_locale['localeId']: bot_locale.get('botLocaleStatus')
+                        for bot_locale in list_bot_locales(self._lex_client, bot_id, self._bot_source_version)
+                    }
+                )
+                imported_bot_locale_ids = [
+                    locale_id for locale_id in self._bot_locale_ids
+                    if deployment_state.get(LexBotDeploymentState.LOCALE_DIGEST_TAG_PREFIX+locale_id) != bot_locale_digests[locale_id]
+                ]
+                built_bot_locale_ids = [
+                    locale_id for locale_id in self._bot_locale_ids
+                    if locale_id in imported_bot_locale_ids or bot_locale_statuses.get(locale_id) != 'Built'
+                ]
+        # the deployment state calls re-resolve the bot when its cached id is stale
+        self._bot_id, self._bot_latest_version = self._lex_bot_getter.bot_id_version
+        skipped_bot_locale_ids = [locale_id for locale_id in self._bot_locale_ids if locale_id not in built_bot_locale_ids]
+        wait_history = get_wait_history()
+        expected_build_durations = {
+            locale_id: wait_history.expected_duration('bot_locale_built', self._current_bot_name+'/'+locale_id) or 0
+            for locale_id in self._bot_locale_ids
+        }
+        estimated_seconds_saved = (
+            max([0] + list(expected_build_durations.values()))
+            - max([0] + [expected_build_durations[locale_id] for locale_id in built_bot_locale_ids])
+        )
+        self._locale_build_report = {
+            'imported': list(self._bot_locale_ids) if imported_bot_locale_ids is None else imported_bot_locale_ids,
+            'built': built_bot_locale_ids,
+            'skipped': skipped_bot_locale_ids,
+            'estimated_seconds_saved': round(estimated_seconds_saved, 1)
+        }
+        if imported_bot_locale_ids is not None:
+            logger.info("Importing only changed Bot locales "+(", ".join(imported_bot_locale_ids) or "(none)"))
+        if skipped_bot_locale_ids:
+            logger.info("Skipping build of unchanged Bot locales "+", ".join(skipped_bot_locale_ids)
+                +". Estimated time saved {:.1f}s".format(estimated_seconds_saved))
+        return imported_bot_locale_ids, built_bot_locale_ids
+
+    def _bot_alias_locale_settings(self, bot_alias_locale_settings):
+        """ Returns the alias locale settings with every built locale enabled
+        """
+        bot_alias_locale_settings = dict(bot_alias_locale_settings or {})
+        for locale_id in self._bot_locale_ids:
+            bot_alias_locale_settings.setdefault(locale_id, {'enabled': True})
+        return bot_alias_locale_settings
+
+    def _associate_bot_alias(self, bot_version):
+        if (self._bot_alias_name != '' and self._bot_alias_name != None and self._bot_alias_id != ''):
+            logger.info("Initiated association new Bot version "+bot_version+ " to alias "+self._environment+"-"+self._bot_alias_name)
+            describe_bot_alias_response = self._lex_bot_getter.resolve_on_stale(
+                lambda bot_id: self._lex_client.describe_bot_alias(
+                    botAliasId=self._lex_bot_getter.bot_alias_id,
+                    botId=bot_id
+                )
+            )
+            if describe_bot_alias_response.get('botVersion') == bot_version:
+                logger.info("Bot alias "+self._environment+"-"+self._bot_alias_name+" already associated to Bot version "+bot_version)
+                return
+            associate_botversion_alias_response = self._lex_client.update_bot_alias(
+                botVersion=bot_version,
+                botAliasId=describe_bot_alias_response['botAliasId'],
+                botAliasName=describe_bot_alias_response['botAliasName'],
+                description= describe_bot_alias_response.get('description',''),
+                botId=describe_bot_alias_response['botId'],
+                botAliasLocaleSettings=self._bot_alias_locale_settings(describe_bot_alias_response.get('botAliasLocaleSettings')),
+                conversationLogSettings=describe_bot_alias_response.get('conversationLogSettings',{}),
+                sentimentAnalysisSettings=describe_bot_alias_response.get('sentimentAnalysisSettings',{'detectSentiment': False})
             )
-            create_import_bot_response = self._lex_client.start_import(
+            logger.info("Completed association new Bot version "+bot_version+ " to alias "+self._environment+"-"+self._bot_alias_name)
+        else:
+            logger.info("Not associated new Bot version "+bot_version+ " as the alias is either not provided or invalid")
+
+    @staticmethod
+    def _upload_bot_zip(upload_url, bot_archive_path):
+        with open(bot_archive_path,'rb') as botzipfile:
+            try:
+                upload_response = get_http_session().put(upload_url, data=botzipfile, timeout=300)
+                upload_response.raise_for_status()
+                get_run_metrics().add_bytes('uploaded', os.path.getsize(bot_archive_path))
+            except Exception as err:
+                logger.error(err)
+
+    def _bot_import_specification(self):
+        describe_bot_response = self._lex_bot_getter.resolve_on_stale(
+            lambda bot_id: self._lex_client.describe_bot(
+                botId=bot_id
+            )
+        )
+        self._bot_id, self._bot_latest_version = self._lex_bot_getter.bot_id_version
+        return {
+            'botImportSpecification': {
+                'botName': describe_bot_response['botName'],
+                'roleArn': describe_bot_response['roleArn'],
+                'dataPrivacy': describe_bot_response['dataPrivacy'],
+                'idleSessionTTLInSeconds': describe_bot_response['idleSessionTTLInSeconds'],
+            },
+        }
+
+    def _bot_locale_import_specification(self, locale_id):
+        bot_locale_import_specification = {
+            'botId': self._bot_id,
+            'botVersion': 'DRAFT',
+            'localeId': locale_id,
+        }
+        bot_locale_path = os.path.join(lex_root_dir, self._bot_name, 'BotLocales', locale_id, 'BotLocale.json')
+        with open(bot_locale_path, 'r', encoding='utf-8') as botlocalefile:
+            bot_locale = json.load(botlocalefile)
+        if bot_locale.get('nluConfidenceThreshold') is not None:
+            bot_locale_import_specification['nluIntentConfidenceThreshold'] = bot_locale['nluConfidenceThreshold']
+        if bot_locale.get('voiceSettings'):
+            bot_locale_import_specification['voiceSettings'] = bot_locale['voiceSettings']
+        return {'botLocaleImportSpecification': bot_locale_import_specification}
+
+    async def _import_archive_async(self, bot_archive_path, resource_specification):
+        """ Uploads an archive, imports it and waits for the import
+
+        :param bot_archive_path: zip built by LexBotArchiveBuilder
+        :type bot_archive_path: str
+
+        :param resource_specification: botImportSpecification or
+            botLocaleImportSpecification of start_import
+        :type resource_specification: dict
+        """
+        with phase('import.upload', self._current_bot_name):
+            create_upload_url_response = await run_blocking(self._lex_client.create_upload_url)
+            await run_blocking(self._upload_bot_zip, create_upload_url_response['uploadUrl'], bot_archive_path)
+        with phase('import.start', self._current_bot_name):
+            create_import_bot_response = await run_blocking(
+                self._lex_client.start_import,
                 importId=create_upload_url_response['importId'],
-                resourceSpecification={
-                    'botImportSpecification': {
-                        'botName': describe_bot_response['botName'],
-                        'roleArn': describe_bot_response['roleArn'],
-                        'dataPrivacy': describe_bot_response['dataPrivacy'],
-                        'idleSessionTTLInSeconds': describe_bot_response['idleSessionTTLInSeconds'],
-                    },
-                },
+                resourceSpecification=resource_specification,
                 mergeStrategy='Overwrite'
             )
-            logger.info("Uploaded bot zip. Waiting for import to complete.")
-            import_id = create_import_bot_response['importId']
-            bot_import_waiter = self._lex_client.get_waiter('bot_import_completed')
-            bot_import_waiter.wait(
-                importId=import_id,
-                WaiterConfig={
-                    'Delay': 20,
-                    'MaxAttempts': 15
-                }
-            )
-            describe_import_bot_response = self._lex_client.describe_import(
+        logger.info("Uploaded bot zip. Waiting for import to complete.")
+        import_id = create_import_bot_response['importId']
+        bot_import_waiter = get_waiter(self._lex_client, 'bot_import_completed')
+        with phase('import.wait', self._current_bot_name):
+            await bot_import_waiter.wait_async(
+                history_key=self._current_bot_name,
                 importId=import_id
             )
-            self._get_bot_response = describe_import_bot_response['importStatus']
-            if describe_import_bot_response['importStatus'] == 'Completed':
-                if os.path.exists(self._current_bot_name+'.zip'):
-                    os.remove(self._current_bot_name+'.zip')
-                logger.info('Completed import for bot name {}.'.format(
-                    self._current_bot_name
-                    )
+        describe_import_bot_response = await run_blocking(
+            self._lex_client.describe_import,
+            importId=import_id
+        )
+        if describe_import_bot_response['importStatus'] == 'Completed':
+            logger.info('Completed import for bot name {}.'.format(
+                self._current_bot_name
                 )
-            
-            delete_import_bot_response = self._lex_client.delete_import(
-                importId=import_id
             )
+        delete_import_bot_response = await run_blocking(
+            self._lex_client.delete_import,
+            importId=import_id
+        )
+        return describe_import_bot_response['importStatus']
 
-            build_bot_response = self._lex_client.build_bot_locale(
-                botId=self._bot_id,
-                botVersion=self._bot_source_version,
-                localeId='en_GB'
-            )
-            logger.info("Initiated Bot build. Waiting for Bot build to complete.")
-            bot_build_waiter = self._lex_client.get_waiter('bot_locale_built')
-            bot_build_waiter.wait(
-                botId=self._bot_id,
-                botVersion=self._bot_source_version,
-                localeId='en_GB',
-                WaiterConfig={
-                    'Delay': 20,
-                    'MaxAttempts': 15
-                }
+    async def _import_bot_zip_async(self):
+        try:
+            #bot_role_arn = self._get_role_arn()
+            logger.info("Retrieved Bot role ARN from Role name.")
+            root_dir = lex_root_dir+'/'
+            self._bot_locale_ids = self.discover_bot_locales(root_dir+self._bot_name)
+            logger.info("Discovered Bot locales "+", ".join(self._bot_locale_ids))
+            with phase('import.digest', self._current_bot_name):
+                bot_file_digests = await run_blocking(file_digests, root_dir+self._bot_name)
+                content_digest = bot_tree_digest(root_dir+self._bot_name, root_dir+'Manifest.json', bot_file_digests)
+            logger.info("Bot definition content digest "+content_digest)
+            bot_locale_digests = {
+                locale_id: combine_digests(bot_file_digests, prefix='BotLocales/'+locale_id+'/')
+                for locale_id in self._bot_locale_ids
+            }
+            if not self._force_import:
+                unchanged_bot_version = await run_blocking(self._deployment_state.unchanged_bot_version, content_digest)
+                if unchanged_bot_version:
+                    logger.info("Bot definition unchanged since Bot version "+unchanged_bot_version+". Skipping upload, build and versioning.")
+                    self._get_bot_response = 'Unchanged'
+                    with phase('import.alias', self._current_bot_name):
+                        await run_blocking(self._associate_bot_alias, unchanged_bot_version)
+                    return self._get_bot_response
+            bot_settings_digest = combine_digests({
+                relpath: digest for relpath, digest in bot_file_digests.items() if not relpath.startswith('BotLocales/')
+            })
+            imported_bot_locale_ids, built_bot_locale_ids = await run_blocking(
+                self._plan_import, bot_settings_digest, bot_locale_digests
             )
-            logger.info("Completed Bot build.")
-
-            bot_version_manager = LexBotVersionManager(bot_name=self._bot_name,ticket=self._ticket,environment=self._environment,bot_alias_name=self._bot_alias_name,bot_source_version=self._bot_source_version)
-            create_bot_version_response = bot_version_manager.create_bot_version()
-
-            if (self._bot_alias_name != '' and self._bot_alias_name != None and self._bot_alias_id != ''):
-                logger.info("Initiated association new Bot version "+create_bot_version_response['botVersion']+ " to alias "+self._environment+"-"+self._bot_alias_name)
-                describe_bot_alias_response = self._lex_client.describe_bot_alias(
-                    botAliasId=self._bot_alias_id,
-                    botId=self._bot_id
-                )
-                associate_botversion_alias_response = self._lex_client.update_bot_alias(
-                    botVersion=create_bot_version_response['botVersion'],
-                    botAliasId=describe_bot_alias_response['botAliasId'],
-                    botAliasName=describe_bot_alias_response['botAliasName'],
-                    description= describe_bot_alias_response.get('description',''),
-                    botId=describe_bot_alias_response['botId'],
-                    botAliasLocaleSettings=describe_bot_alias_response.get('botAliasLocaleSettings',{'en_GB': {'enabled': True}}),
-                    conversationLogSettings=describe_bot_alias_response.get('conversationLogSettings',{}),
-                    sentimentAnalysisSettings=describe_bot_alias_response.get('sentimentAnalysisSettings',{'detectSentiment': False})
-                )
-                logger.info("Completed association new Bot version "+create_bot_version_response['botVersion']+ " to alias "+self._environment+"-"+self._bot_alias_name)
-            else:
-                logger.info("Not associated new Bot version "+create_bot_version_response['botVersion']+ " as the alias is either not provided or invalid")
+            if imported_bot_locale_ids is None:
+                with phase('import.archive', self._current_bot_name):
+                    bot_archive_path = await run_blocking(
+                        get_archive_builder().build,
+                        root_dir+self._bot_name,
+                        root_dir+'Manifest.json',
+                        self._current_bot_name,
+                        content_digest
+                    )
+                logger.info("Created zip of Bot to import.")
+                resource_specification = await run_blocking(self._bot_import_specification)
+                self._get_bot_response = await self._import_archive_async(bot_archive_path, resource_specification)
+            for locale_id in imported_bot_locale_ids or []:
+                with phase('import.archive', self._current_bot_name):
+                    bot_archive_path = await run_blocking(
+                        get_archive_builder().build_locale,
+                        root_dir+self._bot_name,
+                        self._current_bot_name,
+                        locale_id,
+                        content_digest
+                    )
+                logger.info("Created zip of Bot locale "+locale_id+" to import.")
+                resource_specification = await run_blocking(self._bot_locale_import_specification, locale_id)
+                self._get_bot_response = await self._import_archive_async(bot_archive_path, resource_specification)
+            if imported_bot_locale_ids == []:
+                self._get_bot_response = 'Unchanged'
+
+            with phase('import.build', self._current_bot_name):
+                if built_bot_locale_ids:
+                    await self._build_bot_locales_async(built_bot_locale_ids)
+
+            with phase('import.version', self._current_bot_name):
+                bot_version_manager = await run_blocking(LexBotVersionManager, bot_name=self._bot_name,ticket=self._ticket,environment=self._environment,bot_alias_name=self._bot_alias_name,bot_source_version=self._bot_source_version,profile_name=self._profile_name,bot_locale_ids=self._bot_locale_ids)
+                create_bot_version_response = await bot_version_manager.create_bot_version_async()
+
+            deployment_state = {
+                LexBotDeploymentState.DIGEST_TAG: content_digest,
+                LexBotDeploymentState.BOT_DIGEST_TAG: bot_settings_digest,
+                LexBotDeploymentState.VERSION_TAG: create_bot_version_response['botVersion'],
+            }
+            for locale_id, bot_locale_digest in bot_locale_digests.items():
+                deployment_state[LexBotDeploymentState.LOCALE_DIGEST_TAG_PREFIX+locale_id] = bot_locale_digest
+            await run_blocking(self._deployment_state.save, deployment_state)
+            with phase('import.alias', self._current_bot_name):
+                await run_blocking(self._associate_bot_alias, create_bot_version_response['botVersion'])
 
         except Exception as e:
             logger.warning('Lex import_bot call failed')
@@ -487,26 +868,149 @@ class LexBotImporter():
         return self._get_bot_response
 
 
-    def import_bot(self):
+    async def import_bot_async(self):
+        """ Imports, builds, versions and aliases the bot definition
+
+        Waits on the import, builds and version with asyncio, see import_bot.
+        """
         logger.info('importing bot {}'.format(
               self._current_bot_name
             )
         )
-        self._import_bot_zip()
+        self._get_bot = await self._import_bot_zip_async()
         logger.info('successfully imported bot and associated resources')
 
+        return dict(
+            bot=self._get_bot,
+            locales=self._locale_build_report
+        )
+
+    def import_bot(self):
+        return run_sync(self.import_bot_async())
+
+class LexBotDeploymentState():
+    """Tracks which bot definition content was last imported into a bot
+
+    The state is stored as tags on the bot so that it is shared by every
+    pipeline run, and in a local manifest under the cache directory as a
+    fallback when the bot cannot be tagged. Next to the content digest and
+    the bot version created from it, the state records when the DRAFT
+    locales were last updated, so that changes made in the Lex console
+    since the import are never mistaken for an unchanged bot.
+
+    :param lex_client: lexv2-models boto3 client
+    :param lex_bot_getter: LexBotGetter of the bot
+    """
+    DIGEST_TAG = 'lexmgmt:content-digest'
+    VERSION_TAG = 'lexmgmt:content-version'
+    DRAFT_UPDATED_TAG = 'lexmgmt:draft-updated'
+    BOT_DIGEST_TAG = 'lexmgmt:bot-digest'
+    LOCALE_DIGEST_TAG_PREFIX = 'lexmgmt:locale-digest:'
+
+    def __init__(self, lex_client, lex_bot_getter, manifest_path=cache_path('import_manifest.json')):
+        self._lex_client = lex_client
+        self._lex_bot_getter = lex_bot_getter
+        self._manifest = JsonFileStore(manifest_path)
+        self._state = None
+
+    def _draft_updated(self):
+        bot_locales = self._lex_bot_getter.resolve_on_stale(
+            lambda bot_id: list(list_bot_locales(self._lex_client, bot_id))
+        )
+        last_updated = [
+            bot_locale['lastUpdatedDateTime'].isoformat()
+            for bot_locale in bot_locales if bot_locale.get('lastUpdatedDateTime')
+        ]
+        return max(last_updated) if last_updated else ''
+
+    def load(self):
+        """ Returns the recorded state of the bot as a dict of tag values
+        """
+        if self._state is None:
+            try:
+                tags = self._lex_bot_getter.resolve_on_stale(
+                    lambda bot_id: self._lex_client.list_tags_for_resource(
+                        resourceARN=self._lex_bot_getter.bot_arn
+                    )
+                ).get('tags', {})
+            except ClientError as e:
+                logger.warning('Failed to read the bot tags, using local manifest only : {}'.format(e))
+                tags = {}
+            self._state = {key: value for key, value in tags.items() if key.startswith('lexmgmt:')}
+            if not self._state:
+                self._state = dict(self._manifest.data.get(self._lex_bot_getter.bot_arn, {}))
+        return self._state
+
+    def save(self, updates):
+        """ Records updates, along with the current DRAFT update time
+        """
+        state = dict(self.load())
+        state.update(updates)
+        state[self.DRAFT_UPDATED_TAG] = self._draft_updated()
+        with self._manifest.lock:
+            self._manifest.data[self._lex_bot_getter.bot_arn] = state
+            self._manifest.save()
+        try:
+            self._lex_client.tag_resource(
+                resourceARN=self._lex_bot_getter.bot_arn,
+                tags=state
+            )
+        except ClientError as e:
+            logger.warning('Failed to tag bot with its content digest, using local manifest only : {}'.format(e))
+        self._state = state
+
+    def draft_updated_since_save(self):
+        """ Returns True when the DRAFT locales were updated after the recorded import
+        """
+        return self.load().get(self.DRAFT_UPDATED_TAG) != self._draft_updated()
+
+    def unchanged_bot_version(self, content_digest):
+        """ Returns the bot version built from content_digest, or None
+
+        None is returned when the content differs, when no version was
+        recorded, or when the DRAFT was updated since the recorded import.
+        """
+        state = self.load()
+        bot_version = state.get(self.VERSION_TAG)
+        if state.get(self.DIGEST_TAG) != content_digest or not bot_version:
+            return None
+        if self.draft_updated_since_save():
+            logger.info("Bot DRAFT was updated since the last import")
+            return None
+        try:
+            self._lex_bot_getter.resolve_on_stale(
+                lambda bot_id: self._lex_client.describe_bot_version(
+                    botId=bot_id,
+                    botVersion=bot_version
+                )
+            )
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') != 'ResourceNotFoundException':
+                raise
+            logger.info("Bot version "+bot_version+" built from this content no longer exists")
+            return None
+        return bot_version
+
 class LexBotValidator():
     def __init__(
             self,
             bot_name,
             profile_name='',
             logging_level=DEFAULT_LOGGING_LEVEL,
+            validation_cache=True,
+            utterance_collisions_as_errors=False,
+            near_duplicate_threshold=None,
         ):
         self._bot_name = bot_name
 
         logger.setLevel(logging_level)
         logging.getLogger('botocore').setLevel(logging_level)
         
+        self._validation_engine = LexBotValidationEngine(
+            cache=LexValidationCache() if validation_cache else None,
+            utterance_collision_severity=SEVERITY_ERROR if utterance_collisions_as_errors else SEVERITY_WARNING,
+            near_duplicate_threshold=near_duplicate_threshold
+        )
         self._validate_bot_response = {}
 
     @property
@@ -516,12 +1020,19 @@ class LexBotValidator():
     def _validate_bot(self):
         try:
             root_dir = lex_root_dir+'/'
-            for root, dirs, files in os.walk(root_dir+self._bot_name+'/'):
-                for file in files:
-                    with open(os.path.join(root, file),'r',encoding='utf-8') as botjsonfile:
-                        #botdefndata = botjsonfile.read()
-                        jsonbotdefndata = json.load(botjsonfile)
-                        self.get_duplicates(jsonbotdefndata,os.path.join(root, file),"")                            
+            with phase('validate', self._bot_name):
+                report = self._validation_engine.validate_tree(root_dir+self._bot_name+'/')
+            for item in report.findings:
+                log = logger.error if item['severity'] == SEVERITY_ERROR else logger.warning
+                log("{} in file {} {}".format(
+                    item['message'], item['path'], item.get('duplicates') or item.get('variants') or item.get('utterances') or ''
+                ))
+            self._validate_bot_response = report.summary()
+            errors = report.errors
+            if errors:
+                raise Exception("{} validation errors found, first: {}".format(
+                    len(errors), errors[0]['message']
+                ))
 
         except Exception as e:
             logger.warning('Lex validate_bot call failed')
@@ -533,22 +1044,17 @@ class LexBotValidator():
     
     @staticmethod
     def get_duplicates(jsondata,path,parent_key=""):
-        for key, value in jsondata.items():
-            if isinstance(value, list):
-                duplicates = [item for item, count in Counter(json.dumps(obj, sort_keys=True) for obj in value).items() if count > 1]
-                if duplicates:
-                    logger.info("duplicates found in file {} in key '{}.{}' {}".format(
-                        path, parent_key, key, duplicates
-                    ))
-                    raise Exception("duplicates found in key '{}'".format(key))
-                for index, item in enumerate(value):
-                    if isinstance(item, list) or isinstance(item, dict):
-                        current_key = f"{parent_key}.{key}[{index}]" if parent_key else f"{key}[{index}]"
-                        LexBotValidator.get_duplicates(item,path,parent_key=current_key)
-
-            elif isinstance(value, dict):
-                current_key = f"{parent_key}.{key}" if parent_key else key
-                LexBotValidator.get_duplicates(value,path,parent_key=current_key)
+        """ Raises on the first list of jsondata holding duplicate items
+
+        Kept for callers of the previous validator, LexBotValidator itself
+        collects every finding through LexBotValidationEngine.
+        """
+        for item in find_duplicates(jsondata, path):
+            key = f"{parent_key}.{item['key']}" if parent_key else item['key']
+            logger.info("duplicates found in file {} in key '{}' {}".format(
+                path, key, item['duplicates']
+            ))
+            raise Exception("duplicates found in key '{}'".format(key))
 
 
     def validate_bot(self):
@@ -569,13 +1075,17 @@ class LexBotVersionManager():
             bot_source_version='DRAFT',
             profile_name='',
             logging_level=DEFAULT_LOGGING_LEVEL,
+            bot_locale_ids=None,
+            delete_rate=DELETE_BOT_VERSION_RATE,
         ):
         self._bot_name = bot_name
         self._ticket = ticket
         self._environment = environment
         self._bot_alias_name = bot_alias_name
         self._bot_source_version = bot_source_version
+        self._bot_locale_ids = bot_locale_ids or [DEFAULT_LOCALE_ID]
         self._logging_level = logging_level
+        self._delete_rate = delete_rate
 
         #logger.setLevel(logging_level)
         #logging.getLogger('botocore').setLevel(logging_level)
@@ -586,10 +1096,11 @@ class LexBotVersionManager():
         get_lex_bot = LexBotGetter(bot_name=bot_name,ticket=ticket,environment=environment,bot_alias_name=environment+"-"+bot_alias_name,profile_name=profile_name)
         self._bot_id, self._bot_latest_version = get_lex_bot.bot_id_version
         self._current_bot_name = get_lex_bot.current_bot_name
+        self._lex_bot_getter = get_lex_bot
         self._bot_alias_id = ''
         if (bot_alias_name != '' and bot_alias_name != None):
             self._bot_alias_id = get_lex_bot.bot_alias_id
-                
+
         #os.chdir('../')
 
     @property
@@ -612,66 +1123,128 @@ class LexBotVersionManager():
     def bot_source_version(self):
         return self._bot_source_version
 
-    def _delete_old_bot_version(self):
+    def _numbered_bot_versions(self):
+        logger.info("Retrieving Bot Versions from Bot Id "+self._bot_id)
+        bot_versions = self._lex_bot_getter.resolve_on_stale(
+            lambda bot_id: [
+                bot_version_summary['botVersion']
+                for bot_version_summary in list_bot_versions(self._lex_client, bot_id)
+            ]
+        )
+        self._bot_id, self._bot_latest_version = self._lex_bot_getter.bot_id_version
+        logger.info("Retrieved "+str(len(bot_versions))+" Bot Versions")
+        # Versions are not contiguous once older ones have been deleted,
+        # so they are counted rather than subtracted
+        return sorted((bot_version for bot_version in bot_versions if bot_version.isdigit()), key=int)
+
+    def _alias_bot_versions(self):
+        return {
+            bot_alias_summary['botVersion']
+            for bot_alias_summary in list_bot_aliases(self._lex_client, self._bot_id)
+            if bot_alias_summary.get('botVersion')
+        }
+
+    def _cfn_bot_versions(self):
+        if self._ticket != '':
+            return set()
+        # <environment>-<alias> stack, and the stack sam deploy names after the bot
+        stack_names = [self._environment+"-"+self._bot_alias_name, self._bot_name]
+        return get_stack_output_cache().protected_bot_versions(
+            self._cfn_client,
+            stack_names,
+            bot_id=self._bot_id,
+            scope=self._lex_bot_getter.cache_scope
+        )
+
+    def plan_bot_version_gc(self, keep_last=DEFAULT_RETAIN_BOT_VERSIONS):
+        """ Returns which numbered bot versions a garbage collection deletes
+
+        The keep_last most recent versions, the versions referenced by a bot
+        alias and, for the main bot, the versions in the *BotVersion outputs
+        of its CloudFormation stacks are protected. Every other numbered version is
+        deleted. DRAFT is never deleted.
+
+        :param keep_last: number of most recent versions to keep
+        :type keep_last: int
+        """
+        bot_versions = self._numbered_bot_versions()
+        protected = {}
+        for bot_version in bot_versions[len(bot_versions)-keep_last:] if keep_last > 0 else []:
+            protected.setdefault(bot_version, []).append('retained')
+        for bot_version in self._alias_bot_versions():
+            protected.setdefault(bot_version, []).append('bot alias')
+        for bot_version in self._cfn_bot_versions():
+            protected.setdefault(bot_version, []).append('CloudFormation BotVersion output')
+        return dict(
+            bot_id=self._bot_id,
+            versions=bot_versions,
+            protected={
+                bot_version: reasons for bot_version, reasons in protected.items() if bot_version in bot_versions
+            },
+            delete=[bot_version for bot_version in bot_versions if bot_version not in protected]
+        )
+
+    def _delete_bot_versions(self, bot_versions):
+        rate_limiter = TokenBucket(self._delete_rate)
+
+        def delete_bot_version(bot_version):
+            rate_limiter.acquire()
+            self._lex_client.delete_bot_version(
+                botId=self._bot_id,
+                botVersion=bot_version,
+                skipResourceInUseCheck=False
+            )
+
+        deleted_bot_versions = []
+        failed_bot_versions = {}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(MAX_DELETE_WORKERS, len(bot_versions))) as executor:
+            futures = {
+                executor.submit(delete_bot_version, bot_version): bot_version
+                for bot_version in bot_versions
+            }
+            for future in concurrent.futures.as_completed(futures):
+                bot_version = futures[future]
+                try:
+                    future.result()
+                    logger.info("Deleted bot version "+bot_version)
+                    deleted_bot_versions.append(bot_version)
+                except Exception as e:
+                    logger.warning("Failed to delete bot version "+bot_version)
+                    logger.warning(e)
+                    failed_bot_versions[bot_version] = str(e)
+        return sorted(deleted_bot_versions, key=int), failed_bot_versions
+
+    def _collect_old_bot_versions(self, keep_last, dry_run):
         try:
             logger.setLevel(self._logging_level)
             logging.getLogger('botocore').setLevel(self._logging_level)
-            list_bot_versions_response = {"botVersionSummaries": [],"nextToken":""}
-            retry = 1
-            maxRetries = 30
-            version_count = 0
-            while (list_bot_versions_response['botVersionSummaries'] == [] and retry <= maxRetries):
-                logger.info("Retrieving Bot Versions from Bot Id. Page "+str(retry))
-                if list_bot_versions_response['nextToken'] == "":
-                    list_bot_versions_response = self._lex_client.list_bot_versions(
-                        botId=self._bot_id,
-                        sortBy={
-                            'attribute': 'BotVersion',
-                            'order': 'Ascending'
-                        }
-                    )
-                else:
-                    list_bot_versions_response = self._lex_client.list_bots(
-                        botId=self._bot_id,
-                        sortBy={
-                            'attribute': 'BotVersion',
-                            'order': 'Ascending'
-                        },
-                        nextToken = list_bot_versions_response['nextToken']
-                    )
-                retry = retry + 1
-            cfn_stack_response = self._cfn_client.describe_stacks(StackName=self._environment+"-"+self._bot_alias_name)
-            cfn_stack_outputs = cfn_stack_response["Stacks"][0]["Outputs"]
-            cfn_bot_version = ''
-            if self._ticket == '':
-                for cfn_stack_output in cfn_stack_outputs:
-                    keyName = cfn_stack_output["OutputKey"]
-                    if keyName == "BotVersion":
-                        cfn_bot_version = cfn_stack_output["OutputValue"]
-                logger.info("Oldest CloudFormation Bot Version "+cfn_bot_version)
-            bot_version_cntr = 0
-            oldestBotVersion = list_bot_versions_response['botVersionSummaries'][bot_version_cntr]['botVersion']
-            while (oldestBotVersion == cfn_bot_version and bot_version_cntr <= 10 and self._ticket == ''):
-                bot_version_cntr = bot_version_cntr+1
-                oldestBotVersion = list_bot_versions_response['botVersionSummaries'][bot_version_cntr]['botVersion']
-            logger.info("Oldest Non CloudFormation Bot Version "+oldestBotVersion)
-            logger.info("Latest Bot Version "+self._bot_latest_version)
-            bot_active_versions_cnt = int(self._bot_latest_version) - int(oldestBotVersion) + 1
-            logger.info("No. of Bot Versions active "+str(bot_active_versions_cnt))
-            if (bot_active_versions_cnt >= 25):
-                logger.info("Bot version limit reached. Deleting Oldest non cloudformation bot version "+oldestBotVersion)
-                self._delete_bot_version_response = self._lex_client.delete_bot_version(
-                    botId=self._bot_id,
-                    botVersion=oldestBotVersion,
-                    skipResourceInUseCheck=False
-                )
-                logger.info("Deleted Oldest non cloudformation bot version "+oldestBotVersion)
+            with phase('gc.plan', self._current_bot_name):
+                plan = self.plan_bot_version_gc(keep_last)
+            logger.info("Bot versions : "+", ".join(plan['versions']))
+            logger.info("Keeping bot versions : "+", ".join(
+                bot_version if plan['protected'][bot_version] == ['retained']
+                else bot_version+" ("+", ".join(plan['protected'][bot_version])+")"
+                for bot_version in sorted(plan['protected'], key=int)
+            ))
+            logger.info(("Would delete" if dry_run else "Deleting")+" bot versions : "+(", ".join(plan['delete']) or "none"))
+            self._delete_bot_version_response = dict(plan, dry_run=dry_run, deleted=[], failed={})
+            if plan['delete'] and not dry_run:
+                with phase('gc.delete', self._current_bot_name):
+                    deleted_bot_versions, failed_bot_versions = self._delete_bot_versions(plan['delete'])
+                self._delete_bot_version_response['deleted'] = deleted_bot_versions
+                self._delete_bot_version_response['failed'] = failed_bot_versions
+                if failed_bot_versions:
+                    raise Exception("Failed to delete bot versions "+", ".join(sorted(failed_bot_versions, key=int)))
         except Exception as e:
             logger.warning(e)
             logger.warning('Lex delete old bot version call failed')
             raise
         return self._delete_bot_version_response
 
+    def _delete_old_bot_version(self):
+        # Makes room for one more version below the bot version limit
+        return self._collect_old_bot_versions(BOT_VERSION_LIMIT - 1, dry_run=False)
+
     def delete_old_bot_version(self):
         logger.info('Deleting old version for bot {}'.format(
               self._current_bot_name
@@ -680,29 +1253,43 @@ class LexBotVersionManager():
         self._delete_old_bot_version()
         logger.info('successfully deleted old bot version')
 
-    def _create_bot_version(self):
+    def collect_old_bot_versions(self, keep_last=DEFAULT_RETAIN_BOT_VERSIONS, dry_run=False):
+        logger.info('{} old versions for bot {}'.format(
+              'Planning deletion of' if dry_run else 'Deleting',
+              self._current_bot_name
+            )
+        )
+        self._collect_old_bot_versions(keep_last, dry_run)
+        logger.info('successfully collected old bot versions')
+        return self._delete_bot_version_response
+
+    async def _create_bot_version_async(self):
         try:
             logger.info("Initiated creation of new Bot version. Waiting for Bot version creation to complete.")
-            self._create_bot_version_response = self._lex_client.create_bot_version(
-                botId=self._bot_id,
-                description='',
-                botVersionLocaleSpecification={
-                    'en_GB': {
-                        'sourceBotVersion': self._bot_source_version
+            self._create_bot_version_response = await run_blocking(
+                self._lex_bot_getter.resolve_on_stale,
+                lambda bot_id: self._lex_client.create_bot_version(
+                    botId=bot_id,
+                    description='',
+                    botVersionLocaleSpecification={
+                        locale_id: {
+                            'sourceBotVersion': self._bot_source_version
+                        }
+                        for locale_id in self._bot_locale_ids
                     }
-                }
+                )
             )
+            self._bot_id = self._create_bot_version_response['botId']
             
 
-            bot_version_waiter = self._lex_client.get_waiter('bot_version_available')
-            bot_version_waiter.wait(
+            bot_version_waiter = get_waiter(self._lex_client, 'bot_version_available')
+            await bot_version_waiter.wait_async(
+                history_key=self._current_bot_name,
                 botId=self._bot_id,
-                botVersion=self._create_bot_version_response['botVersion'],
-                WaiterConfig={
-                    'Delay': 20,
-                    'MaxAttempts': 15
-                }
+                botVersion=self._create_bot_version_response['botVersion']
             )
+            self._bot_latest_version = self._create_bot_version_response['botVersion']
+            self._lex_bot_getter.remember_bot(self._bot_id, self._bot_latest_version)
             logger.info("Completed creation of Bot version "+self._create_bot_version_response['botVersion'])
         except Exception as e:
             logger.warning(e)
@@ -711,15 +1298,18 @@ class LexBotVersionManager():
         return self._create_bot_version_response
 
 
-    def create_bot_version(self):
+    async def create_bot_version_async(self):
         logger.info('Creating new version for bot {}'.format(
               self._current_bot_name
             )
         )
-        self._create_bot_version()
+        await self._create_bot_version_async()
         logger.info('successfully created new bot version')
         return self._create_bot_version_response
 
+    def create_bot_version(self):
+        return run_sync(self.create_bot_version_async())
+
 class LexBotGetter():
     """Class to export a Lex bot definition from an AWS account
 
@@ -757,82 +1347,137 @@ class LexBotGetter():
         self._bot_alias_name = bot_alias_name
 
         self._lex_client = LexClient(profile_name=profile_name).client
+        self._resolution_cache = get_resolution_cache()
+        self._cache_scope = None
+        self._bot_id = None
+        self._bot_latest_version = 'DRAFT'
+        self._bot_alias_id = ''
 
         self._current_bot_name=self._ticket+"-"+self._environment+"-"+self._bot_name
         if (self._ticket == ""):
             self._current_bot_name=self._environment+"-"+self._bot_name
 
-        
+
+    @property
+    def account_id(self):
+        return get_client_registry().account_id(self._profile_name)
+
+    @property
+    def region_name(self):
+        return self._lex_client.meta.region_name
+
+    @property
+    def partition(self):
+        return get_client_registry().partition(self.region_name, self._profile_name)
+
+    @property
+    def bot_arn(self):
+        if self._bot_id is None:
+            self.bot_id_version
+        return 'arn:{}:lex:{}:{}:bot/{}'.format(self.partition, self.region_name, self.account_id, self._bot_id)
+
+    @property
+    def cache_scope(self):
+        if self._cache_scope is None:
+            self._cache_scope = LexResolutionCache.key(self.account_id, self.region_name)
+        return self._cache_scope
+
+    @property
+    def _cache_prefix(self):
+        return LexResolutionCache.key(self.cache_scope, self._current_bot_name) + '|'
+
+    @property
+    def cache_prefix(self):
+        return self._cache_prefix
 
     @property
     def bot_id_version(self):
-        self._list_bots_response = {"botSummaries": [],"nextToken":""}
-        retry = 1
-        maxRetries = 30
-        logger.info("log "+self._current_bot_name)
-        self._bot_latest_version = 'DRAFT'
-        while (self._list_bots_response['botSummaries'] == [] and retry <= maxRetries):
-            logger.info("Retrieving Bot Id from Bot Name. Page "+str(retry))
-            if self._list_bots_response['nextToken'] == "":
-                self._list_bots_response = self._lex_client.list_bots(
-                    sortBy={
-                        'attribute': 'BotName',
-                        'order': 'Ascending'
-                    },
-                    filters=[
-                        {
-                            'name': 'BotName',
-                            'values': [self._current_bot_name],
-                            'operator': 'EQ'
-                        },
-                    ]
-                )
-            else:
-                self._list_bots_response = self._lex_client.list_bots(
-                    sortBy={
-                        'attribute': 'BotName',
-                        'order': 'Ascending'
-                    },
-                    filters=[
-                        {
-                            'name': 'BotName',
-                            'values': [self._current_bot_name],
-                            'operator': 'EQ'
-                        },
-                    ],
-                    nextToken = self._list_bots_response['nextToken']
-                )
-            retry = retry + 1
-        self._bot_id = self._list_bots_response['botSummaries'][0]['botId']
-        self._bot_latest_version = self._list_bots_response['botSummaries'][0].get('latestBotVersion','DRAFT')
+        cache_key = self._cache_prefix + 'bot'
+        cached_bot = self._resolution_cache.get(cache_key)
+        if cached_bot is not None:
+            logger.info("Retrieved Bot Id from resolution cache for "+self._current_bot_name)
+            self._bot_id = cached_bot['botId']
+            self._bot_latest_version = cached_bot['latestBotVersion']
+            return self._bot_id, self._bot_latest_version
+        self._list_bot_id_version()
+        self._resolution_cache.put(cache_key, {
+            'botId': self._bot_id,
+            'latestBotVersion': self._bot_latest_version
+        })
         return self._bot_id, self._bot_latest_version
 
     @property
     def bot_alias_id(self):
-        bot_id = self._bot_id
+        if self._bot_id is None:
+            self.bot_id_version
+        cache_key = self._cache_prefix + 'alias|' + self._bot_alias_name
+        cached_bot_alias_id = self._resolution_cache.get(cache_key)
+        if cached_bot_alias_id is not None:
+            logger.info("Retrieved Bot Alias Id from resolution cache "+cached_bot_alias_id)
+            self._bot_alias_id = cached_bot_alias_id
+            return self._bot_alias_id
+        self._list_bot_alias_id()
+        if self._bot_alias_id != '':
+            self._resolution_cache.put(cache_key, self._bot_alias_id)
+        return self._bot_alias_id
+
+    def remember_bot(self, bot_id, bot_latest_version='DRAFT'):
+        """ Records a newly created bot or bot version in the resolution cache
+        """
+        self._bot_id = bot_id
+        self._bot_latest_version = bot_latest_version
+        self._resolution_cache.put(self._cache_prefix + 'bot', {
+            'botId': self._bot_id,
+            'latestBotVersion': self._bot_latest_version
+        })
+
+    def invalidate(self):
+        """ Drops the cached bot and alias ids of this bot
+        """
+        self._resolution_cache.invalidate(self._cache_prefix)
+        self._bot_id = None
         self._bot_alias_id = ''
-        self._list_bots_alias_response = {"botAliasSummaries": [],"nextToken":""}
-        retry = 1
-        maxRetries = 30
-        while (self._list_bots_alias_response['botAliasSummaries'] == [] and retry <= maxRetries):
-            logger.info("Retrieving Bot Alias Id from Bot Alias Name "+self._bot_alias_name+" for Bot Id "+bot_id+". Page "+str(retry))
-            if self._list_bots_alias_response['nextToken'] == "":
-                self._list_bots_alias_response = self._lex_client.list_bot_aliases(
-                    botId=bot_id
-                )
-            else:
-                self._list_bots_alias_response = self._lex_client.list_bot_aliases(
-                    botId=bot_id,
-                    nextToken = self._list_bots_alias_response['nextToken']
-                )
-            retry = retry + 1
-        
-        for index, botalias in enumerate(self._list_bots_alias_response['botAliasSummaries']):
-            if (botalias['botAliasName'] == self._bot_alias_name):
-                self._bot_alias_id = botalias['botAliasId']
-        if self._bot_alias_id == '':
+
+    def resolve_on_stale(self, call):
+        """ Runs call(bot_id), re-resolving the bot once if its cached id is stale
+
+        A ResourceNotFoundException raised by call() invalidates the cached
+        ids of the bot, resolves them again through the list APIs and
+        retries call() once with the new bot id.
+        """
+        try:
+            return call(self._bot_id)
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') != 'ResourceNotFoundException':
+                raise
+            logger.info("Bot "+self._current_bot_name+" not found with cached ids. Re-resolving.")
+            self.invalidate()
+            self.bot_id_version
+            if self._bot_alias_name:
+                self.bot_alias_id
+            return call(self._bot_id)
+
+    def _list_bot_id_version(self):
+        logger.info("Retrieving Bot Id from Bot Name "+self._current_bot_name)
+        bot_listing = list_bots(self._lex_client, bot_name=self._current_bot_name)
+        bot_summary = bot_listing.find(lambda bot: bot['botName'] == self._current_bot_name)
+        logger.info("Fetched "+str(bot_listing.pages_fetched)+" page(s) of bots")
+        if bot_summary is None:
+            raise Exception("Bot {} not found".format(self._current_bot_name))
+        self._bot_id = bot_summary['botId']
+        self._bot_latest_version = bot_summary.get('latestBotVersion','DRAFT')
+        return self._bot_id, self._bot_latest_version
+
+    def _list_bot_alias_id(self):
+        logger.info("Retrieving Bot Alias Id from Bot Alias Name "+self._bot_alias_name+" for Bot Id "+self._bot_id)
+        bot_alias_listing = list_bot_aliases(self._lex_client, self._bot_id)
+        bot_alias_summary = bot_alias_listing.find(lambda botalias: botalias['botAliasName'] == self._bot_alias_name)
+        logger.info("Fetched "+str(bot_alias_listing.pages_fetched)+" page(s) of bot aliases")
+        self._bot_alias_id = ''
+        if bot_alias_summary is None:
             logger.info("Bot Alias Name not found")
         else:
+            self._bot_alias_id = bot_alias_summary['botAliasId']
             logger.info("Retrieved Bot Alias Id from Bot Alias Name "+ self._bot_alias_id)
         return self._bot_alias_id
 
@@ -886,6 +1531,7 @@ class LexBotCreater():
         self._iam_client = IAMClient(profile_name=profile_name).client
         get_lex_bot = LexBotGetter(bot_name=bot_name,ticket=ticket,environment=environment,profile_name=profile_name)
         self._current_bot_name = get_lex_bot.current_bot_name
+        self._lex_bot_getter = get_lex_bot
         #os.chdir('../')
 
     @property
@@ -912,35 +1558,38 @@ class LexBotCreater():
         bot_role = self._iam_client.get_role(RoleName=self._bot_role_name)
         return bot_role['Role']['Arn']
 
-    def _create_bot(self):
+    async def _create_bot_async(self):
         try:
             logger.info('Create Lex bot : ' + self._current_bot_name)
-            bot_role_arn = self._get_role_arn()
+            bot_role_arn = await run_blocking(self._get_role_arn)
             logger.info("Retrieved Bot role ARN from Role name.")
-            self._create_bot_response = self._lex_client.create_bot(
-                botName=self._current_bot_name,
-                description=self._current_bot_name,
-                roleArn=bot_role_arn,
-                dataPrivacy={
-                    'childDirected': False
-                },
-                idleSessionTTLInSeconds=300,
-                botType='Bot'
-            )
+            with phase('create.start', self._current_bot_name):
+                self._create_bot_response = await run_blocking(
+                    self._lex_client.create_bot,
+                    botName=self._current_bot_name,
+                    description=self._current_bot_name,
+                    roleArn=bot_role_arn,
+                    dataPrivacy={
+                        'childDirected': False
+                    },
+                    idleSessionTTLInSeconds=300,
+                    botType='Bot'
+                )
             logger.info('Created Lex bot : ' + self._current_bot_name)
-            bot_create_waiter = self._lex_client.get_waiter('bot_available')
-            bot_create_waiter.wait(
-                botId=self._create_bot_response['botId'],
-                WaiterConfig={
-                    'Delay': 20,
-                    'MaxAttempts': 15
-                }
-            )
-            create_bot_alias_response = self._lex_client.create_bot_alias(
-                botAliasName=self._environment+"-"+self._bot_alias_name,
-                description=self._current_bot_name,
-                botId=self._create_bot_response['botId']
-            )
+            self._lex_bot_getter.remember_bot(self._create_bot_response['botId'])
+            bot_create_waiter = get_waiter(self._lex_client, 'bot_available')
+            with phase('create.wait', self._current_bot_name):
+                await bot_create_waiter.wait_async(
+                    history_key=self._current_bot_name,
+                    botId=self._create_bot_response['botId']
+                )
+            with phase('create.alias', self._current_bot_name):
+                create_bot_alias_response = await run_blocking(
+                    self._lex_client.create_bot_alias,
+                    botAliasName=self._environment+"-"+self._bot_alias_name,
+                    description=self._current_bot_name,
+                    botId=self._create_bot_response['botId']
+                )
             logger.info('Created Lex bot alias: ' + self._environment+"-"+self._bot_alias_name)
 
 
@@ -951,6 +1600,19 @@ class LexBotCreater():
 
         return self._create_bot_response
 
+    async def create_bot_async(self):
+        """ Creates the bot and its alias
+
+        Waits on the bot with asyncio, see create_bot.
+        """
+
+        logger.info('Creating bot {}'.format(self._current_bot_name))
+        self._get_bot = await self._create_bot_async()
+
+        return dict(
+            bot=self._get_bot
+        )
+
     def create_bot(self):
         """ Performs a Lex get_bot API call
 
@@ -960,13 +1622,7 @@ class LexBotCreater():
             {bot:  {}, intents: [], slot-types: []}
         :rtype: dict
         """
-
-        logger.info('Creating bot {}'.format(self._current_bot_name))
-        self._get_bot = self._create_bot()
-
-        return dict(
-            bot=self._get_bot
-        )
+        return run_sync(self.create_bot_async())
 
 class LexBotDeleter(LexBotExporter):
     """Class to delete a Lex bot and associated resources
@@ -993,6 +1649,7 @@ class LexBotDeleter(LexBotExporter):
         get_lex_bot = LexBotGetter(bot_name=bot_name,ticket=ticket,environment=environment,profile_name=profile_name)
         self._bot_id, self._bot_latest_version = get_lex_bot.bot_id_version
         self._current_bot_name = get_lex_bot.current_bot_name
+        self._lex_bot_getter = get_lex_bot
 
     @property
     def bot_name(self):
@@ -1010,10 +1667,13 @@ class LexBotDeleter(LexBotExporter):
         ''' delete bot
         '''
         try:
-            self._delete_bot_response = self._lex_client.delete_bot(
-                botId=self._bot_id,
-                skipResourceInUseCheck=True
+            self._delete_bot_response = self._lex_bot_getter.resolve_on_stale(
+                lambda bot_id: self._lex_client.delete_bot(
+                    botId=bot_id,
+                    skipResourceInUseCheck=True
+                )
             )
+            self._lex_bot_getter.invalidate()
 
             logger.info('Deleted Lex bot : ' + self._current_bot_name)
 
@@ -0,0 +1,649 @@
+#!/usr/bin/env python
+
+##########################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+##########################################################################
+""" Validation engine for bot definitions on disk
+
+Every file is parsed once and every JSON subtree is hashed once, bottom-up.
+The hashes of the items of a list are reused to find duplicate items at
+every nesting level, so no subtree is serialised more than once. Large bot
+trees are validated in a process pool, and the results of unchanged files
+are reused from the validation cache.
+
+Checks spanning several files, such as sample utterances shared by
+intents of a locale, run in the main process over data extracted from
+each file, so they also benefit from the cache.
+
+Large SlotType.json files are streamed: slot type values are decoded one
+at a time and checked against sets of 64 bit digests, so memory does not
+grow with the size of the catalogue.
+"""
+import logging
+import concurrent.futures
+import hashlib
+import json
+import os
+import time
+from collections import Counter
+import lex_json_stream
+from lex_cache import JsonFileStore, cache_path
+from lex_json_stream import JsonStreamReader
+from lex_similarity import LexMinHashIndex
+
+logger = logging.getLogger('lex_utils_v2').getChild(__name__)
+
+PARALLEL_VALIDATION_THRESHOLD = int(os.environ.get('LEX_MGMT_PARALLEL_VALIDATION_THRESHOLD', '64'))
+TIMING_REPORT_THRESHOLD = int(os.environ.get('LEX_MGMT_VALIDATION_TIMING_REPORT_THRESHOLD', '200'))
+MAX_VALIDATION_WORKERS = int(os.environ.get('LEX_MGMT_MAX_VALIDATION_WORKERS', '0')) or os.cpu_count() or 1
+STREAMING_VALIDATION_THRESHOLD = int(os.environ.get('LEX_MGMT_STREAMING_VALIDATION_THRESHOLD', str(8 * 1024 * 1024)))
+MAX_REPORTED_EXAMPLES = 20
+
+# Bump when a rule changes in a way the source fingerprint cannot see, e.g.
+# a behaviour change in a dependency.
+VALIDATION_RULES_VERSION = 1
+# Files modified this recently are not trusted to the stat fast path, as a
+# later write within the file system timestamp granularity would go unseen.
+RACY_MTIME_WINDOW_NS = 2 * 1000 * 1000 * 1000
+
+SEVERITY_ERROR = 'error'
+SEVERITY_WARNING = 'warning'
+
+def finding(rule, path, message, severity=SEVERITY_ERROR, **details):
+    """ Returns a validation finding as a plain dict
+    """
+    result = {
+        'rule': rule,
+        'severity': severity,
+        'path': path,
+        'message': message
+    }
+    result.update(details)
+    return result
+
+def _subtree_digest(value, key_path, path, findings):
+    # Scalars are represented by their JSON text, containers by a blake2b
+    # digest of their children, so equal subtrees get equal digests.
+    if isinstance(value, dict):
+        node_hash = hashlib.blake2b(b'{', digest_size=16)
+        for key in sorted(value):
+            child_key_path = f"{key_path}.{key}" if key_path else key
+            node_hash.update(json.dumps(key).encode('utf-8'))
+            node_hash.update(_subtree_digest(value[key], child_key_path, path, findings))
+        return node_hash.digest()
+    if isinstance(value, list):
+        item_digests = [
+            _subtree_digest(item, f"{key_path}[{index}]", path, findings)
+            for index, item in enumerate(value)
+        ]
+        counts = Counter(item_digests)
+        if len(counts) != len(item_digests):
+            duplicates = []
+            for index, item_digest in enumerate(item_digests):
+                if counts[item_digest] > 1:
+                    duplicates.append(json.dumps(value[index], sort_keys=True))
+                    counts[item_digest] = 0
+            findings.append(finding(
+                'duplicate_list_items', path,
+                "duplicates found in key '{}'".format(key_path),
+                key=key_path,
+                duplicates=duplicates
+            ))
+        node_hash = hashlib.blake2b(b'[', digest_size=16)
+        for item_digest in item_digests:
+            node_hash.update(item_digest)
+        return node_hash.digest()
+    return b's' + json.dumps(value).encode('utf-8')
+
+def find_duplicates(jsondata, path):
+    """ Returns a finding for every list of jsondata holding duplicate items
+    """
+    findings = []
+    _subtree_digest(jsondata, '', path, findings)
+    return findings
+
+def normalise_utterance(utterance):
+    """ Returns the utterance case folded, with whitespace collapsed
+    """
+    return ' '.join(utterance.casefold().split())
+
+def _intent_extract(path, jsondata):
+    if os.path.basename(path) != 'Intent.json' or not isinstance(jsondata, dict):
+        return None
+    utterances = [
+        sample['utterance'] for sample in jsondata.get('sampleUtterances') or []
+        if isinstance(sample, dict) and isinstance(sample.get('utterance'), str)
+    ]
+    return {
+        'name': jsondata.get('name') or os.path.basename(os.path.dirname(path)),
+        'utterances': utterances
+    }
+
+def _compact_digest(data):
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'little')
+
+class _SlotTypeValueChecker():
+    # Sample values used by several slot type values, and synonyms shared
+    # by different sample values, tracked as 64 bit digests
+    def __init__(self, path):
+        self._path = path
+        self._values = set()
+        self._synonyms = {}
+        self._duplicate_values = []
+        self._duplicate_value_count = 0
+        self._shared_synonyms = []
+        self._shared_synonym_count = 0
+
+    @staticmethod
+    def _text(item):
+        if isinstance(item, dict) and isinstance(item.get('value'), str):
+            return item['value']
+        return None
+
+    def add(self, slot_type_value):
+        if not isinstance(slot_type_value, dict):
+            return
+        value = self._text(slot_type_value.get('sampleValue'))
+        if value is None:
+            return
+        value_digest = _compact_digest(value.encode('utf-8'))
+        if value_digest in self._values:
+            self._duplicate_value_count = self._duplicate_value_count + 1
+            if len(self._duplicate_values) < MAX_REPORTED_EXAMPLES:
+                self._duplicate_values.append(value)
+        self._values.add(value_digest)
+        for synonym in slot_type_value.get('synonyms') or []:
+            synonym = self._text(synonym)
+            if synonym is None:
+                continue
+            synonym_digest = _compact_digest(synonym.encode('utf-8'))
+            owner_digest = self._synonyms.setdefault(synonym_digest, value_digest)
+            if owner_digest != value_digest:
+                self._shared_synonym_count = self._shared_synonym_count + 1
+                if len(self._shared_synonyms) < MAX_REPORTED_EXAMPLES:
+                    self._shared_synonyms.append(synonym)
+
+    def findings(self):
+        findings = []
+        if self._duplicate_value_count:
+            findings.append(finding(
+                'duplicate_slot_values', self._path,
+                '{} slot type values repeat the sample value of another value'.format(self._duplicate_value_count),
+                severity=SEVERITY_WARNING,
+                key='slotTypeValues',
+                duplicates=self._duplicate_values
+            ))
+        if self._shared_synonym_count:
+            findings.append(finding(
+                'shared_slot_synonyms', self._path,
+                '{} synonyms are shared by different slot type values'.format(self._shared_synonym_count),
+                severity=SEVERITY_WARNING,
+                key='slotTypeValues',
+                duplicates=self._shared_synonyms
+            ))
+        return findings
+
+def _check_slot_type(path, jsondata):
+    if os.path.basename(path) != 'SlotType.json' or not isinstance(jsondata, dict):
+        return []
+    checker = _SlotTypeValueChecker(path)
+    for slot_type_value in jsondata.get('slotTypeValues') or []:
+        checker.add(slot_type_value)
+    return checker.findings()
+
+def _stream_slot_type_values(reader, path, findings):
+    checker = _SlotTypeValueChecker(path)
+    entry_digests = set()
+    duplicates = []
+    duplicate_count = 0
+    for index, slot_type_value in enumerate(reader.items()):
+        # Same duplicate rule as find_duplicates, nested lists included
+        entry_digest = _compact_digest(_subtree_digest(slot_type_value, f"slotTypeValues[{index}]", path, findings))
+        if entry_digest in entry_digests:
+            duplicate_count = duplicate_count + 1
+            if len(duplicates) < MAX_REPORTED_EXAMPLES:
+                duplicates.append(json.dumps(slot_type_value, sort_keys=True))
+        entry_digests.add(entry_digest)
+        checker.add(slot_type_value)
+    if duplicate_count:
+        findings.append(finding(
+            'duplicate_list_items', path,
+            "duplicates found in key 'slotTypeValues'",
+            key='slotTypeValues',
+            duplicates=duplicates
+        ))
+    findings.extend(checker.findings())
+
+def _validate_slot_type_stream(path, findings):
+    # Returns the sha256 digest of the file, computed while it is parsed
+    file_hash = hashlib.sha256()
+    with open(path, 'rb') as botjsonfile:
+        reader = JsonStreamReader(botjsonfile, on_chunk=file_hash.update)
+        for key in reader.members():
+            if key == 'slotTypeValues' and reader.peek() == '[':
+                _stream_slot_type_values(reader, path, findings)
+            else:
+                _subtree_digest(reader.value(), key, path, findings)
+        reader.end()
+    return file_hash.hexdigest()
+
+def validate_json_file(path):
+    """ Validates one bot definition file
+
+    Module level so that it can run in a worker process. Returns
+    {path, size, digest, elapsed, findings, intent}, where intent holds the
+    name and sample utterances of Intent.json files. SlotType.json files
+    of STREAMING_VALIDATION_THRESHOLD bytes or more are streamed.
+    """
+    started = time.perf_counter()
+    findings = []
+    size = 0
+    digest = None
+    intent = None
+    try:
+        size = os.path.getsize(path)
+        if os.path.basename(path) == 'SlotType.json' and size >= STREAMING_VALIDATION_THRESHOLD:
+            digest = _validate_slot_type_stream(path, findings)
+        else:
+            with open(path, 'rb') as botjsonfile:
+                content = botjsonfile.read()
+            size = len(content)
+            digest = hashlib.sha256(content).hexdigest()
+            jsondata = json.loads(content.decode('utf-8'))
+            findings.extend(find_duplicates(jsondata, path))
+            findings.extend(_check_slot_type(path, jsondata))
+            intent = _intent_extract(path, jsondata)
+    except (OSError, ValueError) as e:
+        del findings[:]
+        findings.append(finding('invalid_json', path, 'failed to parse file : {}'.format(e)))
+    return {
+        'path': path,
+        'size': size,
+        'digest': digest,
+        'elapsed': time.perf_counter() - started,
+        'findings': findings,
+        'intent': intent
+    }
+
+def _locale_intents(file_results):
+    locale_intents = {}
+    for result in file_results:
+        intent = result.get('intent')
+        if intent:
+            # <locale dir>/Intents/<intent dir>/Intent.json
+            locale_dir = os.path.dirname(os.path.dirname(os.path.dirname(result['path'])))
+            locale_intents.setdefault(locale_dir, []).append(intent)
+    return locale_intents
+
+def utterance_collisions(file_results, severity=SEVERITY_WARNING):
+    """ Returns a finding for every sample utterance used by several intents
+
+    Builds one index per locale mapping the normalised utterance to the
+    intents using it, in a single pass over the Intent.json results.
+    Utterances used verbatim by several intents are reported as
+    cross_intent_utterance, the ones only equal once case and whitespace
+    are normalised as cross_intent_utterance_normalised.
+    """
+    locale_indexes = {}
+    for locale_dir, intents in _locale_intents(file_results).items():
+        index = locale_indexes.setdefault(locale_dir, {})
+        for intent in intents:
+            for utterance in intent['utterances']:
+                index.setdefault(normalise_utterance(utterance), {}).setdefault(intent['name'], set()).add(utterance)
+
+    findings = []
+    for locale_dir in sorted(locale_indexes):
+        for normalised, intents in locale_indexes[locale_dir].items():
+            if len(intents) < 2:
+                continue
+            intent_names = sorted(intents)
+            variants = set()
+            exact = False
+            for utterances in intents.values():
+                exact = exact or not variants.isdisjoint(utterances)
+                variants.update(utterances)
+            findings.append(finding(
+                'cross_intent_utterance' if exact else 'cross_intent_utterance_normalised',
+                locale_dir,
+                "utterance '{}' used by intents {}".format(normalised, ', '.join(intent_names)),
+                severity=severity,
+                utterance=normalised,
+                intents=intent_names,
+                variants=sorted(variants)
+            ))
+    return findings
+
+def file_sha256(path, chunk_size=lex_json_stream.STREAM_CHUNK_SIZE):
+    file_hash = hashlib.sha256()
+    with open(path, 'rb') as botjsonfile:
+        for chunk in iter(lambda: botjsonfile.read(chunk_size), b''):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+def _rules_fingerprint():
+    fingerprint = hashlib.sha256('{}|{}|'.format(VALIDATION_RULES_VERSION, STREAMING_VALIDATION_THRESHOLD).encode('utf-8'))
+    for source_path in (__file__, lex_json_stream.__file__):
+        with open(source_path, 'rb') as sourcefile:
+            fingerprint.update(sourcefile.read())
+    return fingerprint.hexdigest()
+
+class LexValidationCache():
+    """Validation results of bot definition files, keyed by file digest
+
+    A file whose size and modification time are unchanged is not read at
+    all. A file whose stat changed but whose sha256 digest did not (e.g.
+    after a fresh git checkout) is read and hashed but not parsed. The
+    whole cache is dropped when the rules fingerprint, i.e. the source of
+    the validation modules and VALIDATION_RULES_VERSION, changes.
+
+    :param path: JSON file holding the cache. If empty, the cache only
+        lives in memory.
+    :type path: str
+    """
+    def __init__(self, path=cache_path('validation.json')):
+        self._store = JsonFileStore(path)
+        self._fingerprint = _rules_fingerprint()
+        self._dirty = False
+
+    @property
+    def _entries(self):
+        data = self._store.data
+        if data.get('rules') != self._fingerprint:
+            if data:
+                logger.info('Validation rules changed, dropping the validation cache')
+            data.clear()
+            data['rules'] = self._fingerprint
+            data['files'] = {}
+            self._dirty = True
+        return data['files']
+
+    def lookup(self, path):
+        """ Returns the cached result of a file if its content is unchanged
+        """
+        with self._store.lock:
+            entry = self._entries.get(path)
+            if entry is None:
+                return None
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return None
+            if entry.get('mtime_ns') == stat.st_mtime_ns and entry['size'] == stat.st_size:
+                return entry
+            if file_sha256(path) != entry['digest']:
+                return None
+            entry['mtime_ns'] = self._trusted_mtime(stat)
+            entry['size'] = stat.st_size
+            self._dirty = True
+            return entry
+
+    @staticmethod
+    def _trusted_mtime(stat):
+        if time.time_ns() - stat.st_mtime_ns < RACY_MTIME_WINDOW_NS:
+            return None
+        return stat.st_mtime_ns
+
+    def store(self, file_result):
+        if file_result['digest'] is None:
+            return
+        try:
+            stat = os.stat(file_result['path'])
+        except OSError:
+            return
+        with self._store.lock:
+            entry = dict(file_result)
+            del entry['elapsed']
+            entry['mtime_ns'] = self._trusted_mtime(stat) if stat.st_size == file_result['size'] else None
+            self._entries[file_result['path']] = entry
+            self._dirty = True
+
+    def prune(self, prefix, paths):
+        """ Drops the entries under prefix that are not in paths
+        """
+        with self._store.lock:
+            entries = self._entries
+            stale_paths = [path for path in entries if path.startswith(prefix) and path not in paths]
+            for path in stale_paths:
+                del entries[path]
+            if stale_paths:
+                self._dirty = True
+
+    def save(self):
+        with self._store.lock:
+            if self._dirty:
+                self._store.save()
+                self._dirty = False
+
+    def clear(self):
+        self._store.clear()
+
+def near_duplicate_utterances(file_results, threshold, severity=SEVERITY_WARNING):
+    """ Returns a finding for every cluster of near-duplicate sample utterances
+
+    Utterances of every intent of a locale are compared with MinHash/LSH on
+    their normalised words, within and across intents. Each distinct
+    normalised utterance is indexed once, so utterances that are equal once
+    normalised are never near duplicates of each other, utterance_collisions
+    reports them. Requires numpy.
+
+    :param threshold: minimum Jaccard similarity of the words of two
+        utterances for them to be near duplicates
+    :type threshold: float
+    """
+    findings = []
+    for locale_dir, intents in sorted(_locale_intents(file_results).items()):
+        index = LexMinHashIndex(threshold=threshold)
+        positions = {}
+        entries = []
+        indexed = set()
+        for intent in intents:
+            for utterance in intent['utterances']:
+                normalised = normalise_utterance(utterance)
+                if (intent['name'], normalised) in indexed:
+                    continue
+                indexed.add((intent['name'], normalised))
+                if normalised not in positions:
+                    positions[normalised] = index.add(normalised)
+                    entries.append([])
+                entries[positions[normalised]].append({'intent': intent['name'], 'utterance': utterance})
+        for cluster in index.clusters():
+            utterances = sorted(
+                (entry for position in cluster for entry in entries[position]),
+                key=lambda entry: (entry['intent'], entry['utterance'])
+            )
+            intent_names = sorted({entry['intent'] for entry in utterances})
+            findings.append(finding(
+                'near_duplicate_utterances',
+                locale_dir,
+                "{} near duplicate utterances in intents {}".format(len(utterances), ', '.join(intent_names)),
+                severity=severity,
+                intents=intent_names,
+                utterances=utterances
+            ))
+    return findings
+
+class LexValidationReport():
+    """Findings and timings of one validation run
+
+    :param file_results: results of validate_json_file, one per file
+    :type file_results: list
+
+    :param elapsed: wall time of the run in seconds
+    :type elapsed: float
+
+    :param workers: number of worker processes used, 0 when run inline
+    :type workers: int
+
+    :param cached: number of file results taken from the validation cache
+    :type cached: int
+    """
+    def __init__(self, file_results, elapsed, workers, cached=0):
+        self._file_results = file_results
+        self._elapsed = elapsed
+        self._workers = workers
+        self._cached = cached
+        self._findings = [item for result in file_results for item in result['findings']]
+
+    @property
+    def findings(self):
+        return self._findings
+
+    @property
+    def errors(self):
+        return [item for item in self._findings if item['severity'] == SEVERITY_ERROR]
+
+    @property
+    def warnings(self):
+        return [item for item in self._findings if item['severity'] == SEVERITY_WARNING]
+
+    @property
+    def file_results(self):
+        return self._file_results
+
+    @property
+    def elapsed(self):
+        return self._elapsed
+
+    def add_findings(self, findings):
+        self._findings.extend(findings)
+
+    def summary(self):
+        return {
+            'files': len(self._file_results),
+            'bytes': sum(result['size'] for result in self._file_results),
+            'errors': len(self.errors),
+            'warnings': len(self.warnings),
+            'elapsed': round(self._elapsed, 3),
+            'workers': self._workers,
+            'cached': self._cached
+        }
+
+    def timing_report(self, slowest=5):
+        """ Returns the timing report as a list of lines
+        """
+        summary = self.summary()
+        lines = [
+            'Validated {} files ({} bytes, {} cached) in {:.3f}s using {}'.format(
+                summary['files'], summary['bytes'], self._cached, self._elapsed,
+                '{} worker processes'.format(self._workers) if self._workers else 'the main process'
+            ),
+            'Time spent in files : {:.3f}s'.format(sum(result.get('elapsed', 0) for result in self._file_results))
+        ]
+        validated = [result for result in self._file_results if 'elapsed' in result]
+        for result in sorted(validated, key=lambda result: result['elapsed'], reverse=True)[:slowest]:
+            lines.append('  {:.3f}s {:>10} bytes {}'.format(result['elapsed'], result['size'], result['path']))
+        return lines
+
+class LexBotValidationEngine():
+    """Validates every file of a bot definition tree
+
+    Files are validated in the main process below parallel_threshold files
+    and in a process pool above it, where parsing and hashing are CPU bound
+    and the pool start up cost pays off. Every finding is collected; it is
+    up to the caller to decide what to raise.
+
+    :param max_workers: maximum number of worker processes
+    :type max_workers: int
+
+    :param parallel_threshold: minimum number of files validated in a
+        process pool
+    :type parallel_threshold: int
+
+    :param cache: validation cache of unchanged files, None to validate
+        every file
+    :type cache: LexValidationCache
+
+    :param utterance_collision_severity: severity of the findings of
+        utterances shared by several intents, None to skip the check
+    :type utterance_collision_severity: str
+
+    :param near_duplicate_threshold: Jaccard similarity above which sample
+        utterances are reported as near duplicates, None to skip the check
+    :type near_duplicate_threshold: float
+    """
+    def __init__(
+            self,
+            max_workers=MAX_VALIDATION_WORKERS,
+            parallel_threshold=PARALLEL_VALIDATION_THRESHOLD,
+            cache=None,
+            utterance_collision_severity=SEVERITY_WARNING,
+            near_duplicate_threshold=None,
+        ):
+        self._max_workers = max_workers
+        self._parallel_threshold = parallel_threshold
+        self._cache = cache
+        self._utterance_collision_severity = utterance_collision_severity
+        self._near_duplicate_threshold = near_duplicate_threshold
+
+    @staticmethod
+    def tree_files(bot_dir):
+        filepaths = []
+        for root, dirs, files in os.walk(bot_dir):
+            for filename in files:
+                filepaths.append(os.path.join(root, filename))
+        filepaths.sort()
+        return filepaths
+
+    def _validate_in_pool(self, filepaths, workers):
+        chunksize = max(1, len(filepaths) // (workers * 4))
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(validate_json_file, filepaths, chunksize=chunksize))
+
+    def validate_files(self, filepaths):
+        """ Validates a list of files and returns a LexValidationReport
+        """
+        started = time.perf_counter()
+        cached_results = {}
+        if self._cache is not None:
+            for filepath in filepaths:
+                entry = self._cache.lookup(filepath)
+                if entry is not None:
+                    cached_results[filepath] = entry
+        changed_filepaths = [filepath for filepath in filepaths if filepath not in cached_results]
+        workers = min(self._max_workers, len(changed_filepaths))
+        file_results = None
+        if workers > 1 and len(changed_filepaths) >= self._parallel_threshold:
+            try:
+                file_results = self._validate_in_pool(changed_filepaths, workers)
+            except (OSError, NotImplementedError, concurrent.futures.process.BrokenProcessPool) as e:
+                logger.warning('Process pool unavailable, validating in the main process : {}'.format(e))
+        if file_results is None:
+            workers = 0
+            file_results = [validate_json_file(filepath) for filepath in changed_filepaths]
+        if self._cache is not None:
+            for file_result in file_results:
+                self._cache.store(file_result)
+            self._cache.save()
+        file_results = file_results + list(cached_results.values())
+        file_results.sort(key=lambda result: result['path'])
+        report = LexValidationReport(file_results, time.perf_counter() - started, workers, cached=len(cached_results))
+        if self._utterance_collision_severity:
+            report.add_findings(utterance_collisions(file_results, self._utterance_collision_severity))
+        if self._near_duplicate_threshold:
+            near_duplicates_started = time.perf_counter()
+            report.add_findings(near_duplicate_utterances(file_results, self._near_duplicate_threshold))
+            logger.info('Near duplicate utterance detection took {:.3f}s'.format(time.perf_counter() - near_duplicates_started))
+        if len(filepaths) >= TIMING_REPORT_THRESHOLD:
+            for line in report.timing_report():
+                logger.info(line)
+        return report
+
+    def validate_tree(self, bot_dir):
+        filepaths = self.tree_files(bot_dir)
+        if self._cache is not None:
+            self._cache.prune(bot_dir, set(filepaths))
+        return self.validate_files(filepaths)
@@ -0,0 +1,333 @@
+#!/usr/bin/env python
+
+##########################################################################
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this
+# software and associated documentation files (the "Software"), to deal in the Software
+# without restriction, including without limitation the rights to use, copy, modify,
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+##########################################################################
+""" Adaptive waiters for Lex Model Building Service operations
+
+Replaces the fixed-delay botocore waiters with short first polls,
+exponential backoff with jitter and per-operation deadlines. Every
+completed wait is recorded so later waits for the same bot start polling
+around the time the operation usually finishes.
+"""
+import asyncio
+import logging
+import random
+import statistics
+import time
+from botocore.exceptions import ClientError
+from lex_cache import JsonFileStore, cache_path
+from lex_concurrency import run_blocking
+
+logger = logging.getLogger('lex_utils_v2').getChild(__name__)
+
+class LexWaiterError(Exception):
+    """Raised when a waited-on operation fails or misses its deadline
+    """
+    def __init__(self, waiter_name, reason, last_response=None):
+        super().__init__('Waiter {} failed: {}'.format(waiter_name, reason))
+        self.waiter_name = waiter_name
+        self.reason = reason
+        self.last_response = last_response
+
+class LexWaiterSpec():
+    """Describes how to poll one Lex operation until it completes
+
+    :param operation: lexv2-models client method used to poll
+    :param status_key: response key holding the status
+    :param success: statuses that end the wait successfully
+    :param failure: statuses that end the wait with an error
+    :param deadline: default deadline of the wait, in seconds
+    :param retry_not_found: keep polling on ResourceNotFoundException
+    :param grace_period: seconds during which failure statuses are still
+        polled, for resources that report a stale status right after the
+        operation is started
+    """
+    def __init__(self, operation, status_key, success, failure, deadline, retry_not_found=False, grace_period=0):
+        self.operation = operation
+        self.status_key = status_key
+        self.success = frozenset(success)
+        self.failure = frozenset(failure)
+        self.deadline = deadline
+        self.retry_not_found = retry_not_found
+        self.grace_period = grace_period
+
+LEX_WAITER_SPECS = {
+    'bot_available': LexWaiterSpec(
+        'describe_bot', 'botStatus',
+        success=('Available',),
+        failure=('Deleting', 'Failed', 'Inactive'),
+        deadline=300
+    ),
+    'bot_export_completed': LexWaiterSpec(
+        'describe_export', 'exportStatus',
+        success=('Completed',),
+        failure=('Deleting', 'Failed'),
+        deadline=600
+    ),
+    'bot_import_completed': LexWaiterSpec(
+        'describe_import', 'importStatus',
+        success=('Completed',),
+        failure=('Deleting', 'Failed'),
+        deadline=900
+    ),
+    'bot_locale_built': LexWaiterSpec(
+        'describe_bot_locale', 'botLocaleStatus',
+        success=('Built',),
+        failure=('Deleting', 'Failed', 'NotBuilt'),
+        deadline=1800,
+        grace_period=10
+    ),
+    'bot_version_available': LexWaiterSpec(
+        'describe_bot_version', 'botStatus',
+        success=('Available',),
+        failure=('Deleting', 'Failed'),
+        deadline=900,
+        retry_not_found=True
+    ),
+}
+
+class LexWaitHistory():
+    """Durations of completed waits, keyed by waiter name and resource
+
+    Only the most recent samples are kept. The history is persisted to
+    the local cache so that consecutive runs for the same bot learn from
+    each other.
+
+    :param path: JSON file to persist the history to. If empty, the
+        history is only kept in memory.
+    :type path: str
+    """
+    def __init__(self, path=None, max_samples=10):
+        self._store = JsonFileStore(path)
+        self._max_samples = max_samples
+
+    @staticmethod
+    def _key(waiter_name, history_key):
+        return '{}|{}'.format(waiter_name, history_key)
+
+    def record(self, waiter_name, history_key, duration):
+        with self._store.lock:
+            samples = self._store.data.setdefault(self._key(waiter_name, history_key), [])
+            samples.append(round(duration, 3))
+            del samples[:-self._max_samples]
+            self._store.save()
+
+    def samples(self, waiter_name, history_key):
+        with self._store.lock:
+            return list(self._store.data.get(self._key(waiter_name, history_key), []))
+
+    def expected_duration(self, waiter_name, history_key):
+        """ Returns the median duration of past waits, or None
+        """
+        samples = self.samples(waiter_name, history_key)
+        if not samples:
+            return None
+        return statistics.median(samples)
+
+_wait_history = LexWaitHistory(cache_path('waiter_history.json'))
+
+def get_wait_history():
+    return _wait_history
+
+class LexWaiter():
+    """Polls a Lex resource with backoff until it reaches a final status
+
+    The first poll happens after min_delay seconds, or shortly before the
+    expected completion time when earlier waits for the same history key
+    were recorded. Later polls back off exponentially up to max_delay,
+    with jitter so that concurrent waits do not poll in lockstep.
+
+    :param client: lexv2-models boto3 client
+    :param waiter_name: one of LEX_WAITER_SPECS, e.g. bot_locale_built
+    :type waiter_name: str
+
+    :param deadline: seconds before the wait is abandoned. Defaults to the
+        deadline of the waiter spec.
+    :type deadline: int
+
+    :param status_callback: called after every poll as
+        callback(waiter_name, status, elapsed, attempt)
+    :type status_callback: callable
+
+    :param history: wait history to learn from. Defaults to the shared one.
+    :type history: LexWaitHistory
+
+    :param clock: monotonic clock, in seconds
+    :type clock: callable
+
+    :param sleep: sleep function of wait
+    :type sleep: callable
+
+    :param async_sleep: sleep coroutine function of wait_async
+    :type async_sleep: callable
+
+    :param rng: random number generator of the jitter
+    :type rng: random.Random
+    """
+    def __init__(
+            self,
+            client,
+            waiter_name,
+            min_delay=1,
+            max_delay=20,
+            backoff=1.5,
+            jitter=0.2,
+            deadline=None,
+            status_callback=None,
+            history=None,
+            clock=time.monotonic,
+            sleep=time.sleep,
+            async_sleep=asyncio.sleep,
+            rng=None
+        ):
+        self._client = client
+        self._waiter_name = waiter_name
+        self._spec = LEX_WAITER_SPECS[waiter_name]
+        self._min_delay = min_delay
+        self._max_delay = max_delay
+        self._backoff = backoff
+        self._jitter = jitter
+        self._deadline = deadline or self._spec.deadline
+        self._status_callback = status_callback
+        self._history = history or _wait_history
+        self._clock = clock
+        self._sleep = sleep
+        self._async_sleep = async_sleep
+        self._rng = rng or random
+        self._last_duration = None
+
+    @property
+    def waiter_name(self):
+        return self._waiter_name
+
+    @property
+    def last_duration(self):
+        return self._last_duration
+
+    def delays(self, history_key=None):
+        """ Yields the delay before each poll, without jitter applied
+        """
+        delay = self._min_delay
+        expected = None
+        if history_key:
+            expected = self._history.expected_duration(self._waiter_name, history_key)
+        if expected:
+            # first poll slightly before the usual completion time
+            yield min(max(expected * 0.8, self._min_delay), self._max_delay)
+            # then poll closely around it
+            delay = max(self._min_delay, min(expected * 0.1, self._max_delay))
+        while True:
+            yield delay
+            delay = min(delay * self._backoff, self._max_delay)
+
+    def _jittered(self, delay):
+        return max(0.0, delay * self._rng.uniform(1 - self._jitter, 1 + self._jitter))
+
+    def _poll(self, kwargs):
+        try:
+            return getattr(self._client, self._spec.operation)(**kwargs)
+        except ClientError as e:
+            if (self._spec.retry_not_found
+                    and e.response.get('Error', {}).get('Code') == 'ResourceNotFoundException'):
+                return None
+            raise
+
+    def _status(self, response, elapsed, attempt):
+        status = response.get(self._spec.status_key) if response is not None else None
+        if self._status_callback:
+            try:
+                self._status_callback(self._waiter_name, status, elapsed, attempt)
+            except Exception as e:
+                logger.warning('Waiter status callback failed : {}'.format(e))
+        return status
+
+    def _next_delay(self, start, delays, response):
+        remaining = self._deadline - (self._clock() - start)
+        if remaining <= 0:
+            raise LexWaiterError(
+                self._waiter_name,
+                'deadline of {}s exceeded'.format(self._deadline),
+                response
+            )
+        return min(self._jittered(next(delays)), remaining)
+
+    def _completed(self, start, attempt, response, history_key):
+        """ Returns whether the wait is over, raises on failure statuses
+        """
+        elapsed = self._clock() - start
+        status = self._status(response, elapsed, attempt)
+        logger.info('Waiter {} attempt {} status {} after {:.1f}s'.format(
+            self._waiter_name, attempt, status, elapsed
+        ))
+        if status in self._spec.success:
+            self._last_duration = elapsed
+            if history_key:
+                self._history.record(self._waiter_name, history_key, elapsed)
+            return True
+        if status in self._spec.failure and elapsed >= self._spec.grace_period:
+            raise LexWaiterError(
+                self._waiter_name,
+                'resource reached status {} : {}'.format(
+                    status, response.get('failureReasons', [])
+                ),
+                response
+            )
+        return False
+
+    def wait(self, history_key=None, **kwargs):
+        """ Polls until the resource reaches a success or failure status
+
+        :param history_key: key under which the duration is recorded and
+            looked up, e.g. the bot name. If empty, nothing is learned.
+        :type history_key: str
+
+        :param kwargs: arguments of the describe call, e.g. exportId
+
+        :returns: the last describe response
+        :rtype: dict
+        """
+        start = self._clock()
+        delays = self.delays(history_key)
+        attempt = 0
+        response = None
+        while True:
+            self._sleep(self._next_delay(start, delays, response))
+            attempt = attempt + 1
+            response = self._poll(kwargs)
+            if self._completed(start, attempt, response, history_key):
+                return response
+
+    async def wait_async(self, history_key=None, **kwargs):
+        """ Same as wait, sleeping with asyncio between polls
+
+        Only the describe calls run on a thread, so a single event loop
+        can wait on many operations at the same time.
+        """
+        start = self._clock()
+        delays = self.delays(history_key)
+        attempt = 0
+        response = None
+        while True:
+            await self._async_sleep(self._next_delay(start, delays, response))
+            attempt = attempt + 1
+            response = await run_blocking(self._poll, kwargs)
+            if self._completed(start, attempt, response, history_key):
+                return response
+
+def get_waiter(client, waiter_name, **kwargs):
+    return LexWaiter(client, waiter_name, **kwargs)
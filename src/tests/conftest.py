@@ -0,0 +1,70 @@
+import functools
+import json
+import os
+import sys
+import tempfile
+
+import pytest
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCHMARK_DIR = os.path.join(os.path.dirname(SRC_DIR), 'benchmark')
+DIALOGUE_LAMBDA_DIR = os.path.join(SRC_DIR, 'dialogue_lambda')
+
+# The lex_* modules read their cache directory when they are imported, keep
+# it out of the working tree. No test calls AWS, the region only lets boto3
+# clients be created.
+os.environ.setdefault('LEX_MGMT_CACHE_DIR', tempfile.mkdtemp(prefix='lex-tests-'))
+os.environ.setdefault('AWS_DEFAULT_REGION', 'eu-west-2')
+sys.path[:0] = [SRC_DIR, BENCHMARK_DIR, DIALOGUE_LAMBDA_DIR]
+
+@pytest.fixture
+def write_json():
+    """ Writes data as indented JSON to path, creating its directory
+    """
+    def write(path, data, indent=4):
+        os.makedirs(os.path.dirname(str(path)), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as jsonfile:
+            json.dump(data, jsonfile, indent=indent)
+        return str(path)
+    return write
+
+@pytest.fixture
+def lex_service(tmp_path, monkeypatch):
+    """ Serves lexv2-models from the in-process stand-in of the benchmark
+
+    Runs in tmp_path, which holds lex_bots, with operations completing
+    right away and waiters polling without delay. The shared clients and
+    caches are dropped afterwards.
+    """
+    import boto3
+    import fake_lex_service
+    import lex_clients
+    import lex_utils_v2
+    from lex_cache import cache_path, get_resolution_cache
+    from lex_stacks import get_stack_output_cache
+    service = fake_lex_service.FakeLexModelsService(fake_lex_service.FakeLexConfig(
+        api_latency=0,
+        operation_seconds=0
+    )).start()
+    lex_client = boto3.session.Session().client(
+        'lexv2-models',
+        region_name='eu-west-2',
+        aws_access_key_id='testing',
+        aws_secret_access_key='testing',
+        config=lex_clients.DEFAULT_CLIENT_CONFIG
+    )
+    service.attach(lex_client)
+    lex_clients.register_client('lexv2-models', lex_client)
+    lex_clients.register_client('sts', fake_lex_service.FakeSTSClient())
+    lex_clients.register_client('iam', fake_lex_service.FakeIAMClient())
+    lex_clients.register_client('cloudformation', fake_lex_service.FakeCloudFormationClient())
+    monkeypatch.setattr(lex_utils_v2, 'get_waiter', functools.partial(lex_utils_v2.get_waiter, min_delay=0.01))
+    monkeypatch.chdir(tmp_path)
+    yield service
+    service.stop()
+    lex_clients.get_client_registry().clear()
+    get_resolution_cache().clear()
+    get_stack_output_cache().invalidate()
+    # bot ids repeat across services, drop the deployment states recorded locally
+    if os.path.exists(cache_path('import_manifest.json')):
+        os.remove(cache_path('import_manifest.json'))
@@ -0,0 +1,78 @@
+from intent_router import ANY, DIALOG_CODE_HOOK, FULFILLMENT_CODE_HOOK, IntentRouter, LexRequest
+
+def handler(name):
+    def handle(request):
+        return name
+    handle.__name__ = name
+    return handle
+
+def event(intent_name, invocation_source):
+    return {
+        'bot': {'name': 'TicketBot'},
+        'invocationSource': invocation_source,
+        'inputTranscript': 'hello',
+        'sessionState': {
+            'intent': {'name': intent_name, 'slots': {'Size': None}},
+            'sessionAttributes': {'ticket': '42'},
+        },
+    }
+
+def routes():
+    return {
+        ('Order', DIALOG_CODE_HOOK): handler('order_dialog'),
+        ('Order', ANY): handler('order_any'),
+        (ANY, DIALOG_CODE_HOOK): handler('any_dialog'),
+    }
+
+def test_exact_route_wins():
+    router = IntentRouter(routes(), default_handler=handler('default'))
+    assert router.dispatch(event('Order', DIALOG_CODE_HOOK)) == 'order_dialog'
+
+def test_intent_route_wins_over_source_route():
+    router = IntentRouter(routes(), default_handler=handler('default'))
+    assert router.dispatch(event('Order', FULFILLMENT_CODE_HOOK)) == 'order_any'
+
+def test_source_route_wins_over_default():
+    router = IntentRouter(routes(), default_handler=handler('default'))
+    assert router.dispatch(event('Cancel', DIALOG_CODE_HOOK)) == 'any_dialog'
+
+def test_unmatched_request_falls_back_to_default():
+    router = IntentRouter(routes(), default_handler=handler('default'))
+    assert router.dispatch(event('Cancel', FULFILLMENT_CODE_HOOK)) == 'default'
+    assert router.dispatch({}) == 'default'
+
+def test_added_route_replaces_memoised_resolution():
+    router = IntentRouter(routes(), default_handler=handler('default'))
+    assert router.resolve('Cancel', FULFILLMENT_CODE_HOOK)(None) == 'default'
+
+    @router.route('Cancel')
+    def cancel(request):
+        return 'cancel'
+
+    assert router.resolve('Cancel', FULFILLMENT_CODE_HOOK) is cancel
+    assert router.resolve('Order', FULFILLMENT_CODE_HOOK)(None) == 'order_any'
+
+def test_handler_receives_request_fields():
+    requests = []
+    router = IntentRouter({}, default_handler=requests.append)
+    router.dispatch(event('Order', DIALOG_CODE_HOOK))
+
+    request, = requests
+    assert isinstance(request, LexRequest)
+    assert request.intent_name == 'Order'
+    assert request.invocation_source == DIALOG_CODE_HOOK
+    assert request.slots == {'Size': None}
+    assert request.session_attributes == {'ticket': '42'}
+    assert request.input_transcript == 'hello'
+
+def test_lambda_handler_routes():
+    import main
+
+    dialog = main.lambda_handler(event('Order', DIALOG_CODE_HOOK), None)
+    fulfillment = main.lambda_handler(event('Order', FULFILLMENT_CODE_HOOK), None)
+    fallback = main.lambda_handler(event('Order', 'Unknown'), None)
+
+    assert dialog['messages'][0]['content'] == 'Intent identified as Order'
+    assert fulfillment['messages'][0]['content'] == 'End of query'
+    assert fallback['messages'][0]['content'] == 'End of query'
+    assert dialog['sessionState']['sessionAttributes'] == {'ticket': '42'}
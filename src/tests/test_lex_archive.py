@@ -0,0 +1,81 @@
+import io
+import json
+import os
+import time
+import zipfile
+
+from lex_archive import LexBotArchiveBuilder
+
+def write_bot(write_json, root_dir):
+    bot_dir = os.path.join(root_dir, 'OrderBot')
+    write_json(os.path.join(bot_dir, 'Bot.json'), {'name': 'OrderBot', 'idleSessionTTLInSeconds': 300})
+    for locale_id in ('en_GB', 'fr_FR'):
+        write_json(os.path.join(bot_dir, 'BotLocales', locale_id, 'BotLocale.json'), {'identifier': locale_id})
+        write_json(os.path.join(bot_dir, 'BotLocales', locale_id, 'Intents', 'Order', 'Intent.json'), {'name': 'Order'})
+    manifest_path = write_json(os.path.join(root_dir, 'Manifest.json'), {'metadata': {'resourceType': 'BOT'}})
+    return bot_dir, manifest_path
+
+def read_archive(archive_path):
+    with open(archive_path, 'rb') as archivefile:
+        return archivefile.read()
+
+def archive_entries(archive_path):
+    with zipfile.ZipFile(io.BytesIO(read_archive(archive_path))) as botzipfile:
+        return {name: botzipfile.read(name) for name in botzipfile.namelist()}
+
+def test_archive_bytes_identical_across_builds(tmp_path, write_json):
+    bot_dir, manifest_path = write_bot(write_json, str(tmp_path))
+    first = LexBotArchiveBuilder(cache_dir=str(tmp_path / 'first')).build(bot_dir, manifest_path, 'dev-OrderBot', 'digest')
+    # new timestamps on every file must not change the archive
+    later = time.time() + 3600
+    for root, dirs, files in os.walk(bot_dir):
+        for filename in files:
+            os.utime(os.path.join(root, filename), (later, later))
+    second = LexBotArchiveBuilder(cache_dir=str(tmp_path / 'second')).build(bot_dir, manifest_path, 'dev-OrderBot', 'digest')
+    assert first != second
+    assert read_archive(first) == read_archive(second)
+
+def test_archive_renames_bot_in_memory(tmp_path, write_json):
+    bot_dir, manifest_path = write_bot(write_json, str(tmp_path))
+    archive_path = LexBotArchiveBuilder(cache_dir=str(tmp_path / 'cache')).build(bot_dir, manifest_path, 'dev-OrderBot', 'digest')
+    entries = archive_entries(archive_path)
+    assert sorted(entries) == [
+        'Manifest.json',
+        'dev-OrderBot/Bot.json',
+        'dev-OrderBot/BotLocales/en_GB/BotLocale.json',
+        'dev-OrderBot/BotLocales/en_GB/Intents/Order/Intent.json',
+        'dev-OrderBot/BotLocales/fr_FR/BotLocale.json',
+        'dev-OrderBot/BotLocales/fr_FR/Intents/Order/Intent.json',
+    ]
+    assert json.loads(entries['dev-OrderBot/Bot.json'])['name'] == 'dev-OrderBot'
+    with open(os.path.join(bot_dir, 'Bot.json')) as botfile:
+        assert json.load(botfile)['name'] == 'OrderBot'
+
+def test_locale_archive_holds_only_the_locale(tmp_path, write_json):
+    bot_dir, manifest_path = write_bot(write_json, str(tmp_path))
+    archive_path = LexBotArchiveBuilder(cache_dir=str(tmp_path / 'cache')).build_locale(bot_dir, 'dev-OrderBot', 'fr_FR', 'digest')
+    entries = archive_entries(archive_path)
+    assert sorted(entries) == [
+        'Manifest.json',
+        'dev-OrderBot/BotLocales/fr_FR/BotLocale.json',
+        'dev-OrderBot/BotLocales/fr_FR/Intents/Order/Intent.json',
+    ]
+    assert json.loads(entries['Manifest.json'])['metadata']['resourceType'] == 'BOT_LOCALE'
+
+def test_archive_reused_by_digest_and_bot_name(tmp_path, write_json):
+    bot_dir, manifest_path = write_bot(write_json, str(tmp_path))
+    builder = LexBotArchiveBuilder(cache_dir=str(tmp_path / 'cache'))
+    archive_path = builder.build(bot_dir, manifest_path, 'dev-OrderBot', 'digest')
+    assert builder.build(bot_dir, manifest_path, 'dev-OrderBot', 'digest') == archive_path
+    assert builder.build(bot_dir, manifest_path, 'prod-OrderBot', 'digest') != archive_path
+    assert builder.build(bot_dir, manifest_path, 'dev-OrderBot', 'other digest') != archive_path
+
+def test_eviction_keeps_archives_returned_in_this_process(tmp_path, write_json):
+    bot_dir, manifest_path = write_bot(write_json, str(tmp_path))
+    cache_dir = str(tmp_path / 'cache')
+    earlier_run = LexBotArchiveBuilder(cache_dir=cache_dir, max_cached=1).build(bot_dir, manifest_path, 'old-OrderBot', 'digest')
+    os.utime(earlier_run, (0, 0))
+    builder = LexBotArchiveBuilder(cache_dir=cache_dir, max_cached=1)
+    archive_paths = [builder.build(bot_dir, manifest_path, 'bot{}-OrderBot'.format(index), 'digest') for index in range(3)]
+    assert all(os.path.exists(archive_path) for archive_path in archive_paths)
+    assert not os.path.exists(earlier_run)
@@ -0,0 +1,137 @@
+import json
+
+import pytest
+
+from lex_batch import LexBatchError, LexBatchRunner, load_manifest
+
+class Operations():
+    def __init__(self, failing=()):
+        self.calls = []
+        self._failing = set(failing)
+
+    def operation(self, name):
+        def run(bot_name, environment='dev', ticket=''):
+            self.calls.append((name, bot_name, environment, ticket))
+            if bot_name in self._failing:
+                raise Exception('{} of {} failed'.format(name, bot_name))
+            return '{}-{}'.format(environment, bot_name)
+        return run
+
+    def runner(self):
+        return LexBatchRunner({name: self.operation(name) for name in ('create', 'import', 'delete')})
+
+def step_ids(steps):
+    return [step.step_id for step in steps]
+
+def test_parse_keeps_manifest_order_of_ready_steps():
+    steps = Operations().runner().parse({'operations': [
+        {'id': 'import-a', 'operation': 'import', 'bot_name': 'A', 'depends_on': ['create-a']},
+        {'id': 'create-a', 'operation': 'create', 'bot_name': 'A'},
+        {'id': 'create-b', 'operation': 'create', 'bot_name': 'B'},
+        {'id': 'import-b', 'operation': 'import', 'bot_name': 'B', 'depends_on': 'create-b'},
+    ]})
+    assert step_ids(steps) == ['create-a', 'create-b', 'import-a', 'import-b']
+    assert steps[3].depends_on == ['create-b']
+
+def test_parse_applies_defaults_and_default_ids():
+    steps = Operations().runner().parse({
+        'defaults': {'environment': 'prod', 'bot_alias_name': 'live'},
+        'operations': [
+            {'operation': 'create', 'bot_name': 'A'},
+            {'operation': 'import', 'bot_name': 'A', 'environment': 'test'},
+        ]
+    })
+    assert step_ids(steps) == ['create-1', 'import-2']
+    assert steps[0].kwargs == {'environment': 'prod', 'bot_name': 'A'}
+    assert steps[1].kwargs == {'environment': 'test', 'bot_name': 'A'}
+
+@pytest.mark.parametrize('operations, message', [
+    ([
+        {'id': 'a', 'operation': 'create', 'bot_name': 'A', 'depends_on': ['b']},
+        {'id': 'b', 'operation': 'create', 'bot_name': 'B', 'depends_on': ['a']},
+    ], 'dependency cycle'),
+    ([{'id': 'a', 'operation': 'create', 'bot_name': 'A', 'depends_on': ['a']}], 'dependency cycle'),
+    ([{'id': 'a', 'operation': 'create', 'bot_name': 'A', 'depends_on': ['b']}], 'unknown step b'),
+    ([
+        {'id': 'a', 'operation': 'create', 'bot_name': 'A'},
+        {'id': 'a', 'operation': 'import', 'bot_name': 'A'},
+    ], 'duplicate step id a'),
+    ([{'id': 'a', 'operation': 'export', 'bot_name': 'A'}], 'unknown operation export'),
+    ([{'id': 'a', 'operation': 'create', 'bot_name': 'A', 'lambda_arn': 'arn'}], 'unknown argument lambda_arn'),
+    ([{'id': 'a', 'bot_name': 'A'}], 'no operation key'),
+])
+def test_parse_rejects_invalid_manifests(operations, message):
+    with pytest.raises(LexBatchError, match=message):
+        Operations().runner().parse({'operations': operations})
+
+def test_invalid_manifest_runs_nothing():
+    operations = Operations()
+    with pytest.raises(LexBatchError):
+        operations.runner().run({'operations': [
+            {'id': 'a', 'operation': 'create', 'bot_name': 'A'},
+            {'id': 'b', 'operation': 'create', 'bot_name': 'B', 'depends_on': ['c']},
+        ]})
+    assert operations.calls == []
+
+def test_run_returns_results_in_execution_order():
+    operations = Operations()
+    results = operations.runner().run({'operations': [
+        {'id': 'import-a', 'operation': 'import', 'bot_name': 'A', 'depends_on': ['create-a']},
+        {'id': 'create-a', 'operation': 'create', 'bot_name': 'A'},
+    ]})
+    assert [(result['id'], result['status'], result['result']) for result in results] == [
+        ('create-a', 'succeeded', 'dev-A'),
+        ('import-a', 'succeeded', 'dev-A'),
+    ]
+    assert operations.calls == [('create', 'A', 'dev', ''), ('import', 'A', 'dev', '')]
+
+MANIFEST_WITH_FAILURE = [
+    {'id': 'create-a', 'operation': 'create', 'bot_name': 'A'},
+    {'id': 'create-b', 'operation': 'create', 'bot_name': 'B'},
+    {'id': 'import-a', 'operation': 'import', 'bot_name': 'A', 'depends_on': ['create-a']},
+    {'id': 'delete-a', 'operation': 'delete', 'bot_name': 'A', 'depends_on': ['import-a']},
+]
+
+def test_failed_step_skips_the_rest():
+    operations = Operations(failing=['A'])
+    results = operations.runner().run({'operations': MANIFEST_WITH_FAILURE})
+    assert [(result['id'], result['status']) for result in results] == [
+        ('create-a', 'failed'),
+        ('create-b', 'skipped'),
+        ('import-a', 'skipped'),
+        ('delete-a', 'skipped'),
+    ]
+    assert results[0]['error'] == 'create of A failed'
+    assert operations.calls == [('create', 'A', 'dev', '')]
+
+def test_continue_on_error_skips_only_dependents():
+    operations = Operations(failing=['A'])
+    results = operations.runner().run({'continue_on_error': True, 'operations': MANIFEST_WITH_FAILURE})
+    assert [(result['id'], result['status']) for result in results] == [
+        ('create-a', 'failed'),
+        ('create-b', 'succeeded'),
+        ('import-a', 'skipped'),
+        ('delete-a', 'skipped'),
+    ]
+    assert results[2]['error'] == 'dependency create-a did not succeed'
+    assert results[3]['error'] == 'dependency import-a did not succeed'
+
+def test_load_manifest_json(tmp_path):
+    manifest = {'defaults': {'environment': 'dev'}, 'operations': [{'operation': 'create', 'bot_name': 'A'}]}
+    path = tmp_path / 'manifest.json'
+    path.write_text(json.dumps(manifest))
+    assert load_manifest(str(path)) == manifest
+
+def test_load_manifest_yaml(tmp_path):
+    pytest.importorskip('yaml')
+    path = tmp_path / 'manifest.yaml'
+    path.write_text('defaults:\n  environment: dev\noperations:\n  - operation: create\n    bot_name: A\n')
+    assert load_manifest(str(path)) == {'defaults': {'environment': 'dev'}, 'operations': [{'operation': 'create', 'bot_name': 'A'}]}
+
+def test_run_file(tmp_path):
+    path = tmp_path / 'manifest.json'
+    path.write_text(json.dumps({'operations': [{'operation': 'create', 'bot_name': 'A', 'ticket': 'T-1'}]}))
+    operations = Operations()
+    results = operations.runner().run_file(str(path))
+    assert [result['status'] for result in results] == ['succeeded']
+    assert operations.calls == [('create', 'A', 'dev', 'T-1')]
@@ -0,0 +1,72 @@
+from types import SimpleNamespace
+
+import pytest
+from botocore.exceptions import ClientError
+
+from lex_cache import get_resolution_cache
+from lex_clients import get_client_registry, register_client
+from lex_utils_v2 import LexBotDeploymentState, LexBotGetter
+
+BOT_ID = 'BOTID00001'
+
+class FakeLexClient():
+    def __init__(self, region_name, tags_error=None):
+        self.meta = SimpleNamespace(region_name=region_name)
+        self._tags_error = tags_error
+        self.tags = {}
+
+    def list_bots(self, **kwargs):
+        return {'botSummaries': [{'botId': BOT_ID, 'botName': 'dev-OrderBot', 'latestBotVersion': '1'}]}
+
+    def list_bot_locales(self, **kwargs):
+        return {'botLocaleSummaries': []}
+
+    def list_tags_for_resource(self, resourceARN):
+        if self._tags_error:
+            raise ClientError({'Error': {'Code': self._tags_error, 'Message': 'denied'}}, 'ListTagsForResource')
+        return {'tags': dict(self.tags.get(resourceARN, {}))}
+
+    def tag_resource(self, resourceARN, tags):
+        if self._tags_error:
+            raise ClientError({'Error': {'Code': self._tags_error, 'Message': 'denied'}}, 'TagResource')
+        self.tags.setdefault(resourceARN, {}).update(tags)
+
+class FakeSTSClient():
+    def get_caller_identity(self):
+        return {'Account': '123456789012'}
+
+@pytest.fixture(autouse=True)
+def clean_state():
+    yield
+    get_resolution_cache().clear()
+    get_client_registry().clear()
+
+def bot_getter(lex_client):
+    register_client('lexv2-models', lex_client)
+    register_client('sts', FakeSTSClient())
+    return LexBotGetter(bot_name='OrderBot', ticket='', environment='dev')
+
+@pytest.mark.parametrize('region_name, partition', [
+    ('eu-west-2', 'aws'),
+    ('cn-north-1', 'aws-cn'),
+    ('us-gov-west-1', 'aws-us-gov'),
+])
+def test_bot_arn_partition(region_name, partition):
+    getter = bot_getter(FakeLexClient(region_name))
+    assert getter.bot_arn == 'arn:{}:lex:{}:123456789012:bot/{}'.format(partition, region_name, BOT_ID)
+
+def test_state_saved_as_tags(tmp_path):
+    lex_client = FakeLexClient('cn-north-1')
+    getter = bot_getter(lex_client)
+    LexBotDeploymentState(lex_client, getter, str(tmp_path / 'manifest.json')).save({LexBotDeploymentState.DIGEST_TAG: 'digest'})
+    assert lex_client.tags[getter.bot_arn][LexBotDeploymentState.DIGEST_TAG] == 'digest'
+    state = LexBotDeploymentState(lex_client, getter, str(tmp_path / 'other.json')).load()
+    assert state[LexBotDeploymentState.DIGEST_TAG] == 'digest'
+
+def test_state_falls_back_to_the_local_manifest(tmp_path):
+    lex_client = FakeLexClient('eu-west-2', tags_error='AccessDeniedException')
+    getter = bot_getter(lex_client)
+    manifest_path = str(tmp_path / 'manifest.json')
+    LexBotDeploymentState(lex_client, getter, manifest_path).save({LexBotDeploymentState.DIGEST_TAG: 'digest'})
+    state = LexBotDeploymentState(lex_client, getter, manifest_path).load()
+    assert state[LexBotDeploymentState.DIGEST_TAG] == 'digest'
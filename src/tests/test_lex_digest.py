@@ -0,0 +1,55 @@
+import os
+
+from lex_digest import bot_tree_digest, canonical_content, combine_digests, file_digests
+
+def write_bot(write_json, bot_dir, bot_name, utterance='order flowers', indent=4):
+    write_json(os.path.join(bot_dir, 'Bot.json'), {'name': bot_name, 'idleSessionTTLInSeconds': 300}, indent)
+    write_json(os.path.join(bot_dir, 'BotLocales', 'en_GB', 'Intents', 'Order', 'Intent.json'), {
+        'name': 'Order',
+        'sampleUtterances': [{'utterance': utterance}]
+    }, indent)
+
+def test_canonical_content_ignores_bot_name(tmp_path, write_json):
+    dev_bot = write_json(tmp_path / 'dev' / 'Bot.json', {'name': 'dev-OrderBot', 'idleSessionTTLInSeconds': 300})
+    prod_bot = write_json(tmp_path / 'prod' / 'Bot.json', {'name': 'prod-OrderBot', 'idleSessionTTLInSeconds': 300})
+    assert canonical_content(dev_bot) == canonical_content(prod_bot)
+
+def test_canonical_content_keeps_name_of_other_files(tmp_path, write_json):
+    intent_a = write_json(tmp_path / 'a' / 'Intent.json', {'name': 'A'})
+    intent_b = write_json(tmp_path / 'b' / 'Intent.json', {'name': 'B'})
+    assert canonical_content(intent_a) != canonical_content(intent_b)
+
+def test_canonical_content_ignores_formatting_and_key_order(tmp_path):
+    compact = tmp_path / 'compact.json'
+    compact.write_text('{"b":1,"a":[1,2]}')
+    indented = tmp_path / 'indented.json'
+    indented.write_text('{\n    "a": [\n        1,\n        2\n    ],\n    "b": 1\n}\n')
+    assert canonical_content(str(compact)) == canonical_content(str(indented))
+
+def test_canonical_content_returns_invalid_json_unchanged(tmp_path):
+    broken = tmp_path / 'broken.json'
+    broken.write_bytes(b'{"a": ')
+    assert canonical_content(str(broken)) == b'{"a": '
+
+def test_bot_tree_digest_same_content_in_every_environment(tmp_path, write_json):
+    write_bot(write_json, str(tmp_path / 'dev'), 'dev-OrderBot', indent=2)
+    write_bot(write_json, str(tmp_path / 'prod'), 'prod-OrderBot', indent=4)
+    assert bot_tree_digest(str(tmp_path / 'dev')) == bot_tree_digest(str(tmp_path / 'prod'))
+
+def test_bot_tree_digest_changes_with_content(tmp_path, write_json):
+    write_bot(write_json, str(tmp_path / 'before'), 'OrderBot')
+    write_bot(write_json, str(tmp_path / 'after'), 'OrderBot', utterance='order roses')
+    assert bot_tree_digest(str(tmp_path / 'before')) != bot_tree_digest(str(tmp_path / 'after'))
+
+def test_bot_tree_digest_includes_manifest(tmp_path, write_json):
+    bot_dir = str(tmp_path / 'OrderBot')
+    write_bot(write_json, bot_dir, 'OrderBot')
+    manifest_path = write_json(tmp_path / 'Manifest.json', {'metadata': {'schemaVersion': '1'}})
+    assert bot_tree_digest(bot_dir, manifest_path) != bot_tree_digest(bot_dir)
+    assert bot_tree_digest(bot_dir, manifest_path, file_digests(bot_dir)) == bot_tree_digest(bot_dir, manifest_path)
+
+def test_combine_digests_only_covers_prefix():
+    digests = {'BotLocales/en_GB/a.json': '01', 'BotLocales/fr_FR/a.json': '02', 'Bot.json': '03'}
+    changed = dict(digests, **{'BotLocales/fr_FR/a.json': '04'})
+    assert combine_digests(digests, prefix='BotLocales/en_GB/') == combine_digests(changed, prefix='BotLocales/en_GB/')
+    assert combine_digests(digests, prefix='BotLocales/fr_FR/') != combine_digests(changed, prefix='BotLocales/fr_FR/')
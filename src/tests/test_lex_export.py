@@ -0,0 +1,69 @@
+import errno
+import os
+
+import pytest
+
+import lex_utils_v2
+from lex_utils_v2 import LexBotExporter
+
+def write_file(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as botfile:
+        botfile.write(content)
+
+def read_file(path):
+    with open(path) as botfile:
+        return botfile.read()
+
+def cross_device_rename(src, dst):
+    raise OSError(errno.EXDEV, 'Invalid cross-device link', src)
+
+def test_replace_bot_defn(tmp_path):
+    staging_dir = str(tmp_path / '.lex_bots.OrderBot.abc')
+    bot_dir = str(tmp_path / 'lex_bots' / 'OrderBot')
+    write_file(os.path.join(staging_dir, 'Bot.json'), 'new')
+    write_file(os.path.join(bot_dir, 'Bot.json'), 'old')
+    write_file(os.path.join(bot_dir, 'Removed.json'), 'old')
+    LexBotExporter._replace_bot_defn(staging_dir, bot_dir)
+    assert os.listdir(bot_dir) == ['Bot.json']
+    assert read_file(os.path.join(bot_dir, 'Bot.json')) == 'new'
+    assert sorted(os.listdir(str(tmp_path))) == ['lex_bots']
+
+def test_replace_bot_defn_across_file_systems(tmp_path, monkeypatch):
+    staging_dir = str(tmp_path / '.lex_bots.OrderBot.abc')
+    bot_dir = str(tmp_path / 'lex_bots' / 'OrderBot')
+    write_file(os.path.join(staging_dir, 'Bot.json'), 'new')
+    write_file(os.path.join(bot_dir, 'Bot.json'), 'old')
+    monkeypatch.setattr(os, 'rename', cross_device_rename)
+    LexBotExporter._replace_bot_defn(staging_dir, bot_dir)
+    assert read_file(os.path.join(bot_dir, 'Bot.json')) == 'new'
+    assert sorted(os.listdir(str(tmp_path))) == ['lex_bots']
+
+def test_staging_dirs_are_next_to_lex_bots(tmp_path, monkeypatch):
+    monkeypatch.setattr(lex_utils_v2, 'lex_root_dir', str(tmp_path / 'lex_bots'))
+    exporter = LexBotExporter.__new__(LexBotExporter)
+    exporter._bot_name = 'OrderBot'
+    assert exporter._staging_root() == str(tmp_path)
+    for stale_dir in ('.lex_bots.OrderBot.abc', '.lex_bots.OrderBot.abc-old', '.lex_bots.OrderBotV2.abc', 'lex_bots/.OrderBot-abc'):
+        os.makedirs(str(tmp_path / stale_dir))
+    exporter._remove_stale_staging_dirs()
+    assert sorted(os.listdir(str(tmp_path))) == ['.lex_bots.OrderBotV2.abc', 'lex_bots']
+    assert os.listdir(str(tmp_path / 'lex_bots')) == []
+
+def test_write_if_changed(tmp_path):
+    filepath = str(tmp_path / 'OrderBot' / 'Bot.json')
+    # A file left by another writer at the old fixed temporary path
+    write_file(filepath + '.tmp', 'other')
+    assert LexBotExporter._write_if_changed(filepath, b'old') == 'added'
+    assert LexBotExporter._write_if_changed(filepath, b'old') is None
+    assert LexBotExporter._write_if_changed(filepath, b'new') == 'modified'
+    assert read_file(filepath) == 'new'
+    assert sorted(os.listdir(str(tmp_path / 'OrderBot'))) == ['Bot.json', 'Bot.json.tmp']
+    assert read_file(filepath + '.tmp') == 'other'
+
+def test_write_if_changed_removes_temporary_file_on_failure(tmp_path, monkeypatch):
+    filepath = str(tmp_path / 'OrderBot' / 'Bot.json')
+    monkeypatch.setattr(os, 'replace', cross_device_rename)
+    with pytest.raises(OSError, match='cross-device'):
+        LexBotExporter._write_if_changed(filepath, b'new')
+    assert os.listdir(str(tmp_path / 'OrderBot')) == []
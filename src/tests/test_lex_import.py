@@ -0,0 +1,128 @@
+import json
+import os
+import time
+
+import synthetic_bots
+from lex_utils_v2 import LexBotGetter, LexBotImporter
+
+ENVIRONMENT = 'dev'
+BOT_NAME = 'OrderBot'
+CURRENT_BOT_NAME = ENVIRONMENT+'-'+BOT_NAME
+ALIAS_NAME = 'live'
+
+def add_bot(lex_service, spec):
+    return lex_service.add_bot(
+        CURRENT_BOT_NAME,
+        alias_names=[ENVIRONMENT+'-'+ALIAS_NAME],
+        definition=synthetic_bots.bot_zip(CURRENT_BOT_NAME, spec)
+    )
+
+def importer(force_import=False):
+    return LexBotImporter(
+        bot_name=BOT_NAME,
+        ticket='',
+        environment=ENVIRONMENT,
+        bot_source_version='DRAFT',
+        bot_alias_name=ALIAS_NAME,
+        delete_old_version_flag='true',
+        force_import=force_import
+    )
+
+def test_import_re_resolves_a_stale_bot_id(lex_service):
+    spec = synthetic_bots.SyntheticBotSpec(intents=2, utterances=2, slot_types=1, slot_values=2)
+    synthetic_bots.write_bot('lex_bots', BOT_NAME, spec)
+    stale_bot_id = add_bot(lex_service, spec)
+    # resolves the bot and its alias into the resolution cache
+    getter = LexBotGetter(bot_name=BOT_NAME, ticket='', environment=ENVIRONMENT, bot_alias_name=ENVIRONMENT+'-'+ALIAS_NAME)
+    assert getter.bot_id_version[0] == stale_bot_id
+    assert getter.bot_alias_id
+    # the bot is deleted and created again, e.g. by a stack redeployment
+    lex_service._delete_bot(stale_bot_id)
+    live_bot_id = add_bot(lex_service, spec)
+
+    result = importer().import_bot()
+    assert result['bot'] == 'Completed'
+    assert LexBotGetter(bot_name=BOT_NAME, ticket='', environment=ENVIRONMENT).bot_id_version == (live_bot_id, '1')
+    assert lex_service._list_bot_versions(live_bot_id)['botVersionSummaries']
+
+LOCALE_SPEC = synthetic_bots.SyntheticBotSpec(locales=3, intents=2, utterances=2, slot_types=1, slot_values=2)
+LOCALE_IDS = synthetic_bots.locale_ids(LOCALE_SPEC)
+
+def imported_bot(lex_service):
+    synthetic_bots.write_bot('lex_bots', BOT_NAME, LOCALE_SPEC)
+    bot_id = add_bot(lex_service, LOCALE_SPEC)
+    importer().import_bot()
+    lex_service.reset_counters()
+    return bot_id
+
+def change_json(path, **changes):
+    with open(path, 'r', encoding='utf-8') as jsonfile:
+        jsondata = json.load(jsonfile)
+    jsondata.update(changes)
+    with open(path, 'w', encoding='utf-8') as jsonfile:
+        json.dump(jsondata, jsonfile, indent=4)
+
+def bot_locale_path(locale_id):
+    return os.path.join('lex_bots', BOT_NAME, 'BotLocales', locale_id, 'BotLocale.json')
+
+def served_calls(lex_service, operation_name):
+    return lex_service.counters()['calls'].get(operation_name, 0)
+
+def test_first_import_imports_the_whole_bot(lex_service):
+    synthetic_bots.write_bot('lex_bots', BOT_NAME, LOCALE_SPEC)
+    add_bot(lex_service, LOCALE_SPEC)
+    locales = importer().import_bot()['locales']
+    assert locales['imported'] == LOCALE_IDS
+    assert locales['built'] == LOCALE_IDS
+    assert locales['skipped'] == []
+    assert served_calls(lex_service, 'StartImport') == 1
+    assert served_calls(lex_service, 'BuildBotLocale') == 3
+
+def test_unchanged_bot_is_not_imported(lex_service):
+    imported_bot(lex_service)
+    assert importer().import_bot()['bot'] == 'Unchanged'
+    assert served_calls(lex_service, 'StartImport') == 0
+    assert served_calls(lex_service, 'BuildBotLocale') == 0
+
+def test_only_changed_locale_is_imported_and_built(lex_service):
+    imported_bot(lex_service)
+    change_json(bot_locale_path(LOCALE_IDS[1]), description='changed')
+    locales = importer().import_bot()['locales']
+    assert locales['imported'] == [LOCALE_IDS[1]]
+    assert locales['built'] == [LOCALE_IDS[1]]
+    assert locales['skipped'] == [LOCALE_IDS[0], LOCALE_IDS[2]]
+    assert served_calls(lex_service, 'StartImport') == 1
+    assert served_calls(lex_service, 'BuildBotLocale') == 1
+
+def test_unbuilt_locales_are_built(lex_service):
+    bot_id = imported_bot(lex_service)
+    lex_service._bot(bot_id)['locales'][LOCALE_IDS[2]]['status'] = 'NotBuilt'
+    change_json(bot_locale_path(LOCALE_IDS[0]), description='changed')
+    locales = importer().import_bot()['locales']
+    assert locales['imported'] == [LOCALE_IDS[0]]
+    assert locales['built'] == [LOCALE_IDS[0], LOCALE_IDS[2]]
+    assert locales['skipped'] == [LOCALE_IDS[1]]
+
+def test_bot_settings_change_imports_the_whole_bot(lex_service):
+    imported_bot(lex_service)
+    change_json(os.path.join('lex_bots', BOT_NAME, 'Bot.json'), idleSessionTTLInSeconds=600)
+    locales = importer().import_bot()['locales']
+    assert locales['imported'] == LOCALE_IDS
+    assert locales['built'] == LOCALE_IDS
+    assert served_calls(lex_service, 'StartImport') == 1
+    assert served_calls(lex_service, 'BuildBotLocale') == 3
+
+def test_draft_updated_since_the_import_imports_the_whole_bot(lex_service):
+    bot_id = imported_bot(lex_service)
+    # e.g. an edit made in the Lex console
+    lex_service._bot(bot_id)['locales'][LOCALE_IDS[0]]['lastUpdatedDateTime'] = time.time() + 60
+    change_json(bot_locale_path(LOCALE_IDS[1]), description='changed')
+    locales = importer().import_bot()['locales']
+    assert locales['imported'] == LOCALE_IDS
+    assert locales['built'] == LOCALE_IDS
+
+def test_forced_import_imports_the_whole_bot(lex_service):
+    imported_bot(lex_service)
+    locales = importer(force_import=True).import_bot()['locales']
+    assert locales['imported'] == LOCALE_IDS
+    assert locales['built'] == LOCALE_IDS
@@ -0,0 +1,100 @@
+import io
+import json
+import os
+
+import pytest
+
+import lex_validation
+from lex_json_stream import JsonStreamReader
+from lex_validation import validate_json_file
+
+DOCUMENT = {
+    'name': 'Flower',
+    'description': 'Fleurs, Blumen und flores été \U0001f339',
+    'count': 1234567890,
+    'ratio': -0.125,
+    'enabled': True,
+    'parent': None,
+    'slotTypeValues': [
+        {'sampleValue': {'value': 'roses {}'.format(index)}, 'synonyms': [{'value': 'rose {}'.format(index)}]}
+        for index in range(20)
+    ],
+    'empty': [],
+    'nested': {'values': [[1, 2], {}]}
+}
+
+def read_document(content, chunk_size):
+    reader = JsonStreamReader(io.BytesIO(content), chunk_size=chunk_size)
+    document = {}
+    for key in reader.members():
+        if reader.peek() == '[':
+            document[key] = list(reader.items())
+        else:
+            document[key] = reader.value()
+    reader.end()
+    return document
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 7, 64, 1024 * 1024])
+def test_reader_matches_json_loads(chunk_size):
+    content = json.dumps(DOCUMENT, indent=4, ensure_ascii=False).encode('utf-8')
+    assert read_document(content, chunk_size) == json.loads(content)
+
+@pytest.mark.parametrize('number', ['-0.125', '1e-07', '12.5E+3', '1234567890'])
+def test_reader_numbers_across_chunks(number):
+    content = '{{"value": {}}}'.format(number).encode('utf-8')
+    for chunk_size in range(1, len(content) + 1):
+        assert read_document(content, chunk_size) == {'value': json.loads(number)}
+
+def test_reader_passes_every_chunk():
+    content = json.dumps(DOCUMENT).encode('utf-8')
+    chunks = []
+    reader = JsonStreamReader(io.BytesIO(content), chunk_size=16, on_chunk=chunks.append)
+    for key in reader.members():
+        reader.value()
+    reader.end()
+    assert b''.join(chunks) == content
+
+def test_reader_empty_object():
+    assert read_document(b' { } ', 1) == {}
+
+@pytest.mark.parametrize('content', [b'{"name": "Flower"', b'{"name" "Flower"}', b'{"name": "Flower"} []', b'[]'])
+def test_reader_rejects_invalid_documents(content):
+    with pytest.raises(ValueError):
+        read_document(content, 4)
+
+def write_slot_type(write_json, path):
+    return write_json(path, {
+        'name': 'Flower',
+        'tags': ['red', 'red'],
+        'slotTypeValues': [
+            {'sampleValue': {'value': 'roses'}, 'synonyms': [{'value': 'rose'}, {'value': 'red rose'}]},
+            {'sampleValue': {'value': 'tulips'}, 'synonyms': [{'value': 'tulip'}, {'value': 'tulip'}]},
+            {'sampleValue': {'value': 'red tulips'}, 'synonyms': [{'value': 'red rose'}]},
+            {'sampleValue': {'value': 'tulips'}, 'synonyms': [{'value': 'tulip'}, {'value': 'tulip'}]},
+        ]
+    })
+
+def test_streaming_and_in_memory_findings_are_equal(tmp_path, write_json, monkeypatch):
+    path = write_slot_type(write_json, os.path.join(str(tmp_path), 'Flower', 'SlotType.json'))
+    monkeypatch.setattr(lex_validation, 'STREAMING_VALIDATION_THRESHOLD', 1 << 40)
+    in_memory = validate_json_file(path)
+    monkeypatch.setattr(lex_validation, 'STREAMING_VALIDATION_THRESHOLD', 0)
+    streamed = validate_json_file(path)
+    assert sorted(item['rule'] for item in streamed['findings']) == [
+        'duplicate_list_items',
+        'duplicate_list_items',
+        'duplicate_list_items',
+        'duplicate_list_items',
+        'duplicate_slot_values',
+        'shared_slot_synonyms',
+    ]
+    sort_key = lambda item: json.dumps(item, sort_keys=True)
+    assert sorted(streamed['findings'], key=sort_key) == sorted(in_memory['findings'], key=sort_key)
+    assert streamed['digest'] == in_memory['digest']
+    assert streamed['size'] == in_memory['size']
+
+def test_streaming_reports_invalid_json(tmp_path, monkeypatch):
+    path = tmp_path / 'SlotType.json'
+    path.write_text('{"slotTypeValues": [{"sampleValue": ')
+    monkeypatch.setattr(lex_validation, 'STREAMING_VALIDATION_THRESHOLD', 0)
+    assert [item['rule'] for item in validate_json_file(str(path))['findings']] == ['invalid_json']
@@ -0,0 +1,87 @@
+import pytest
+
+from lex_listing import MAX_PAGE_SIZE, LexPagedListing, list_bot_versions, list_bots
+
+class FakeListClient():
+    """Serves list_bots pages of page_size bots, following nextToken"""
+    def __init__(self, bot_count, page_size):
+        self._bots = [{'botId': 'BOT{:07d}'.format(index), 'botName': 'Bot{:03d}'.format(index)} for index in range(bot_count)]
+        self._page_size = page_size
+        self.requests = []
+
+    def list_bots(self, nextToken=None, **kwargs):
+        self.requests.append(dict(kwargs, nextToken=nextToken))
+        start = int(nextToken or 0)
+        page = {'botSummaries': self._bots[start:start + self._page_size]}
+        if start + self._page_size < len(self._bots):
+            page['nextToken'] = str(start + self._page_size)
+        return page
+
+    def list_bot_versions(self, **kwargs):
+        self.requests.append(kwargs)
+        return {'botVersionSummaries': [{'botVersion': 'DRAFT'}, {'botVersion': '1'}]}
+
+class FakePaginatingClient(FakeListClient):
+    """Same listing, through a botocore style paginator"""
+    def can_paginate(self, operation):
+        return operation == 'list_bots'
+
+    def get_paginator(self, operation):
+        client = self
+
+        class Paginator():
+            def paginate(self, **kwargs):
+                next_token = None
+                while True:
+                    page = client.list_bots(nextToken=next_token, **kwargs)
+                    yield page
+                    next_token = page.get('nextToken')
+                    if not next_token:
+                        return
+        return Paginator()
+
+@pytest.mark.parametrize('client_class', [FakeListClient, FakePaginatingClient])
+def test_listing_follows_every_page(client_class):
+    client = client_class(bot_count=25, page_size=10)
+    listing = LexPagedListing(client, 'list_bots', 'botSummaries', maxResults=10)
+    assert [bot['botName'] for bot in listing] == ['Bot{:03d}'.format(index) for index in range(25)]
+    assert listing.pages_fetched == 3
+    assert [request['nextToken'] for request in client.requests] == [None, '10', '20']
+    assert all(request['maxResults'] == 10 for request in client.requests)
+
+def test_listing_of_a_single_page():
+    client = FakeListClient(bot_count=3, page_size=10)
+    listing = LexPagedListing(client, 'list_bots', 'botSummaries')
+    assert len(list(listing)) == 3
+    assert listing.pages_fetched == 1
+
+def test_listing_of_nothing():
+    client = FakeListClient(bot_count=0, page_size=10)
+    listing = LexPagedListing(client, 'list_bots', 'botSummaries')
+    assert list(listing) == []
+    assert listing.pages_fetched == 1
+
+@pytest.mark.parametrize('client_class', [FakeListClient, FakePaginatingClient])
+def test_find_stops_at_the_page_of_the_match(client_class):
+    client = client_class(bot_count=50, page_size=10)
+    listing = LexPagedListing(client, 'list_bots', 'botSummaries')
+    assert listing.find(lambda bot: bot['botName'] == 'Bot012')['botId'] == 'BOT0000012'
+    assert listing.pages_fetched == 2
+    assert len(client.requests) == 2
+
+def test_find_without_match_reads_every_page():
+    client = FakeListClient(bot_count=25, page_size=10)
+    listing = LexPagedListing(client, 'list_bots', 'botSummaries')
+    assert listing.find(lambda bot: bot['botName'] == 'Missing') is None
+    assert listing.pages_fetched == 3
+
+def test_list_bots_filters_on_the_bot_name():
+    client = FakeListClient(bot_count=1, page_size=10)
+    list(list_bots(client, bot_name='Bot000'))
+    assert client.requests[0]['filters'] == [{'name': 'BotName', 'values': ['Bot000'], 'operator': 'EQ'}]
+    assert client.requests[0]['maxResults'] == MAX_PAGE_SIZE
+
+def test_list_bot_versions_arguments():
+    client = FakeListClient(bot_count=0, page_size=10)
+    assert [summary['botVersion'] for summary in list_bot_versions(client, 'BOTID', order='Descending')] == ['DRAFT', '1']
+    assert client.requests == [{'botId': 'BOTID', 'sortBy': {'attribute': 'BotVersion', 'order': 'Descending'}, 'maxResults': MAX_PAGE_SIZE}]
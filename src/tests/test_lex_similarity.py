@@ -0,0 +1,83 @@
+import os
+
+import pytest
+
+from lex_similarity import DEFAULT_NUM_PERM, LexMinHashIndex, jaccard, optimal_bands, shingles
+from lex_validation import near_duplicate_utterances
+
+def test_shingles():
+    assert shingles('order some flowers') == {'order', 'some', 'flowers'}
+    assert shingles('order some flowers', 2) == {'order some', 'some flowers'}
+    assert shingles('order', 2) == {'order'}
+
+def test_jaccard():
+    assert jaccard({'a', 'b'}, {'b', 'c'}) == pytest.approx(1 / 3)
+    assert jaccard(set(), set()) == 1.0
+
+@pytest.mark.parametrize('threshold', [0.5, 0.7, 0.8, 0.9])
+def test_optimal_bands_divides_num_perm(threshold):
+    assert DEFAULT_NUM_PERM % optimal_bands(threshold, DEFAULT_NUM_PERM) == 0
+
+def test_optimal_bands_grow_as_threshold_falls():
+    assert optimal_bands(0.5, DEFAULT_NUM_PERM) >= optimal_bands(0.9, DEFAULT_NUM_PERM)
+
+def test_index_rejects_bands_not_dividing_num_perm():
+    with pytest.raises(ValueError):
+        LexMinHashIndex(num_perm=128, bands=3)
+
+def test_index_clusters():
+    pytest.importorskip('numpy')
+    index = LexMinHashIndex(threshold=0.7)
+    texts = [
+        'i would like to order some red roses for tomorrow',
+        'i would like to order some red roses for today',
+        'cancel my table booking',
+        'what is the weather like in london',
+        'i would like to order some red roses for tomorrow please',
+    ]
+    for text in texts:
+        index.add(text)
+    assert sorted(sorted(cluster) for cluster in index.clusters()) == [[0, 1, 4]]
+
+def test_index_of_one_text_has_no_clusters():
+    index = LexMinHashIndex()
+    index.add('order flowers')
+    assert index.clusters() == []
+
+def intent_result(locale_dir, intent_name, utterances):
+    return {
+        'path': os.path.join(locale_dir, 'Intents', intent_name, 'Intent.json'),
+        'findings': [],
+        'intent': {'name': intent_name, 'utterances': utterances}
+    }
+
+def test_near_duplicates_exclude_exact_collisions():
+    pytest.importorskip('numpy')
+    file_results = [
+        intent_result('en_GB', 'Order', ['order some red roses for tomorrow', 'book a table for two']),
+        intent_result('en_GB', 'Book', ['Order some red roses for  tomorrow', 'book a table for two people'])
+    ]
+    findings = near_duplicate_utterances(file_results, 0.7)
+    assert [item['utterances'] for item in findings] == [[
+        {'intent': 'Book', 'utterance': 'book a table for two people'},
+        {'intent': 'Order', 'utterance': 'book a table for two'}
+    ]]
+
+def test_near_duplicates_list_every_intent_of_a_cluster():
+    pytest.importorskip('numpy')
+    file_results = [
+        intent_result('en_GB', 'Order', ['order some red roses for tomorrow']),
+        intent_result('en_GB', 'Book', ['order some red roses for tomorrow']),
+        intent_result('en_GB', 'Send', ['order some red roses for tomorrow please'])
+    ]
+    findings = near_duplicate_utterances(file_results, 0.7)
+    assert [item['intents'] for item in findings] == [['Book', 'Order', 'Send']]
+    assert len(findings[0]['utterances']) == 3
+
+def test_near_duplicates_keep_locales_apart():
+    pytest.importorskip('numpy')
+    file_results = [
+        intent_result('en_GB', 'Order', ['order some red roses for tomorrow']),
+        intent_result('en_US', 'Order', ['order some red roses for tomorrow please'])
+    ]
+    assert near_duplicate_utterances(file_results, 0.7) == []
@@ -0,0 +1,160 @@
+import os
+
+from lex_validation import (
+    SEVERITY_ERROR,
+    SEVERITY_WARNING,
+    LexBotValidationEngine,
+    LexValidationCache,
+    find_duplicates,
+    utterance_collisions,
+    validate_json_file,
+)
+
+def write_bot(write_json, bot_dir):
+    locale_dir = os.path.join(bot_dir, 'BotLocales', 'en_GB')
+    write_json(os.path.join(bot_dir, 'Bot.json'), {'name': 'OrderBot'})
+    write_json(os.path.join(locale_dir, 'Intents', 'Order', 'Intent.json'), {
+        'name': 'Order',
+        'sampleUtterances': [{'utterance': 'order flowers'}, {'utterance': 'order flowers'}]
+    })
+    write_json(os.path.join(locale_dir, 'Intents', 'Cancel', 'Intent.json'), {
+        'name': 'Cancel',
+        'sampleUtterances': [{'utterance': 'cancel my order'}]
+    })
+    write_json(os.path.join(locale_dir, 'SlotTypes', 'Flower', 'SlotType.json'), {
+        'name': 'Flower',
+        'slotTypeValues': [
+            {'sampleValue': {'value': 'roses'}, 'synonyms': [{'value': 'rose'}]},
+            {'sampleValue': {'value': 'tulips'}, 'synonyms': [{'value': 'tulip'}, {'value': 'tulip'}]}
+        ]
+    })
+    return locale_dir
+
+def test_find_duplicates_reports_each_list():
+    findings = find_duplicates({
+        'tags': ['a', 'b', 'a'],
+        'items': [{'values': [1, 1]}, {'values': [2]}]
+    }, 'Intent.json')
+    assert sorted((item['key'], item['duplicates']) for item in findings) == [
+        ('items[0].values', ['1']),
+        ('tags', ['"a"'])
+    ]
+    assert all(item['severity'] == SEVERITY_ERROR for item in findings)
+
+def test_find_duplicates_ignores_key_order():
+    findings = find_duplicates([{'a': 1, 'b': 2}, {'b': 2, 'a': 1}], 'Intent.json')
+    assert [item['duplicates'] for item in findings] == [['{"a": 1, "b": 2}']]
+
+def test_find_duplicates_without_duplicates():
+    assert find_duplicates({'tags': ['a', 'b'], 'items': [[1], [1, 1.5]]}, 'Intent.json') == []
+
+def test_invalid_json_finding(tmp_path):
+    path = tmp_path / 'Intent.json'
+    path.write_text('{"name": ')
+    result = validate_json_file(str(path))
+    assert [item['rule'] for item in result['findings']] == ['invalid_json']
+    assert result['findings'][0]['severity'] == SEVERITY_ERROR
+
+def test_validate_tree_reports_errors(tmp_path, write_json):
+    locale_dir = write_bot(write_json, str(tmp_path / 'OrderBot'))
+    report = LexBotValidationEngine(max_workers=1).validate_tree(str(tmp_path / 'OrderBot'))
+    assert report.summary()['files'] == 4
+    assert [(item['rule'], item['path']) for item in report.errors] == [
+        ('duplicate_list_items', os.path.join(locale_dir, 'Intents', 'Order', 'Intent.json')),
+        ('duplicate_list_items', os.path.join(locale_dir, 'SlotTypes', 'Flower', 'SlotType.json'))
+    ]
+
+def test_pool_and_main_process_findings_are_equal(tmp_path, write_json):
+    write_bot(write_json, str(tmp_path / 'OrderBot'))
+    inline_report = LexBotValidationEngine(max_workers=1).validate_tree(str(tmp_path / 'OrderBot'))
+    pool_report = LexBotValidationEngine(max_workers=2, parallel_threshold=1).validate_tree(str(tmp_path / 'OrderBot'))
+    assert inline_report.summary()['workers'] == 0
+    assert pool_report.summary()['workers'] == 2
+    assert pool_report.findings == inline_report.findings
+
+def validate_cached(bot_dir, cache):
+    return LexBotValidationEngine(max_workers=1, cache=cache).validate_tree(bot_dir)
+
+def test_cache_reuses_unchanged_files(tmp_path, write_json):
+    bot_dir = str(tmp_path / 'OrderBot')
+    write_bot(write_json, bot_dir)
+    cache_file = str(tmp_path / 'validation.json')
+    first_report = validate_cached(bot_dir, LexValidationCache(cache_file))
+    second_report = validate_cached(bot_dir, LexValidationCache(cache_file))
+    assert first_report.summary()['cached'] == 0
+    assert second_report.summary()['cached'] == 4
+    assert second_report.findings == first_report.findings
+
+def test_cache_revalidates_modified_files(tmp_path, write_json):
+    bot_dir = str(tmp_path / 'OrderBot')
+    locale_dir = write_bot(write_json, bot_dir)
+    cache = LexValidationCache(str(tmp_path / 'validation.json'))
+    assert len(validate_cached(bot_dir, cache).errors) == 2
+    write_json(os.path.join(locale_dir, 'Intents', 'Order', 'Intent.json'), {
+        'name': 'Order',
+        'sampleUtterances': [{'utterance': 'order flowers'}]
+    })
+    report = validate_cached(bot_dir, cache)
+    assert report.summary()['cached'] == 3
+    assert [item['path'] for item in report.errors] == [os.path.join(locale_dir, 'SlotTypes', 'Flower', 'SlotType.json')]
+
+def test_cache_reuses_touched_files(tmp_path, write_json):
+    bot_dir = str(tmp_path / 'OrderBot')
+    write_bot(write_json, bot_dir)
+    cache = LexValidationCache(str(tmp_path / 'validation.json'))
+    validate_cached(bot_dir, cache)
+    # same content with a new timestamp, e.g. after a fresh checkout
+    for filepath in LexBotValidationEngine.tree_files(bot_dir):
+        os.utime(filepath, (1, 1))
+    report = validate_cached(bot_dir, cache)
+    assert report.summary()['cached'] == 4
+    assert len(report.errors) == 2
+
+def test_cache_drops_deleted_files(tmp_path, write_json):
+    bot_dir = str(tmp_path / 'OrderBot')
+    locale_dir = write_bot(write_json, bot_dir)
+    cache = LexValidationCache(str(tmp_path / 'validation.json'))
+    validate_cached(bot_dir, cache)
+    os.remove(os.path.join(locale_dir, 'Intents', 'Order', 'Intent.json'))
+    report = validate_cached(bot_dir, cache)
+    assert report.summary()['files'] == 3
+    assert len(report.errors) == 1
+
+def intent_result(locale_dir, intent_name, utterances):
+    return {
+        'path': os.path.join(locale_dir, 'Intents', intent_name, 'Intent.json'),
+        'findings': [],
+        'intent': {'name': intent_name, 'utterances': utterances}
+    }
+
+def test_utterance_collisions_exact_and_normalised():
+    file_results = [
+        intent_result('en_GB', 'Order', ['order flowers', 'Book a  Table']),
+        intent_result('en_GB', 'Book', ['order flowers', 'book a table']),
+        intent_result('en_GB', 'Cancel', ['cancel my order'])
+    ]
+    findings = sorted(utterance_collisions(file_results), key=lambda item: item['utterance'])
+    assert [(item['rule'], item['utterance'], item['intents']) for item in findings] == [
+        ('cross_intent_utterance_normalised', 'book a table', ['Book', 'Order']),
+        ('cross_intent_utterance', 'order flowers', ['Book', 'Order'])
+    ]
+    assert findings[0]['variants'] == ['Book a  Table', 'book a table']
+    assert all(item['severity'] == SEVERITY_WARNING for item in findings)
+
+def test_utterance_collisions_within_one_intent_are_ignored():
+    file_results = [intent_result('en_GB', 'Order', ['order flowers', 'Order Flowers'])]
+    assert utterance_collisions(file_results) == []
+
+def test_utterance_collisions_keep_locales_apart():
+    file_results = [
+        intent_result('en_GB', 'Order', ['order flowers']),
+        intent_result('en_US', 'Book', ['order flowers'])
+    ]
+    assert utterance_collisions(file_results) == []
+
+def test_utterance_collisions_severity():
+    file_results = [
+        intent_result('en_GB', 'Order', ['order flowers']),
+        intent_result('en_GB', 'Book', ['order flowers'])
+    ]
+    assert [item['severity'] for item in utterance_collisions(file_results, SEVERITY_ERROR)] == [SEVERITY_ERROR]
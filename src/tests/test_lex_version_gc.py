@@ -0,0 +1,140 @@
+from types import SimpleNamespace
+
+import pytest
+from botocore.exceptions import ClientError
+
+from lex_cache import get_resolution_cache
+from lex_clients import get_client_registry, register_client
+from lex_stacks import get_stack_output_cache
+from lex_utils_v2 import LexBotVersionManager
+
+BOT_ID = 'BOTID00001'
+
+class FakeLexClient():
+    def __init__(self, bot_name, bot_versions, aliases):
+        self.meta = SimpleNamespace(region_name='eu-west-2')
+        self._bot_name = bot_name
+        self._bot_versions = bot_versions
+        self._aliases = aliases
+        self.deleted = []
+
+    def list_bots(self, **kwargs):
+        return {'botSummaries': [{'botId': BOT_ID, 'botName': self._bot_name, 'latestBotVersion': self._bot_versions[-1]}]}
+
+    def list_bot_aliases(self, botId, **kwargs):
+        return {'botAliasSummaries': [
+            {'botAliasId': 'ALIAS{:05d}'.format(index), 'botAliasName': alias_name, 'botVersion': bot_version}
+            for index, (alias_name, bot_version) in enumerate(sorted(self._aliases.items()))
+        ]}
+
+    def list_bot_versions(self, botId, **kwargs):
+        return {'botVersionSummaries': [{'botVersion': bot_version} for bot_version in ['DRAFT'] + self._bot_versions]}
+
+    def delete_bot_version(self, botId, botVersion, **kwargs):
+        self.deleted.append(botVersion)
+
+class FakeCFNClient():
+    def __init__(self, stacks):
+        self.meta = SimpleNamespace(region_name='eu-west-2')
+        self._stacks = stacks
+        self.described = []
+
+    def describe_stacks(self, StackName):
+        self.described.append(StackName)
+        if StackName not in self._stacks:
+            raise ClientError(
+                {'Error': {'Code': 'ValidationError', 'Message': 'Stack with id {} does not exist'.format(StackName)}},
+                'DescribeStacks'
+            )
+        return {'Stacks': [{'Outputs': [
+            {'OutputKey': output_key, 'OutputValue': output_value}
+            for output_key, output_value in self._stacks[StackName].items()
+        ]}]}
+
+class FakeSTSClient():
+    def get_caller_identity(self):
+        return {'Account': '123456789012'}
+
+@pytest.fixture(autouse=True)
+def clean_state():
+    yield
+    get_resolution_cache().clear()
+    get_stack_output_cache().invalidate()
+    get_client_registry().clear()
+
+def version_manager(bot_versions, aliases=None, stacks=None, ticket=''):
+    current_bot_name = (ticket+'-' if ticket else '')+'dev-OrderBot'
+    lex_client = FakeLexClient(current_bot_name, bot_versions, aliases or {})
+    cfn_client = FakeCFNClient(stacks or {})
+    register_client('lexv2-models', lex_client)
+    register_client('cloudformation', cfn_client)
+    register_client('sts', FakeSTSClient())
+    manager = LexBotVersionManager('OrderBot', ticket, 'dev', 'live', delete_rate=1000)
+    return manager, lex_client, cfn_client
+
+def test_plan_keeps_last_versions():
+    manager, lex_client, cfn_client = version_manager([str(version) for version in range(1, 8)])
+    plan = manager.plan_bot_version_gc(keep_last=3)
+    assert plan['bot_id'] == BOT_ID
+    assert plan['versions'] == ['1', '2', '3', '4', '5', '6', '7']
+    assert plan['delete'] == ['1', '2', '3', '4']
+    assert plan['protected'] == {'5': ['retained'], '6': ['retained'], '7': ['retained']}
+
+def test_plan_never_deletes_aliased_or_deployed_versions():
+    manager, lex_client, cfn_client = version_manager(
+        [str(version) for version in range(1, 13)],
+        aliases={'dev-live': '2', 'dev-test': '4', 'TestBotAlias': None},
+        stacks={
+            'dev-live': {'BotId': BOT_ID, 'BotVersion': '6'},
+            'OrderBot': {'BotId': 'OTHERBOT01', 'BotVersion': '7'}
+        }
+    )
+    plan = manager.plan_bot_version_gc(keep_last=2)
+    assert plan['delete'] == ['1', '3', '5', '7', '8', '9', '10']
+    assert plan['protected'] == {
+        '2': ['bot alias'],
+        '4': ['bot alias'],
+        '6': ['CloudFormation BotVersion output'],
+        '11': ['retained'],
+        '12': ['retained']
+    }
+    assert sorted(cfn_client.described) == ['OrderBot', 'dev-live']
+
+def test_plan_protects_versions_for_every_reason():
+    manager, lex_client, cfn_client = version_manager(
+        ['1', '2', '3'],
+        aliases={'dev-live': '3'},
+        stacks={'dev-live': {'BotVersion': '3'}}
+    )
+    plan = manager.plan_bot_version_gc(keep_last=1)
+    assert plan['protected'] == {'3': ['retained', 'bot alias', 'CloudFormation BotVersion output']}
+    assert plan['delete'] == ['1', '2']
+
+def test_plan_with_keep_last_zero():
+    manager, lex_client, cfn_client = version_manager(['1', '2', '3'], aliases={'dev-live': '2'})
+    plan = manager.plan_bot_version_gc(keep_last=0)
+    assert plan['delete'] == ['1', '3']
+
+def test_ticket_bots_skip_cloudformation():
+    manager, lex_client, cfn_client = version_manager(['1', '2', '3'], ticket='JIRA-1')
+    plan = manager.plan_bot_version_gc(keep_last=1)
+    assert plan['delete'] == ['1', '2']
+    assert cfn_client.described == []
+
+def test_collect_deletes_only_planned_versions():
+    manager, lex_client, cfn_client = version_manager(
+        ['1', '2', '3', '4', '5'],
+        aliases={'dev-live': '1'},
+        stacks={'dev-live': {'BotVersion': '3'}}
+    )
+    response = manager.collect_old_bot_versions(keep_last=1)
+    assert sorted(lex_client.deleted, key=int) == ['2', '4']
+    assert response['deleted'] == ['2', '4']
+    assert response['failed'] == {}
+
+def test_collect_dry_run_deletes_nothing():
+    manager, lex_client, cfn_client = version_manager(['1', '2', '3'])
+    response = manager.collect_old_bot_versions(keep_last=1, dry_run=True)
+    assert response['delete'] == ['1', '2']
+    assert response['deleted'] == []
+    assert lex_client.deleted == []
@@ -0,0 +1,169 @@
+import asyncio
+import itertools
+import random
+
+import pytest
+from botocore.exceptions import ClientError
+
+from lex_waiters import LexWaiter, LexWaiterError, LexWaitHistory
+
+class FakeClock():
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now = self.now + seconds
+
+    async def async_sleep(self, seconds):
+        self.sleep(seconds)
+
+class FakeLexClient():
+    """Answers the describe calls with the given statuses, the last one repeated"""
+    def __init__(self, statuses, status_key='importStatus'):
+        self._statuses = statuses
+        self._status_key = status_key
+        self.calls = []
+
+    def _describe(self, **kwargs):
+        self.calls.append(kwargs)
+        status = self._statuses[min(len(self.calls), len(self._statuses)) - 1]
+        if isinstance(status, Exception):
+            raise status
+        return {self._status_key: status}
+
+    describe_import = _describe
+    describe_bot_locale = _describe
+    describe_bot_version = _describe
+
+def waiter(client, waiter_name='bot_import_completed', history=None, jitter=0, **kwargs):
+    clock = FakeClock()
+    return clock, LexWaiter(
+        client, waiter_name,
+        jitter=jitter,
+        history=history or LexWaitHistory(),
+        clock=clock,
+        sleep=clock.sleep,
+        async_sleep=clock.async_sleep,
+        rng=random.Random(1),
+        **kwargs
+    )
+
+def not_found():
+    return ClientError({'Error': {'Code': 'ResourceNotFoundException', 'Message': 'not found'}}, 'DescribeBotVersion')
+
+def test_delays_back_off_up_to_max_delay():
+    clock, lex_waiter = waiter(FakeLexClient([]), min_delay=1, max_delay=5, backoff=2)
+    assert list(itertools.islice(lex_waiter.delays(), 6)) == [1, 2, 4, 5, 5, 5]
+
+def test_delays_start_around_the_expected_duration():
+    history = LexWaitHistory()
+    for duration in (90, 100, 400):
+        history.record('bot_import_completed', 'OrderBot', duration)
+    clock, lex_waiter = waiter(FakeLexClient([]), history=history, min_delay=1, max_delay=120, backoff=2)
+    assert list(itertools.islice(lex_waiter.delays('OrderBot'), 3)) == [80, 10, 20]
+    assert list(itertools.islice(lex_waiter.delays('OtherBot'), 3)) == [1, 2, 4]
+
+def test_delays_from_history_stay_within_bounds():
+    history = LexWaitHistory()
+    history.record('bot_import_completed', 'FastBot', 0.5)
+    history.record('bot_import_completed', 'SlowBot', 5000)
+    clock, lex_waiter = waiter(FakeLexClient([]), history=history, min_delay=1, max_delay=20)
+    assert list(itertools.islice(lex_waiter.delays('FastBot'), 2)) == [1, 1]
+    assert list(itertools.islice(lex_waiter.delays('SlowBot'), 2)) == [20, 20]
+
+def test_jitter_stays_within_bounds():
+    clock, lex_waiter = waiter(FakeLexClient(['InProgress'] * 40 + ['Completed']), jitter=0.2, min_delay=1, max_delay=20, backoff=1.5)
+    lex_waiter.wait(importId='IMPORT0001')
+    delays = list(itertools.islice(lex_waiter.delays(), len(clock.sleeps)))
+    assert len(clock.sleeps) == 41
+    for slept, delay in zip(clock.sleeps, delays):
+        assert delay * 0.8 <= slept <= delay * 1.2
+    assert len(set(round(slept / delay, 6) for slept, delay in zip(clock.sleeps, delays))) > 1
+
+def test_wait_returns_the_last_response():
+    client = FakeLexClient(['InProgress', 'InProgress', 'Completed'])
+    clock, lex_waiter = waiter(client, min_delay=1, backoff=2)
+    assert lex_waiter.wait(importId='IMPORT0001') == {'importStatus': 'Completed'}
+    assert client.calls == [{'importId': 'IMPORT0001'}] * 3
+    assert clock.sleeps == [1, 2, 4]
+    assert lex_waiter.last_duration == 7
+
+def test_wait_records_its_duration():
+    history = LexWaitHistory()
+    clock, lex_waiter = waiter(FakeLexClient(['InProgress', 'Completed']), history=history, min_delay=1, backoff=2)
+    lex_waiter.wait(history_key='OrderBot', importId='IMPORT0001')
+    lex_waiter.wait(importId='IMPORT0002')
+    assert history.samples('bot_import_completed', 'OrderBot') == [3]
+
+def test_history_keeps_the_last_samples_and_their_median():
+    history = LexWaitHistory(max_samples=3)
+    assert history.expected_duration('bot_locale_built', 'OrderBot/en_GB') is None
+    for duration in (1, 50, 10, 20, 30):
+        history.record('bot_locale_built', 'OrderBot/en_GB', duration)
+    assert history.samples('bot_locale_built', 'OrderBot/en_GB') == [10, 20, 30]
+    assert history.expected_duration('bot_locale_built', 'OrderBot/en_GB') == 20
+    assert history.expected_duration('bot_import_completed', 'OrderBot/en_GB') is None
+
+def test_history_is_persisted(tmp_path):
+    LexWaitHistory(str(tmp_path / 'history.json')).record('bot_import_completed', 'OrderBot', 12)
+    assert LexWaitHistory(str(tmp_path / 'history.json')).expected_duration('bot_import_completed', 'OrderBot') == 12
+
+def test_deadline_expiry():
+    client = FakeLexClient(['InProgress'])
+    clock, lex_waiter = waiter(client, min_delay=1, max_delay=4, backoff=2, deadline=10)
+    with pytest.raises(LexWaiterError, match='deadline of 10s exceeded') as error:
+        lex_waiter.wait(importId='IMPORT0001')
+    # the last delay is cut short at the deadline
+    assert clock.sleeps == [1, 2, 4, 3]
+    assert error.value.last_response == {'importStatus': 'InProgress'}
+    assert lex_waiter.last_duration is None
+
+def test_failure_status_raises():
+    clock, lex_waiter = waiter(FakeLexClient(['InProgress', 'Failed']))
+    with pytest.raises(LexWaiterError, match='resource reached status Failed'):
+        lex_waiter.wait(importId='IMPORT0001')
+
+def test_failure_status_within_grace_period_is_polled_again():
+    client = FakeLexClient(['NotBuilt', 'NotBuilt', 'Built'], status_key='botLocaleStatus')
+    clock, lex_waiter = waiter(client, 'bot_locale_built', min_delay=2, backoff=2)
+    assert lex_waiter.wait(botId='BOTID', botVersion='DRAFT', localeId='en_GB') == {'botLocaleStatus': 'Built'}
+    assert clock.sleeps == [2, 4, 8]
+
+def test_failure_status_after_grace_period_raises():
+    client = FakeLexClient(['NotBuilt'], status_key='botLocaleStatus')
+    clock, lex_waiter = waiter(client, 'bot_locale_built', min_delay=2, backoff=2)
+    with pytest.raises(LexWaiterError, match='NotBuilt'):
+        lex_waiter.wait(botId='BOTID', botVersion='DRAFT', localeId='en_GB')
+    # 2s and 6s are within the 10s grace period of the locale builds
+    assert clock.sleeps == [2, 4, 8]
+
+def test_not_found_is_polled_again_when_expected():
+    client = FakeLexClient([not_found(), 'Creating', 'Available'], status_key='botStatus')
+    clock, lex_waiter = waiter(client, 'bot_version_available')
+    assert lex_waiter.wait(botId='BOTID', botVersion='2') == {'botStatus': 'Available'}
+
+def test_not_found_raises_otherwise():
+    clock, lex_waiter = waiter(FakeLexClient([not_found()]))
+    with pytest.raises(ClientError):
+        lex_waiter.wait(importId='IMPORT0001')
+
+def test_status_callback():
+    statuses = []
+    clock, lex_waiter = waiter(
+        FakeLexClient(['InProgress', 'Completed']),
+        min_delay=1, backoff=2,
+        status_callback=lambda waiter_name, status, elapsed, attempt: statuses.append((waiter_name, status, elapsed, attempt))
+    )
+    lex_waiter.wait(importId='IMPORT0001')
+    assert statuses == [('bot_import_completed', 'InProgress', 1, 1), ('bot_import_completed', 'Completed', 3, 2)]
+
+def test_wait_async():
+    client = FakeLexClient(['InProgress', 'Completed'])
+    clock, lex_waiter = waiter(client, min_delay=1, backoff=2, deadline=2)
+    assert asyncio.run(lex_waiter.wait_async(importId='IMPORT0001')) == {'importStatus': 'Completed'}
+    assert clock.sleeps == [1, 1]